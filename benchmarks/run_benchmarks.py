@@ -0,0 +1,352 @@
+"""Benchmarks of the read -> sort -> split -> render pipeline and the CLI cold start.
+
+Synthetic skill groups are written to a temporary app dir, so the real skill groups are never touched.
+The results are saved as json and compared against a stored baseline, a slower result than the
+tolerance allows or a command loading plotting libraries it does not need fails the run.
+
+    python benchmarks/run_benchmarks.py                   # full matrix, compared to the baseline
+    python benchmarks/run_benchmarks.py --quick           # small groups and few columns only
+    python benchmarks/run_benchmarks.py --save-baseline   # store the results as new baseline
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import UTC, datetime
+from importlib import metadata
+from pathlib import Path
+from typing import Any
+
+_BENCHMARK_DIR = Path(__file__).resolve().parent
+_DEFAULT_RESULT_FILE = _BENCHMARK_DIR / "results.json"
+_DEFAULT_BASELINE_FILE = _BENCHMARK_DIR / "baseline.json"
+_SIZES = [10, 100, 1_000, 10_000]
+_QUICK_SIZES = [10, 100]
+_COLUMNS = list(range(1, 11))
+_QUICK_COLUMNS = [1, 2]
+_GROUP_NAME = "benchmark"
+# relative slow down accepted before a result counts as regression, small absolute changes are noise
+_TOLERANCE = 0.25
+_MIN_DIFFERENCE = 0.005
+# commands which only handle data must not load any of the plotting or validation libraries
+_HEAVY_MODULES = ["matplotlib", "numpy", "pandas", "jsonschema", "PIL"]
+# import-skills is only light for valid data, like the benchmarked import file:
+# jsonschema is loaded just to explain invalid skills, and pandas for csv or parquet files
+_LIGHT_COMMANDS = {
+    "add",
+    "list-groups",
+    "list-skills",
+    "remove",
+    "delete-group",
+    "clear-cache",
+    "export-skills",
+    "import-skills",
+}
+# runs the cli and writes the loaded heavy modules to the file given in the environment
+_CLI_SNIPPET = f"""
+import atexit, json, os, sys
+def _report():
+    with open(os.environ["BENCHMARK_MODULES_FILE"], "w") as file:
+        json.dump([m for m in {_HEAVY_MODULES!r} if m in sys.modules], file)
+atexit.register(_report)
+from skill_plotter.main import app
+app()
+"""
+
+
+def _isolate_app_dir(app_dir: Path) -> dict[str, str]:
+    """Point the app dir of skill plotter to the given folder, returns the environment for sub processes.
+
+    The matplotlib config dir is kept, otherwise the font cache would be rebuilt and distort the timings.
+    """
+    import matplotlib as mpl
+
+    env = {
+        "HOME": str(app_dir),
+        "XDG_CONFIG_HOME": str(app_dir),
+        "APPDATA": str(app_dir),
+        "MPLCONFIGDIR": mpl.get_configdir(),
+        "MPLBACKEND": "Agg",
+    }
+    os.environ.update(env)
+    return {**os.environ, **env}
+
+
+def make_skills(n_skills: int) -> dict[str, dict[str, Any]]:
+    """Build a reproducible skill group, with one category for every ten skills (at most 100)."""
+    n_categories = min(max(n_skills // 10, 1), 100)
+    return {
+        f"Skill {index:05d}": {"level": (index * 7 % 21) / 2, "category": f"Category {index % n_categories:03d}"}
+        for index in range(n_skills)
+    }
+
+
+def _best_time(function: Callable[[], Any], repeat: int) -> float:
+    """Return the fastest of the given number of runs in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def _peak_memory(function: Callable[[], Any]) -> int:
+    """Return the peak of the traced memory during the function call in bytes."""
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def bench_stages(sizes: list[int], columns: list[int], repeat: int) -> dict[str, dict[str, float]]:
+    """Time each data preparation stage for each group size."""
+    from skill_plotter import preparator
+
+    results: dict[str, dict[str, float]] = {}
+    for n_skills in sizes:
+        preparator.write_file(make_skills(n_skills), _GROUP_NAME)
+        table = preparator.read_table(_GROUP_NAME)
+        sorted_table = table.sorted_by_category()
+        stages = {
+            "read_table": _best_time(lambda: preparator.read_table(_GROUP_NAME), repeat),
+            "sorted_by_category": _best_time(table.sorted_by_category, repeat),
+        }
+        for n_columns in columns:
+
+            def split(n_columns: int = n_columns):
+                sorted_table.split_columns(n_columns)
+
+            stages[f"split_columns[{n_columns}]"] = _best_time(split, repeat)
+        results[str(n_skills)] = stages
+        print(f"stages {n_skills:>6} skills: " + ", ".join(f"{k} {v * 1000:.2f}ms" for k, v in stages.items()))
+    return results
+
+
+def _style_combinations() -> list[list[Any]]:
+    """Return all combinations of the styles, including no style."""
+    from skill_plotter.utils import StyleTypes
+
+    styles = list(StyleTypes)
+    return [
+        list(combination) for size in range(len(styles) + 1) for combination in itertools.combinations(styles, size)
+    ]
+
+
+def bench_renders(
+    sizes: list[int], columns: list[int], repeat: int, output_dir: Path, memory: bool
+) -> list[dict[str, Any]]:
+    """Time the picture generation for each file type, style combination and column count."""
+    from skill_plotter.plotter import generate_skill_picture
+    from skill_plotter.skill_table import SkillTable
+    from skill_plotter.utils import PictureTypes
+
+    results = []
+    for n_skills in sizes:
+        plot_data = SkillTable.from_data(make_skills(n_skills)).sorted_by_category()
+        for file_type, style, n_columns in itertools.product(PictureTypes, _style_combinations(), columns):
+            save_name = str(output_dir / "render")
+            target = Path(f"{save_name}.{file_type.value}")
+
+            def render(file_type: PictureTypes = file_type, style: list = style, n_columns: int = n_columns):
+                # an existing svg would be patched instead of written, always start from scratch
+                target.unlink(missing_ok=True)
+                generate_skill_picture(plot_data, n_columns, save_name, file_type, style=style)
+
+            result: dict[str, Any] = {
+                "skills": n_skills,
+                "file_type": file_type.value,
+                "style": [s.value for s in style],
+                "columns": n_columns,
+            }
+            try:
+                result["seconds"] = _best_time(render, repeat)
+                if memory:
+                    result["peak_memory"] = _peak_memory(render)
+            except Exception as err:
+                # e.g. the raster size limit of matplotlib for very long columns
+                result["error"] = f"{type(err).__name__}: {err}"
+            results.append(result)
+            print(f"render {_render_key(result)}: " + _format_render(result))
+    return results
+
+
+def _render_key(result: dict[str, Any]) -> str:
+    """Build the unique name of a render benchmark, used to compare against the baseline."""
+    style = "+".join(result["style"]) or "default"
+    return f"{result['skills']} skills/{result['file_type']}/{style}/{result['columns']} columns"
+
+
+def _format_render(result: dict[str, Any]) -> str:
+    if "error" in result:
+        return f"failed ({result['error']})"
+    text = f"{result['seconds'] * 1000:.1f}ms"
+    if "peak_memory" in result:
+        text += f", peak {result['peak_memory'] / 1024**2:.1f}MB"
+    return text
+
+
+def _cli_commands(work_dir: Path) -> dict[str, list[str]]:
+    """Arguments to run each command with, commands which wait for input or run forever only show their help."""
+    import_file = work_dir / "import.json"
+    import_file.write_text(json.dumps(make_skills(100)), encoding="utf-8")
+    return {
+        "main": ["-g", _GROUP_NAME, "-n", str(work_dir / "cli_main"), "--no-cache"],
+        "render-all": [_GROUP_NAME, "-o", str(work_dir), "-w", "1"],
+        "serve": ["--help"],
+        "add": ["Benchmark", "5", "-g", "benchmark_cli"],
+        "interactive-add": ["--help"],
+        "list-groups": [],
+        "list-skills": ["-g", _GROUP_NAME],
+        "remove": ["Benchmark", "-g", "benchmark_cli"],
+        "interactive-remove": ["--help"],
+        "clear-cache": [],
+        "export-skills": [str(work_dir / "export"), "-g", _GROUP_NAME],
+        "import-skills": [str(import_file), "-g", "benchmark_import"],
+        "delete-group": ["benchmark_import"],
+    }
+
+
+def bench_cli(work_dir: Path, env: dict[str, str], repeat: int) -> dict[str, dict[str, Any]]:
+    """Measure the cold start of each command in a new interpreter and check which heavy modules it loads."""
+    from skill_plotter import preparator
+
+    preparator.write_file(make_skills(100), _GROUP_NAME)
+    modules_file = work_dir / "modules.json"
+    results: dict[str, dict[str, Any]] = {}
+    for command, arguments in _cli_commands(work_dir).items():
+        args = [sys.executable, "-c", _CLI_SNIPPET] + ([] if command == "main" else [command]) + arguments
+
+        def run(args: list[str] = args):
+            subprocess.run(
+                args,
+                env={**env, "BENCHMARK_MODULES_FILE": str(modules_file)},
+                check=True,
+                capture_output=True,
+            )
+
+        seconds = _best_time(run, repeat)
+        heavy_modules = json.loads(modules_file.read_text(encoding="utf-8"))
+        results[command] = {"seconds": seconds, "heavy_modules": heavy_modules}
+        if command in _LIGHT_COMMANDS:
+            results[command]["within_import_budget"] = not heavy_modules
+        loaded = ", ".join(heavy_modules) or "none"
+        print(f"cli {command:>18}: {seconds * 1000:.0f}ms, heavy modules: {loaded}")
+    return results
+
+
+def _flatten_timings(results: dict[str, Any]) -> dict[str, float]:
+    """Collect all timings of the results with a unique name each."""
+    timings = {}
+    for size, stages in results.get("stages", {}).items():
+        for stage, seconds in stages.items():
+            timings[f"stage {size} skills/{stage}"] = seconds
+    for result in results.get("renders", []):
+        if "seconds" in result:
+            timings[f"render {_render_key(result)}"] = result["seconds"]
+    for command, result in results.get("cli", {}).items():
+        timings[f"cli {command}"] = result["seconds"]
+    return timings
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Return a description of each result slower than the baseline allows."""
+    regressions = []
+    current = _flatten_timings(results)
+    for name, base_seconds in _flatten_timings(baseline).items():
+        seconds = current.get(name)
+        if seconds is None:
+            continue
+        if seconds > base_seconds * (1 + tolerance) and seconds - base_seconds > _MIN_DIFFERENCE:
+            regressions.append(
+                f"{name}: {seconds * 1000:.1f}ms, baseline {base_seconds * 1000:.1f}ms "
+                f"(+{(seconds / base_seconds - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="Only use small groups and one or two columns")
+    parser.add_argument("--sizes", type=int, nargs="+", help="Number of skills of the synthetic groups")
+    parser.add_argument("--columns", type=int, nargs="+", help="Column counts to render")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each benchmark, the fastest one is used")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory measurement of the renders")
+    parser.add_argument("--skip", choices=["stages", "renders", "cli"], nargs="+", default=[], help="Parts to skip")
+    parser.add_argument("--output", type=Path, default=_DEFAULT_RESULT_FILE, help="File to save the results in")
+    parser.add_argument("--baseline", type=Path, default=_DEFAULT_BASELINE_FILE, help="Baseline to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="Save the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=_TOLERANCE, help="Accepted relative slow down")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = _parse_args()
+    sizes = args.sizes or (_QUICK_SIZES if args.quick else _SIZES)
+    columns = args.columns or (_QUICK_COLUMNS if args.quick else _COLUMNS)
+    with tempfile.TemporaryDirectory(prefix="skill-plotter-benchmark-") as tmp_dir:
+        work_dir = Path(tmp_dir)
+        # needs to be done before skill plotter is imported, the storage module takes the app dir path on import.
+        # the dir itself is only created by the first write
+        env = _isolate_app_dir(work_dir)
+        from skill_plotter import __version__
+
+        results: dict[str, Any] = {
+            "meta": {
+                "date": datetime.now(UTC).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "versions": {
+                    "skill-plotter": __version__,
+                    **{name: metadata.version(name) for name in ("matplotlib", "typer")},
+                },
+                "sizes": sizes,
+                "columns": columns,
+                "repeat": args.repeat,
+            }
+        }
+        if "stages" not in args.skip:
+            results["stages"] = bench_stages(sizes, columns, args.repeat)
+        if "renders" not in args.skip:
+            results["renders"] = bench_renders(sizes, columns, args.repeat, work_dir, not args.no_memory)
+        if "cli" not in args.skip:
+            results["cli"] = bench_cli(work_dir, env, args.repeat)
+
+    args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(f"Saved results to {args.output}")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Saved results as baseline to {args.baseline}")
+
+    failed = False
+    over_budget = [
+        name for name, result in results.get("cli", {}).items() if not result.get("within_import_budget", True)
+    ]
+    if over_budget:
+        failed = True
+        print(f"Commands loading heavy modules they do not need: {', '.join(over_budget)}")
+    if args.baseline.exists() and not args.save_baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        if regressions:
+            failed = True
+            print(f"{len(regressions)} regressions against {args.baseline}:")
+            for regression in regressions:
+                print(f"  {regression}")
+        else:
+            print(f"No regressions against {args.baseline}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Module to render multiple groups and variants in parallel."""
+
+import itertools
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import typer
+
+from .render import render_group
+from .storage import get_store
+from .utils import PictureTypes, StyleTypes, failure_print, success_print
+
+
+@dataclass
+class RenderJob:
+    group: str
+    save_name: str
+    file_type: PictureTypes
+    style: list[StyleTypes]
+
+    @property
+    def target(self) -> str:
+        return f"{self.save_name}.{self.file_type.value}"
+
+
+@dataclass
+class RenderResult:
+    job: RenderJob
+    duration: float
+    cached: bool = False
+    error: str | None = None
+
+
+def build_jobs(
+    groups: list[str],
+    file_types: list[PictureTypes],
+    style_variants: list[list[StyleTypes]],
+    output_dir: Path,
+) -> list[RenderJob]:
+    """Build the cross product of groups, file types and style variants.
+
+    The style is only added to the file name if there are multiple style variants.
+    """
+    jobs = []
+    for group, file_type, style in itertools.product(groups, file_types, style_variants):
+        name = group
+        if len(style_variants) > 1:
+            name += "_" + ("-".join(s.value for s in style) or "default")
+        jobs.append(RenderJob(group, str(output_dir / name), file_type, style))
+    return jobs
+
+
+def _run_job(job: RenderJob, render_options: dict[str, Any]) -> RenderResult:
+    """Render a single job, errors are caught so one bad group does not abort the batch."""
+    start = time.perf_counter()
+    # a missing group would be rendered as empty picture, named groups can have a typo
+    if not get_store().exists(job.group):
+        return RenderResult(job, time.perf_counter() - start, error=f"Group {job.group} does not exist")
+    try:
+        cached = render_group(job.group, job.save_name, job.file_type, style=job.style, **render_options)
+    except Exception as err:
+        return RenderResult(job, time.perf_counter() - start, error=f"{type(err).__name__}: {err}")
+    return RenderResult(job, time.perf_counter() - start, cached=cached)
+
+
+def render_jobs(jobs: list[RenderJob], workers: int, render_options: dict[str, Any]) -> list[RenderResult]:
+    """Render all jobs in a pool of worker processes.
+
+    The render options are the keyword arguments of `render_group`, used for every job.
+    Results keep the order of the given jobs.
+    """
+    # spawning processes is not worth it for a single worker
+    if workers <= 1:
+        return [_run_job(job, render_options) for job in jobs]
+    results: list[RenderResult] = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures: list[Future[RenderResult]] = [executor.submit(_run_job, job, render_options) for job in jobs]
+        for job, future in zip(jobs, futures):
+            # a crashed worker process (not an exception in the job) ends up here
+            try:
+                results.append(future.result())
+            except Exception as err:
+                results.append(RenderResult(job, 0.0, error=f"{type(err).__name__}: {err}"))
+    return results
+
+
+def print_summary(results: list[RenderResult], total_time: float):
+    """Print a table with the timing and status of each render."""
+    template = "|{:^30}|{:^30}|{:^10}|{:^10}|"
+    separator = "-" * 85
+    typer.echo(separator)
+    typer.echo(template.format("Group", "File", "Time [s]", "Status"))
+    typer.echo(separator)
+    for result in results:
+        status = "failed" if result.error else "cached" if result.cached else "rendered"
+        typer.echo(template.format(result.job.group, Path(result.job.target).name, f"{result.duration:.3f}", status))
+    typer.echo(separator)
+    failed = [result for result in results if result.error]
+    for result in failed:
+        failure_print(f"{result.job.group} -> {result.job.target}: {result.error}")
+    if failed:
+        failure_print(f"{len(failed)} of {len(results)} renders failed, took {total_time:.2f} s")
+    else:
+        success_print(f"Rendered {len(results)} pictures in {total_time:.2f} s")
@@ -0,0 +1,203 @@
+"""Module for the content addressed render cache.
+
+Rendered pictures are stored in the app dir, keyed by a hash over everything that changes the output.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from collections.abc import Callable
+from contextlib import suppress
+from functools import cache
+from importlib import metadata
+from pathlib import Path
+from typing import Any
+
+from . import __version__
+from .skill_table import SkillTable
+from .storage import file_lock, get_app_dir
+from .utils import _COLOR, StyleTypes
+
+_CACHE_DIR_NAME = "render_cache"
+# upper bound for all cached files, least recently used ones are removed first
+_MAX_CACHE_BYTES = 200 * 1024 * 1024
+# the eviction makes some room, so it is not needed again for the next stored picture
+_EVICTED_CACHE_BYTES = _MAX_CACHE_BYTES * 9 // 10
+# total size of the cached pictures, updated with each stored one instead of looking at all files
+_SIZE_FILE_NAME = ".size"
+_LOCK_FILE_NAME = ".lock"
+# raise whenever the drawing code changes the pictures, the package version is not raised for each change
+RENDER_FORMAT_VERSION = 3
+# libraries which change the pictures, besides skill plotter itself
+_RENDER_LIBRARIES = ("matplotlib", "numpy", "pillow")
+
+
+@cache
+def _library_versions() -> dict[str, str]:
+    """Return the versions of the libraries involved in rendering."""
+    versions = {"skill-plotter": __version__, "render-format": str(RENDER_FORMAT_VERSION)}
+    # metadata lookup is way cheaper than importing the libraries just for the version
+    for library in _RENDER_LIBRARIES:
+        try:
+            versions[library] = metadata.version(library)
+        except metadata.PackageNotFoundError:
+            versions[library] = "unknown"
+    return versions
+
+
+def _get_cache_dir(create: bool = False) -> Path:
+    """Return the cache dir within the app dir, it is only created for storing pictures."""
+    cache_dir = get_app_dir() / _CACHE_DIR_NAME
+    if create:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def build_cache_key(
+    skills: SkillTable,
+    n_splits: int,
+    file_type: str,
+    bar_height: float,
+    background_height: float,
+    background_color: _COLOR,
+    bar_color: _COLOR,
+    font_color: _COLOR,
+    canvas_color: _COLOR | None,
+    style: list[StyleTypes],
+) -> str:
+    """Build the cache key over the skill names and levels and all render options."""
+    payload = {
+        # keep it as list, the order of the skills is also the plotting order
+        "skills": list(skills.items()),
+        "n_splits": n_splits,
+        "file_type": file_type,
+        "bar_height": bar_height,
+        "background_height": background_height,
+        "background_color": background_color,
+        "bar_color": bar_color,
+        "font_color": font_color,
+        "canvas_color": canvas_color,
+        "style": sorted({s.value for s in style}),
+        "versions": _library_versions(),
+    }
+    serialized = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def combine_keys(keys: list[str]) -> str:
+    """Build one cache key for a file made of several pictures, like a multi page pdf."""
+    return hashlib.sha256("".join(keys).encode("utf-8")).hexdigest()
+
+
+def _cache_file(key: str, file_type: str, create: bool = False) -> Path:
+    """Return the path of the cached picture for the given key, creates the cache dir for storing it if needed."""
+    return _get_cache_dir(create) / f"{key}.{file_type}"
+
+
+def restore_cached(key: str, file_type: str, target: Path) -> bool:
+    """Copy the cached picture to the target, if there is one.
+
+    Returns True if the cache was hit.
+    """
+    cached_file = _cache_file(key, file_type)
+    if not cached_file.exists():
+        return False
+    shutil.copyfile(cached_file, target)
+    _mark_used(cached_file)
+    return True
+
+
+def read_cached(key: str, file_type: str) -> bytes | None:
+    """Return the cached picture for the given key, None if there is none."""
+    cached_file = _cache_file(key, file_type)
+    try:
+        picture = cached_file.read_bytes()
+    except FileNotFoundError:
+        return None
+    _mark_used(cached_file)
+    return picture
+
+
+def _mark_used(cached_file: Path) -> None:
+    """Update the modification time, it is used as last access time for the eviction."""
+    # a read only cache is still used, it is just not evicted by access
+    with suppress(OSError):
+        cached_file.touch()
+
+
+def store_in_cache(key: str, file_type: str, source: Path) -> None:
+    """Store the rendered picture in the cache and evict old entries if the cache is too big."""
+    if not source.exists():
+        return
+    _store(key, file_type, lambda tmp_file: shutil.copyfile(source, tmp_file))
+
+
+def store_bytes_in_cache(key: str, file_type: str, picture: bytes | memoryview) -> None:
+    """Store the picture rendered in memory in the cache, like `store_in_cache`."""
+    _store(key, file_type, lambda tmp_file: tmp_file.write_bytes(picture))
+
+
+def _store(key: str, file_type: str, write: Callable[[Path], Any]) -> None:
+    """Write the picture with the given function and put it into the cache, keeping track of the cache size."""
+    cached_file = _cache_file(key, file_type, create=True)
+    # write to temporary file first, so a parallel reader never gets a partial file
+    tmp_file = cached_file.with_suffix(f"{cached_file.suffix}.{os.getpid()}.tmp")
+    write(tmp_file)
+    added = tmp_file.stat().st_size
+    cache_dir = cached_file.parent
+    with file_lock(cache_dir / _LOCK_FILE_NAME):
+        with suppress(FileNotFoundError):
+            added -= cached_file.stat().st_size
+        os.replace(tmp_file, cached_file)
+        size = _read_size(cache_dir)
+        size = _evict(cache_dir, _MAX_CACHE_BYTES) if size is None else size + added
+        if size > _MAX_CACHE_BYTES:
+            size = _evict(cache_dir, _EVICTED_CACHE_BYTES)
+        _write_size(cache_dir, size)
+
+
+def _read_size(cache_dir: Path) -> int | None:
+    """Return the tracked size of the cache, None if it is not tracked yet or the size file got broken."""
+    try:
+        return int((cache_dir / _SIZE_FILE_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_size(cache_dir: Path, size: int) -> None:
+    (cache_dir / _SIZE_FILE_NAME).write_text(str(size), encoding="utf-8")
+
+
+def _evict(cache_dir: Path, max_bytes: int) -> int:
+    """Remove the least recently used pictures until the cache is within the size limit, returns the size left.
+
+    The caller holds the cache lock, only then the pictures and their tracked size match.
+    """
+    entries = []
+    for file in cache_dir.iterdir():
+        # temporary files are still written by other renders, lock and size file are no pictures
+        if file.name.startswith(".") or file.suffix == ".tmp":
+            continue
+        try:
+            stat = file.stat()
+        except FileNotFoundError:
+            # a reader may have lost the race against a removal from an older version
+            continue
+        entries.append((stat.st_mtime, stat.st_size, file))
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, file in sorted(entries, key=lambda entry: entry[0]):
+        if total_size <= max_bytes:
+            break
+        file.unlink(missing_ok=True)
+        total_size -= size
+    return total_size
+
+
+def clear_cache() -> None:
+    """Remove all cached pictures."""
+    cache_dir = _get_cache_dir()
+    if not cache_dir.exists():
+        return
+    with file_lock(cache_dir / _LOCK_FILE_NAME):
+        _write_size(cache_dir, _evict(cache_dir, 0))
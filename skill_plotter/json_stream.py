@@ -0,0 +1,126 @@
+"""Module to parse big json objects entry by entry, without loading the whole file."""
+
+import codecs
+import json
+from collections.abc import Callable, Iterator
+from typing import Any, BinaryIO
+
+_CHUNK_SIZE = 1024 * 1024
+_WHITESPACE = " \t\n\r"
+# longer than any json token besides strings, an error further away from the end of the buffer is not caused by a cut
+_MAX_TOKEN_LENGTH = 16
+_NUMBER_CHARS = "0123456789+-.eE"
+_JSON_TYPES = {dict: "object", list: "array", str: "string", bool: "boolean", int: "number", float: "number"}
+
+
+class NotAnObjectError(ValueError):
+    """Raised if the file is valid json, but holds no object on the top level."""
+
+    def __init__(self, json_type: str):
+        """Store the json type of the found value."""
+        super().__init__(f"Expecting an object, found {json_type}")
+        self.json_type = json_type
+
+
+class _Reader:
+    """Rolling text buffer over a binary file, only the not yet parsed part is kept."""
+
+    def __init__(self, file: BinaryIO, on_progress: Callable[[int], None] | None, chunk_size: int):
+        """Read the given file in chunks, reporting the read bytes to the progress callback."""
+        self._file = file
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._on_progress = on_progress
+        self._chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self) -> bool:
+        """Append the next chunk to the buffer, returns False at the end of the file."""
+        if self.eof:
+            return False
+        raw = self._file.read(self._chunk_size)
+        if self._on_progress is not None:
+            self._on_progress(len(raw))
+        if not raw:
+            self.eof = True
+            self.buffer = self.buffer[self.pos :] + self._decoder.decode(b"", final=True)
+        else:
+            self.buffer = self.buffer[self.pos :] + self._decoder.decode(raw)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next not whitespace character, empty string at the end of the file."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.read_more():
+                return ""
+
+    def expect(self, char: str) -> None:
+        """Consume the given character, raise if something else is found."""
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buffer, self.pos)
+        self.pos += 1
+
+    def decode_value(self, decoder: json.JSONDecoder) -> Any:
+        """Decode the next complete json value, reads more data until it is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as err:
+                # only a string or a token cut by the end of the buffer can be completed by more data
+                complete = err.pos < len(self.buffer) - _MAX_TOKEN_LENGTH and not err.msg.startswith("Unterminated")
+                if complete or not self.read_more():
+                    raise
+                continue
+            # a number at the end of the buffer may continue in the next chunk, also after a cut "1." or "1e"
+            if not self.eof and not self.buffer[end:].strip(_NUMBER_CHARS):
+                self.read_more()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_object_items(
+    file: BinaryIO,
+    on_progress: Callable[[int], None] | None = None,
+    chunk_size: int = _CHUNK_SIZE,
+) -> Iterator[tuple[str, Any]]:
+    """Yield the key value pairs of the top level json object of the file one at a time.
+
+    Only the currently parsed entry is kept in memory, not the whole file.
+    Raises a JSONDecodeError if the file is no valid json and a NotAnObjectError if it holds another json value.
+    """
+    decoder = json.JSONDecoder()
+    reader = _Reader(file, on_progress, chunk_size)
+    if reader.peek() not in ("{", ""):
+        # parsed as a whole, to tell invalid json from a value of the wrong type
+        value = reader.decode_value(decoder)
+        if reader.peek():
+            raise json.JSONDecodeError("Extra data", reader.buffer, reader.pos)
+        raise NotAnObjectError(_JSON_TYPES.get(type(value), "null"))
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.pos += 1
+    else:
+        while True:
+            if reader.peek() != '"':
+                raise json.JSONDecodeError(
+                    "Expecting property name enclosed in double quotes", reader.buffer, reader.pos
+                )
+            key = reader.decode_value(decoder)
+            reader.expect(":")
+            yield key, reader.decode_value(decoder)
+            if reader.peek() == ",":
+                reader.pos += 1
+                continue
+            reader.expect("}")
+            break
+    if reader.peek():
+        raise json.JSONDecodeError("Extra data", reader.buffer, reader.pos)
@@ -0,0 +1,244 @@
+"""Module to compute the figure layout from cached font metrics, instead of measuring the drawn labels.
+
+The result is the same as the tight layout of matplotlib, but without drawing the figure first.
+The glyph advances of a font are only measured once, they are stored in the app dir.
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+from functools import cache
+from importlib import metadata
+from itertools import pairwise
+from pathlib import Path
+from typing import Any
+
+from .skill_table import SkillColumn
+from .storage import get_app_dir
+
+# a non json extension, otherwise the file would be listed as skill group
+_METRICS_FILE_NAME = "font_metrics.cache"
+# font used by matplotlib if nothing else is configured, it is shipped with matplotlib
+DEFAULT_FONT_FILE = "DejaVuSans.ttf"
+# glyphs are measured at this size in points, the metrics are stored relative to the font size
+_REFERENCE_SIZE = 1000
+POINTS_PER_INCH = 72
+COLUMN_WIDTH = 10 * POINTS_PER_INCH
+ROW_HEIGHT = 1 * POINTS_PER_INCH
+FONT_SIZE = 36
+# padding around the figure and between the columns (tight layout default of 1.08 font sizes)
+FIGURE_PAD = 1.08 * 10
+# distance between label and axis, matplotlib keeps the length of the hidden ticks (3.5) besides the tick pad (3.5)
+LABEL_PAD = 7.0
+# length of a full bar in data coordinates, the diagram writers share the geometry of the matplotlib diagram
+BAR_MAX_LEN = 10
+# border width relative to the height difference of background and bar
+BORDER_WIDTH_MULTIPLIER = 1.3
+# relative data margin matplotlib adds to the limits
+_DATA_MARGIN = 0.05
+# the metrics of all fonts are shared, renders in parallel threads measure and save them one at a time
+_METRICS_LOCK = threading.Lock()
+
+
+def font_path(font_file: str) -> Path:
+    """Return the path of the font file, relative file names are looked up in the fonts of matplotlib."""
+    path = Path(font_file)
+    if not path.is_absolute():
+        from matplotlib import get_data_path
+
+        path = Path(get_data_path()) / "fonts" / "ttf" / path
+    return path
+
+
+class FontMetrics:
+    """Glyph advances and kerning of a font, relative to the font size.
+
+    Missing glyphs are measured with the font engine of matplotlib on demand,
+    so matplotlib is only loaded if there are new characters.
+    """
+
+    def __init__(self, font_file: str, data: dict[str, Any]):
+        """Use the given, already measured metrics of the font file."""
+        self.font_file = font_file
+        self._advances: dict[str, float] = data.setdefault("advances", {})
+        self._kerning: dict[str, float] = data.setdefault("kerning", {})
+        self._font: Any = None
+        self.changed = False
+
+    def _get_font(self) -> Any:
+        """Open the font file once."""
+        if self._font is None:
+            from matplotlib.ft2font import FT2Font
+
+            self._font = FT2Font(str(font_path(self.font_file)))
+            self._font.set_size(_REFERENCE_SIZE, POINTS_PER_INCH)
+        return self._font
+
+    def _measure(self, text: str) -> None:
+        """Measure all not yet known glyphs and glyph pairs of the text."""
+        from matplotlib.ft2font import Kerning, LoadFlags
+
+        font = self._get_font()
+        for char in set(text) - self._advances.keys():
+            glyph = font.load_char(ord(char), flags=LoadFlags.NO_HINTING)
+            self._advances[char] = glyph.linearHoriAdvance / 65536 / _REFERENCE_SIZE
+        for left, right in pairwise(text):
+            pair = left + right
+            if pair not in self._kerning:
+                kerning = font.get_kerning(
+                    font.get_char_index(ord(left)), font.get_char_index(ord(right)), Kerning.UNFITTED
+                )
+                self._kerning[pair] = kerning / 64 / _REFERENCE_SIZE
+        self.changed = True
+
+    def text_width(self, text: str, font_size: float) -> float:
+        """Return the width of the text in points."""
+        pairs = [left + right for left, right in pairwise(text)]
+        if not self._advances.keys() >= set(text) or not self._kerning.keys() >= set(pairs):
+            with _METRICS_LOCK:
+                self._measure(text)
+        width = sum(self._advances[char] for char in text) + sum(self._kerning[pair] for pair in pairs)
+        return width * font_size
+
+
+def _get_metrics_file() -> Path:
+    """Return the path of the font metrics file."""
+    return get_app_dir() / _METRICS_FILE_NAME
+
+
+@cache
+def _load_metrics() -> dict[str, Any]:
+    """Load the stored metrics of all fonts, only valid for the installed matplotlib version."""
+    version = metadata.version("matplotlib")
+    try:
+        with open(_get_metrics_file(), encoding="utf-8") as file:
+            data = json.load(file)
+    except (OSError, json.JSONDecodeError):
+        data = {}
+    if not isinstance(data, dict) or data.get("matplotlib") != version:
+        data = {"matplotlib": version, "fonts": {}}
+    return data
+
+
+def get_font_metrics(font_file: str = DEFAULT_FONT_FILE) -> FontMetrics:
+    """Return the metrics of the font, fonts are identified by their file name."""
+    fonts = _load_metrics()["fonts"]
+    return FontMetrics(font_file, fonts.setdefault(Path(font_file).name, {}))
+
+
+def save_font_metrics(metrics: FontMetrics) -> None:
+    """Write the metrics file if new glyphs were measured.
+
+    The file is replaced at once, so parallel renders never read a partial file.
+    """
+    if not metrics.changed:
+        return
+    metrics_file = get_app_dir(create=True) / _METRICS_FILE_NAME
+    tmp_file = metrics_file.with_suffix(f".{os.getpid()}.tmp")
+    with _METRICS_LOCK:
+        with open(tmp_file, "w", encoding="utf-8") as file:
+            json.dump(_load_metrics(), file)
+        os.replace(tmp_file, metrics_file)
+    metrics.changed = False
+
+
+def axis_scales(
+    n_skills: int, plot_width: float, plot_height: float, bar_height: float, background_height: float
+) -> tuple[float, float, float]:
+    """Emulate the limits of the matplotlib diagram, returns the x and y scale (points per unit) and y start."""
+    border_height = max((background_height - bar_height) / 2, 0)
+    # bars start at zero without margin, only the end got one
+    x_extent = BAR_MAX_LEN + border_height * BORDER_WIDTH_MULTIPLIER * 2
+    x_scale = plot_width / (x_extent * (1 + _DATA_MARGIN))
+    max_height = max(bar_height, background_height)
+    # matplotlib expands a zero data range, just use one unit then
+    y_extent = (n_skills - 1 + max_height) or 1
+    y_min = -max_height / 2 - _DATA_MARGIN * y_extent
+    y_scale = plot_height / (y_extent * (1 + 2 * _DATA_MARGIN))
+    return x_scale, y_scale, y_min
+
+
+@dataclass(frozen=True)
+class FigureLayout:
+    """Size of the figure in points and the position of the columns.
+
+    The relative values are the subplot parameters of matplotlib.
+    """
+
+    width: float
+    height: float
+    left: float
+    right: float
+    top: float
+    bottom: float
+    wspace: float
+    n_columns: int
+
+    @property
+    def axes_width(self) -> float:
+        """Width of a single column without its labels, in points."""
+        return (self.right - self.left) * self.width / (self.n_columns + self.wspace * (self.n_columns - 1))
+
+    @property
+    def axes_height(self) -> float:
+        """Height of the columns in points."""
+        return (self.top - self.bottom) * self.height
+
+    def axes_left(self, column: int) -> float:
+        """Start of the given column in points, from the left side of the figure."""
+        return self.left * self.width + column * self.axes_width * (1 + self.wspace)
+
+    def axes_top(self) -> float:
+        """Start of the columns in points, from the top of the figure."""
+        return (1 - self.top) * self.height
+
+
+def compute_layout(
+    split_skills: list[SkillColumn],
+    font_file: str = DEFAULT_FONT_FILE,
+    figure_pad: float = FIGURE_PAD,
+    label_pad: float = LABEL_PAD,
+) -> FigureLayout:
+    """Calculate the layout of the figure for the skills split into columns.
+
+    Like the tight layout, the space left of each column fits its longest label,
+    all columns get the same width, so the widest label area between two columns is used for all gaps.
+    Labels are centered in their row, so they never exceed the columns vertically.
+
+    Args:
+    ----
+        split_skills (list[SkillColumn]): Skills of each column.
+        font_file (str, optional): Font of the labels, name in the matplotlib fonts or a path.
+        figure_pad (float, optional): Padding around the figure and between columns in points.
+        label_pad (float, optional): Distance between the labels and their column in points.
+
+    Returns:
+    -------
+        FigureLayout: The size of the figure and the position of the columns.
+
+    """
+    n_columns = len(split_skills)
+    width = COLUMN_WIDTH * n_columns
+    # an empty group still gets the height of one row, an empty picture instead of a figure without height
+    height = ROW_HEIGHT * max(len(split_skills[0]), 1)
+    metrics = get_font_metrics(font_file)
+    # columns without any label (only placeholders) got no label area at all
+    label_areas = [
+        max((metrics.text_width(label, FONT_SIZE) + label_pad for label in column if label), default=0)
+        for column in split_skills
+    ]
+    save_font_metrics(metrics)
+    left = figure_pad + label_areas[0]
+    gap = figure_pad + max(label_areas[1:], default=0)
+    axes_width = max((width - left - figure_pad - gap * (n_columns - 1)) / n_columns, 1)
+    return FigureLayout(
+        width=width,
+        height=height,
+        left=left / width,
+        right=1 - figure_pad / width,
+        top=1 - figure_pad / height,
+        bottom=figure_pad / height,
+        wspace=gap / axes_width,
+        n_columns=n_columns,
+    )
@@ -1,14 +1,18 @@
 # pylint: disable=unused-argument
 
+import time
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Annotated, Optional
 
+import click
 import typer
 
-from . import preparator
-from .plotter import BLUE, DARK_GRAY, generate_skill_picture
+from . import batch, cache, preparator, profiling
 from .preparator import DEFAULT_SKILL_FILE_NAME
-from .utils import PictureTypes, StyleTypes, version_callback
+from .query import SkillQuery
+from .render import render_group, render_to_bytes
+from .utils import BLUE, DARK_GRAY, ExportTypes, PictureTypes, StyleTypes, info_print, version_callback
 
 app = typer.Typer()
 
@@ -16,25 +20,72 @@ app = typer.Typer()
 _SKILL_GROUP_ARG = Annotated[str, typer.Option("--skill-group", "-g", help="Use to build different skill groups")]
 
 
+_COLUMNS_ARG = Annotated[int, typer.Option("--columns", "-c", help="Number of columns", min=1, max=10)]
+_CATEGORIES_ARG = Annotated[bool, typer.Option("--categories", help="Group by categories")]
+_BAR_HEIGHT_ARG = Annotated[float, typer.Option("--bar-height", help="Height of the bar", min=0, max=1)]
+_BG_HEIGHT_ARG = Annotated[float, typer.Option("--bg-height", help="Height of the bars background", min=0, max=1)]
+_BAR_COLOR_ARG = Annotated[str, typer.Option("--bar-color", help="Color of the bar")]
+_BG_COLOR_ARG = Annotated[str, typer.Option("--bg-color", help="Color of the bars background")]
+_FONT_COLOR_ARG = Annotated[str, typer.Option("--font-color", help="Color of the font")]
+_CANVAS_COLOR_ARG = Annotated[Optional[str], typer.Option(help="Color behind the plot")]
+_NO_CACHE_ARG = Annotated[bool, typer.Option("--no-cache", help="Always render, do not use the render cache")]
+_MAX_ROWS_ARG = Annotated[
+    Optional[int],
+    typer.Option("--max-rows", help="Split into pages with at most this many rows, e.g. for very big groups", min=1),
+]
+_ONLY_CATEGORY_ARG = Annotated[
+    Optional[list[str]], typer.Option("--only-category", help="Only plot skills of this category, can use multiple")
+]
+_EXCLUDE_CATEGORY_ARG = Annotated[
+    Optional[list[str]],
+    typer.Option("--exclude-category", help="Do not plot skills of this category, can use multiple"),
+]
+_MIN_LEVEL_ARG = Annotated[Optional[float], typer.Option("--min-level", help="Only plot skills of at least this level")]
+_MAX_LEVEL_ARG = Annotated[Optional[float], typer.Option("--max-level", help="Only plot skills of at most this level")]
+_TOP_PER_CATEGORY_ARG = Annotated[
+    Optional[int],
+    typer.Option("--top-per-category", help="Only plot this many skills with the highest level per category", min=1),
+]
+_TOP_ARG = Annotated[
+    Optional[int], typer.Option("--top", help="Only plot this many skills with the highest level", min=1)
+]
+
+
 @app.callback(invoke_without_command=True)
 def main(
     ctx: typer.Context,
-    file_type: Annotated[
-        PictureTypes, typer.Option("--file-type", "-t", help="File type of the output file")
-    ] = PictureTypes.SVG,
-    save_name: Annotated[str, typer.Option("--file-name", "-n", help="Name of the output file")] = "skills",
+    file_types: Annotated[
+        Optional[list[PictureTypes]],
+        typer.Option("--file-type", "-t", help="File type of the output file, can use multiple [default: svg]"),
+    ] = None,
+    save_name: Annotated[
+        str, typer.Option("--file-name", "-n", help="Name of the output file, - writes it to stdout")
+    ] = "skills",
     skill_group: _SKILL_GROUP_ARG = DEFAULT_SKILL_FILE_NAME,
-    columns: Annotated[int, typer.Option("--columns", "-c", help="Number of columns", min=1, max=10)] = 2,
-    group_categories: Annotated[bool, typer.Option("--categories", help="Group by categories")] = False,
-    bar_height: Annotated[float, typer.Option("--bar-height", help="Height of the bar", min=0, max=1)] = 0.6,
-    background_height: Annotated[
-        float, typer.Option("--bg-height", help="Height of the bars background", min=0, max=1)
-    ] = 0.7,
-    bar_color: Annotated[str, typer.Option("--bar-color", help="Color of the bar")] = BLUE,
-    background_color: Annotated[str, typer.Option("--bg-color", help="Color of the bars background")] = DARK_GRAY,
-    font_color: Annotated[str, typer.Option("--font-color", help="Color of the font")] = DARK_GRAY,
-    canvas_color: Annotated[Optional[str], typer.Option(help="Color behind the plot")] = None,
+    columns: _COLUMNS_ARG = 2,
+    group_categories: _CATEGORIES_ARG = False,
+    bar_height: _BAR_HEIGHT_ARG = 0.6,
+    background_height: _BG_HEIGHT_ARG = 0.7,
+    bar_color: _BAR_COLOR_ARG = BLUE,
+    background_color: _BG_COLOR_ARG = DARK_GRAY,
+    font_color: _FONT_COLOR_ARG = DARK_GRAY,
+    canvas_color: _CANVAS_COLOR_ARG = None,
     style: Annotated[Optional[list[StyleTypes]], typer.Option("--style", "-s", help="Style of the plot")] = None,
+    no_cache: _NO_CACHE_ARG = False,
+    max_rows: _MAX_ROWS_ARG = None,
+    only_categories: _ONLY_CATEGORY_ARG = None,
+    exclude_categories: _EXCLUDE_CATEGORY_ARG = None,
+    min_level: _MIN_LEVEL_ARG = None,
+    max_level: _MAX_LEVEL_ARG = None,
+    top_per_category: _TOP_PER_CATEGORY_ARG = None,
+    top: _TOP_ARG = None,
+    profile_file: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--profile",
+            help="Save time and memory of each render stage to this json file, use .prof for a cProfile dump",
+        ),
+    ] = None,
     version: Annotated[Optional[bool], typer.Option("--version", "-V", callback=version_callback)] = None,
 ):
     """Plot the set skills to a svg file.
@@ -48,25 +99,244 @@ def main(
     if style is None:
         style = []
     style_string = ", ".join([s.value for s in style]) if style else "default"
-    typer.echo(f"Using <{skill_group}> skill group, styles: <{style_string}>")
-    typer.echo(f"Plotting skills to <{save_name}.{file_type}>")
-    data = preparator.read_file(skill_group)
-    if group_categories:
-        data = preparator.sort_skills_by_category(data)
-    plot_data = preparator.reduce_data(data)
-    generate_skill_picture(
-        plot_data,
-        columns,
-        save_name,
-        file_type,
-        bar_height,
-        background_height,
-        background_color,
-        bar_color,
-        font_color,
-        canvas_color,
-        style,
+    # stdout may be taken by the picture itself
+    typer.echo(f"Using <{skill_group}> skill group, styles: <{style_string}>", err=save_name == "-")
+    if not file_types:
+        file_types = [PictureTypes.SVG]
+    query = _build_query(only_categories, exclude_categories, min_level, max_level, top_per_category, top)
+    to_stdout = save_name == "-"
+    if to_stdout and (len(file_types) > 1 or max_rows is not None):
+        raise typer.BadParameter("Writing to stdout needs a single file type and no pages", param_hint="-n")
+    if not to_stdout:
+        file_string = ", ".join(f"{save_name}.{t.value}" for t in file_types)
+        typer.echo(f"Plotting skills to <{file_string}>")
+    if max_rows is not None:
+        typer.echo(f"Using pages of at most {max_rows} rows, numbered files (one pdf with all pages) if needed")
+    # the memory tracing would distort the cProfile statistics
+    use_cprofile = profile_file is not None and profile_file.suffix in profiling.CPROFILE_SUFFIXES
+    profile_context = (
+        profiling.profile(memory=not use_cprofile, use_cprofile=use_cprofile) if profile_file else nullcontext()
     )
+    cached = False
+    with profile_context as run:
+        if to_stdout:
+            _render_to_stdout(
+                skill_group,
+                file_types[0],
+                columns,
+                group_categories,
+                bar_height,
+                background_height,
+                background_color,
+                bar_color,
+                font_color,
+                canvas_color,
+                style,
+                use_cache=not no_cache,
+                query=query,
+            )
+        else:
+            cached = render_group(
+                skill_group,
+                save_name,
+                file_types,
+                columns,
+                group_categories,
+                bar_height,
+                background_height,
+                background_color,
+                bar_color,
+                font_color,
+                canvas_color,
+                style,
+                use_cache=not no_cache,
+                max_rows=max_rows,
+                query=query,
+            )
+    if cached:
+        typer.echo("Skills did not change, using cached picture")
+    if run is not None and profile_file is not None:
+        # the summary must not end up in the piped picture
+        profiling.print_summary(run, err=to_stdout)
+        run.save(profile_file)
+        info_print(f"Saved profile to {profile_file}", err=to_stdout)
+
+
+def _build_query(
+    only_categories: list[str] | None,
+    exclude_categories: list[str] | None,
+    min_level: float | None,
+    max_level: float | None,
+    top_per_category: int | None,
+    top: int | None,
+) -> SkillQuery | None:
+    """Build the query of the skills to plot from the options, None if the whole group is plotted."""
+    query = SkillQuery(
+        frozenset(only_categories or []),
+        frozenset(exclude_categories or []),
+        min_level,
+        max_level,
+        top_per_category,
+        top,
+    )
+    return None if query.selects_all() else query
+
+
+def _render_to_stdout(skill_group: str, file_type: PictureTypes, *args, query: SkillQuery | None = None, **kwargs):
+    """Write the picture of the group to stdout, e.g. to pipe it into another program."""
+    with profiling.stage("read"):
+        table = preparator.read_table(skill_group, query)
+    # the picture is written in one piece, so a failed render does not leave half a picture in the pipe
+    picture = render_to_bytes(table, file_type, *args, **kwargs)
+    stdout = click.get_binary_stream("stdout")
+    stdout.write(picture)
+    stdout.flush()
+
+
+@app.command()
+def render_all(
+    groups: Annotated[
+        Optional[list[str]], typer.Argument(help="Groups to render, renders all existing groups if not given")
+    ] = None,
+    file_types: Annotated[
+        Optional[list[PictureTypes]], typer.Option("--file-type", "-t", help="File types to render, can use multiple")
+    ] = None,
+    style_variants: Annotated[
+        Optional[list[str]],
+        typer.Option(
+            "--style",
+            "-s",
+            help="Comma separated styles of one variant (e.g. round,outline), can use multiple. Use '' for default",
+        ),
+    ] = None,
+    output_dir: Annotated[Path, typer.Option("--output-dir", "-o", help="Folder to save the pictures in")] = Path(),
+    workers: Annotated[int, typer.Option("--workers", "-w", help="Number of worker processes", min=1)] = 4,
+    columns: _COLUMNS_ARG = 2,
+    group_categories: _CATEGORIES_ARG = False,
+    bar_height: _BAR_HEIGHT_ARG = 0.6,
+    background_height: _BG_HEIGHT_ARG = 0.7,
+    bar_color: _BAR_COLOR_ARG = BLUE,
+    background_color: _BG_COLOR_ARG = DARK_GRAY,
+    font_color: _FONT_COLOR_ARG = DARK_GRAY,
+    canvas_color: _CANVAS_COLOR_ARG = None,
+    no_cache: _NO_CACHE_ARG = False,
+    max_rows: _MAX_ROWS_ARG = None,
+    only_categories: _ONLY_CATEGORY_ARG = None,
+    exclude_categories: _EXCLUDE_CATEGORY_ARG = None,
+    min_level: _MIN_LEVEL_ARG = None,
+    max_level: _MAX_LEVEL_ARG = None,
+    top_per_category: _TOP_PER_CATEGORY_ARG = None,
+    top: _TOP_ARG = None,
+):
+    """Render multiple groups at once, using multiple processes.
+
+    Each group is rendered for every combination of file type and style variant.
+    Pictures are named after the group, the style is added if there are multiple style variants.
+    A failing group does not stop the other ones.
+    """
+    if not groups:
+        groups = preparator.get_all_groups()
+    if not file_types:
+        file_types = [PictureTypes.SVG]
+    try:
+        parsed_styles = [
+            [StyleTypes(s.strip()) for s in variant.split(",") if s.strip()] for variant in style_variants or [""]
+        ]
+    except ValueError as err:
+        raise typer.BadParameter(str(err), param_hint="--style") from err
+    output_dir.mkdir(parents=True, exist_ok=True)
+    jobs = batch.build_jobs(groups, file_types, parsed_styles, output_dir)
+    info_print(f"Rendering {len(jobs)} pictures of {len(groups)} groups using {workers} workers")
+    render_options = {
+        "columns": columns,
+        "group_categories": group_categories,
+        "bar_height": bar_height,
+        "background_height": background_height,
+        "background_color": background_color,
+        "bar_color": bar_color,
+        "font_color": font_color,
+        "canvas_color": canvas_color,
+        "use_cache": not no_cache,
+        "max_rows": max_rows,
+        "query": _build_query(only_categories, exclude_categories, min_level, max_level, top_per_category, top),
+    }
+    start = time.perf_counter()
+    results = batch.render_jobs(jobs, workers, render_options)
+    batch.print_summary(results, time.perf_counter() - start)
+    if any(result.error for result in results):
+        raise typer.Exit(1)
+
+
+@app.command()
+def serve(
+    host: Annotated[str, typer.Option("--host", help="Address to listen on")] = "127.0.0.1",
+    port: Annotated[int, typer.Option("--port", "-p", help="Port to listen on, 0 picks a free one")] = 8765,
+    workers: Annotated[int, typer.Option("--workers", "-w", help="Number of warm worker processes", min=1)] = 2,
+):
+    """Start a local render server with warm worker processes.
+
+    Render requests are sent as JSON to POST /render, containing either a group name or the skills,
+    together with the same options as the main command. The response is the rendered picture.
+    GET /stats returns the queue depth and the request latencies.
+    """
+    from .server import serve as run_server
+
+    run_server(host, port, workers)
+
+
+@app.command()
+def watch(
+    groups: Annotated[
+        Optional[list[str]], typer.Argument(help="Groups to watch [default: the default skill group]")
+    ] = None,
+    file_types: Annotated[
+        Optional[list[PictureTypes]],
+        typer.Option("--file-type", "-t", help="File types to render, can use multiple [default: svg]"),
+    ] = None,
+    style: Annotated[Optional[list[StyleTypes]], typer.Option("--style", "-s", help="Style of the plot")] = None,
+    output_dir: Annotated[Path, typer.Option("--output-dir", "-o", help="Folder to save the pictures in")] = Path(),
+    columns: _COLUMNS_ARG = 2,
+    group_categories: _CATEGORIES_ARG = False,
+    bar_height: _BAR_HEIGHT_ARG = 0.6,
+    background_height: _BG_HEIGHT_ARG = 0.7,
+    bar_color: _BAR_COLOR_ARG = BLUE,
+    background_color: _BG_COLOR_ARG = DARK_GRAY,
+    font_color: _FONT_COLOR_ARG = DARK_GRAY,
+    canvas_color: _CANVAS_COLOR_ARG = None,
+    no_cache: _NO_CACHE_ARG = False,
+    max_rows: _MAX_ROWS_ARG = None,
+    interval: Annotated[float, typer.Option("--interval", help="Seconds between checks for changes", min=0.01)] = 0.2,
+    debounce: Annotated[
+        float, typer.Option("--debounce", help="Seconds without further changes before rendering", min=0)
+    ] = 0.3,
+):
+    """Render groups again whenever they change, until stopped with Ctrl+C.
+
+    Pictures are named after the group. Quick successive edits are rendered only once,
+    the plotting dependencies stay loaded, so each render after the first one is fast.
+    """
+    # the module name would clash with this command
+    from . import watcher
+
+    if not groups:
+        groups = [DEFAULT_SKILL_FILE_NAME]
+    if not file_types:
+        file_types = [PictureTypes.SVG]
+    output_dir.mkdir(parents=True, exist_ok=True)
+    render_options = {
+        "columns": columns,
+        "group_categories": group_categories,
+        "bar_height": bar_height,
+        "background_height": background_height,
+        "background_color": background_color,
+        "bar_color": bar_color,
+        "font_color": font_color,
+        "canvas_color": canvas_color,
+        "style": style or [],
+        "use_cache": not no_cache,
+        "max_rows": max_rows,
+    }
+    watcher.watch(groups, output_dir, file_types, render_options, interval, debounce)
 
 
 @app.command()
@@ -149,16 +419,29 @@ def delete_group(
     preparator.delete_group(group)
 
 
+@app.command()
+def clear_cache():
+    """Remove all cached pictures."""
+    cache.clear_cache()
+    typer.echo("Cleared the render cache")
+
+
 @app.command()
 def export_skills(
-    export_name: Annotated[str, typer.Argument(help="Name of the file to export to")],
+    export_name: Annotated[str, typer.Argument(help="Name of the file to export to, without file extension")],
     skill_group: _SKILL_GROUP_ARG = DEFAULT_SKILL_FILE_NAME,
+    file_type: Annotated[ExportTypes, typer.Option("--file-type", "-t", help="File type to export")] = ExportTypes.JSON,
+    all_groups: Annotated[
+        bool, typer.Option("--all", help="Export all groups into one table with a group column (csv or parquet)")
+    ] = False,
+    group_categories: _CATEGORIES_ARG = False,
 ):
     """Export the skill list to a file.
 
     If skill group is not given, the default skill group will be used.
+    CSV and Parquet files contain one row per skill.
     """
-    preparator.export_skills_to_file(export_name, skill_group)
+    preparator.export_skills_to_file(export_name, skill_group, file_type, all_groups, group_categories)
 
 
 @app.command()
@@ -169,8 +452,9 @@ def import_skills(
         bool, typer.Option("--overwrite", "-o", help="Overwrite data if group already exists, merge otherwise")
     ] = False,
 ):
-    """Import skills from a file to a given group.
+    """Import skills from a JSON, CSV or Parquet file to a given group.
 
     If skill group is not given, the default skill group will be used.
+    Tables with a group column are imported into the listed groups instead.
     """
     preparator.import_skills_from_file(file, skill_group, overwrite)
@@ -1,21 +1,42 @@
-import matplotlib.pyplot as plt
-from matplotlib import patheffects
-from matplotlib.axes import Axes
-from matplotlib.patches import FancyBboxPatch
+from collections.abc import Mapping, Sequence
+from contextlib import nullcontext
+from typing import TYPE_CHECKING
 
-from .preparator import split_dict_evenly
-from .utils import StyleTypes
+from .layout import BAR_MAX_LEN, BORDER_WIDTH_MULTIPLIER, LABEL_PAD, POINTS_PER_INCH, compute_layout
+from .profiling import stage
+from .skill_table import SkillColumn, SkillTable
+from .svg_writer import write_skill_svg
+from .utils import _COLOR, _TARGET, BLUE, DARK_GRAY, WHITE, PictureTypes, StyleTypes
 
-DARK_GRAY = "#404040"
-BLUE = "#367DA2"
-WHITE = "#ffffff"
+# the changes of `plt.xkcd` which are used by the diagram, applied per figure in `_apply_xkcd`
+_XKCD_FONT_FAMILY = ["xkcd", "xkcd Script", "Comic Neue", "Comic Sans MS"]
+_XKCD_FONT_SIZE = 14.0
+_XKCD_SKETCH = (1, 100, 2)
+# the xkcd style got longer ticks (8 instead of 3.5), the labels keep their distance to the hidden ticks
+_XKCD_LABEL_PAD = LABEL_PAD - 3.5 + 8
 
-_COLOR = str | tuple[float, float, float]
+# matplotlib is only imported when it is needed, svg output is written without it
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+    from matplotlib.figure import Figure
+    from matplotlib.path import Path
+
+
+def warm_up():
+    """Import matplotlib and load the fonts once, so the first picture of a long running process is fast."""
+    from matplotlib import font_manager
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    font_manager.findfont(font_manager.FontProperties())
+    fig = Figure()
+    fig.subplots()
+    FigureCanvasAgg(fig).draw()
 
 
 def generate_diagram(
-    ax: Axes,
-    skills: dict,
+    ax: "Axes",
+    skills: SkillColumn | dict[str, float],
     bar_height: float = 0.6,
     background_height: float = 0.7,
     background_color: _COLOR = DARK_GRAY,
@@ -29,7 +50,7 @@ def generate_diagram(
     Args:
     ----
         ax (axis): axis to plot on.
-        skills (dict): Dictionary with the skills and the values.
+        skills (SkillColumn | dict[str, float]): The skills and their levels, as column view or dict.
         bar_height (float): Percentage of the height of the skill bar.
         background_height (float): Percentage of the height of the background bar.
         background_color (color): Color of the background.
@@ -39,63 +60,97 @@ def generate_diagram(
         style (list[StyleTypes]): List of styles to apply.
 
     """
+    from matplotlib.collections import PathCollection
+
     label = list(skills.keys())
     skill_level = list(skills.values())
     border_height = max((background_height - bar_height) / 2, 0)
-    # also generates the fixed values for the background bars
-    bar_max_len = 10
     # this is a magic number and currently a hack to get same border sizes.
     # using edge color is difficult because of cut off edges and integration with other styles
-    border_width_multiplier = 1.3
-    border_width = border_height * border_width_multiplier
-    filler = [bar_max_len + border_width * 2 if x != 0 else 0 for x in skill_level]
-    outline_filler = [bar_max_len if x != 0 else 0 for x in skill_level]
-
+    border_width = border_height * BORDER_WIDTH_MULTIPLIER
+    rounded = StyleTypes.ROUND in style
+    # empty bars (level 0 or placeholder) are not drawn at all, only the label is kept
     n_positions = range(len(skills))
-    # plots the skill label
-    ax.barh(
-        n_positions, skill_level, tick_label=label, zorder=3, height=bar_height, left=border_width, facecolor=bar_color
-    )
+    filled_positions = [pos for pos, level in zip(n_positions, skill_level) if level != 0]
+
+    # each layer is one collection, same zorder as the former single bars
+    layers = [
+        # the background bars
+        (1, 0, [BAR_MAX_LEN + border_width * 2] * len(filled_positions), background_height, background_color),
+        # the skill bars
+        (3, border_width, [skill_level[pos] for pos in filled_positions], bar_height, bar_color),
+    ]
     # adds outline if there is one in the style
     if StyleTypes.OUTLINE in style:
         filler_color = WHITE if canvas_color is None else canvas_color
-        ax.barh(
-            n_positions,
-            outline_filler,
-            tick_label=label,
-            zorder=2,
-            height=bar_height,
-            color=filler_color,
-            left=border_width,
-        )
-    # plots the background
-    ax.barh(n_positions, filler, tick_label=label, zorder=1, height=background_height, color=background_color)
+        layers.append((2, border_width, [BAR_MAX_LEN] * len(filled_positions), bar_height, filler_color))
+    for zorder, left, widths, height, color in layers:
+        paths = [_bar_path(left, pos, width, height, rounded) for pos, width in zip(filled_positions, widths)]
+        ax.add_collection(PathCollection(paths, facecolors=color, edgecolors="none", zorder=zorder), autolim=False)
+
+    # limits are set explicitly, like the autoscale of bars would do (no margin at the bar start)
+    max_height = max(bar_height, background_height)
+    y_min = -max_height / 2
+    y_max = len(skills) - 1 + max_height / 2
+    y_margin = (y_max - y_min) * ax.get_ymargin()
+    x_max = BAR_MAX_LEN + border_width * 2
+    ax.set_xlim(0, x_max * (1 + ax.get_xmargin()))
     # invert axis because last list element is on the top
-    ax.invert_yaxis()
+    ax.set_ylim(y_max + y_margin, y_min - y_margin)
+
     # remove all thicks, set font color and size of y label
-    for ticx in ax.xaxis.get_major_ticks():
-        ticx.tick1line.set_visible(False)
-        ticx.tick2line.set_visible(False)
-    for ticy in ax.yaxis.get_major_ticks():
-        ticy.tick1line.set_visible(False)
-        ticy.tick2line.set_visible(False)
-    for ticklabel in ax.yaxis.get_majorticklabels():
-        ticklabel.set_fontsize(36)
-        ticklabel.set_color(font_color)
+    # the hidden ticks got no length, so their length is added to the distance of the labels
+    ax.set_yticks(n_positions, labels=label)
+    label_pad = _XKCD_LABEL_PAD if StyleTypes.XKCD in style else LABEL_PAD
+    ax.tick_params(axis="both", which="major", length=0, pad=label_pad)
+    ax.tick_params(axis="y", labelsize=36, labelcolor=font_color)
 
     # removes the border and the x-axis around the diagram
-    ax.spines["bottom"].set_visible(False)
-    ax.spines["top"].set_visible(False)
-    ax.spines["left"].set_visible(False)
-    ax.spines["right"].set_visible(False)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
     ax.get_xaxis().set_visible(False)
 
 
+def _bar_path(left: float, position: float, width: float, height: float, rounded: bool) -> "Path":
+    """Build the path of a single horizontal bar, centered at the position.
+
+    Rounded bars use half of the bar height as rounding size in data coordinates,
+    like the round box style of matplotlib.
+    """
+    from matplotlib.path import Path
+
+    x0, x1 = left, left + width
+    y0, y1 = position - height / 2, position + height / 2
+    if not rounded:
+        return Path([(x0, y0), (x1, y0), (x1, y1), (x0, y1), (x0, y0)], closed=True)
+    radius = min(height / 2, width / 2)
+    vertices = [
+        (x0 + radius, y0),
+        (x1 - radius, y0),
+        (x1, y0),
+        (x1, y0 + radius),
+        (x1, y1 - radius),
+        (x1, y1),
+        (x1 - radius, y1),
+        (x0 + radius, y1),
+        (x0, y1),
+        (x0, y1 - radius),
+        (x0, y0 + radius),
+        (x0, y0),
+        (x0 + radius, y0),
+        (x0 + radius, y0),
+    ]
+    curve = [Path.CURVE3, Path.CURVE3]
+    codes = [Path.MOVETO, Path.LINETO, *curve, Path.LINETO, *curve, Path.LINETO, *curve, Path.LINETO, *curve]
+    codes.append(Path.CLOSEPOLY)
+    return Path(vertices, codes)
+
+
 def generate_skill_picture(
-    skills: dict,
+    skills: SkillTable,
     n_splits: int,
     save_name: str,
-    file_type: str,
+    file_type: str | Sequence[str],
     bar_height: float = 0.6,
     background_height: float = 0.7,
     background_color: _COLOR = DARK_GRAY,
@@ -108,10 +163,109 @@ def generate_skill_picture(
 
     Args:
     ----
-        skills (dict): Skills to plot.
+        skills (SkillTable): Skills to plot.
         n_splits (int): Number of columns to split the skills into.
         save_name (str): Name of the file to save.
-        file_type (str): File type to save.
+        file_type (str | Sequence[str]): File type to save, or multiple ones. The figure is only built once.
+        bar_height (float, optional): Height of the displayed bar. Defaults to 0.6.
+        background_height (float, optional): Height of the background of the bar. Defaults to 0.7.
+        background_color (_COLOR, optional): Color for the background. Defaults to DARK_GRAY.
+        bar_color (_COLOR, optional): Color for the bar. Defaults to DARK_GRAY.
+        font_color (_COLOR, optional): Color for the font. Defaults to BLUE.
+        canvas_color (_COLOR, optional): Color for the canvas. Defaults to None.
+        style (list[StyleTypes], optional): List of styles to apply. Defaults to [].
+
+    """
+    file_types = [PictureTypes(file_type)] if isinstance(file_type, str) else [PictureTypes(t) for t in file_type]
+    write_skill_picture(
+        skills,
+        n_splits,
+        {t: f"{save_name}.{t.value}" for t in file_types},
+        bar_height,
+        background_height,
+        background_color,
+        bar_color,
+        font_color,
+        canvas_color,
+        style,
+    )
+
+
+def write_skill_picture(
+    skills: SkillTable,
+    n_splits: int,
+    targets: Mapping[str, _TARGET],
+    bar_height: float = 0.6,
+    background_height: float = 0.7,
+    background_color: _COLOR = DARK_GRAY,
+    bar_color: _COLOR = DARK_GRAY,
+    font_color: _COLOR = BLUE,
+    canvas_color: _COLOR | None = None,
+    style: list[StyleTypes] = [],
+):
+    """Generate a bar diagram for the given skills and write it to the target of each file type.
+
+    A target is a file name or a binary buffer, like an open file or io.BytesIO.
+    Takes the same arguments as `generate_skill_picture`, the figure is only built once for all targets.
+    """
+    picture_targets = {PictureTypes(t): target for t, target in targets.items()}
+    render_options = (bar_height, background_height, background_color, bar_color, font_color, canvas_color, style)
+    _write_without_figure(skills, n_splits, picture_targets, render_options)
+    if not picture_targets:
+        return
+
+    fig = _build_figure(skills, n_splits, *render_options)
+    # only transparent if there is no canvas color
+    _save_figure(fig, picture_targets, transparent=canvas_color is None)
+    _release_figure(fig)
+
+
+def _write_without_figure(
+    skills: SkillTable, n_splits: int, targets: dict[PictureTypes, _TARGET], render_options: tuple
+):
+    """Write the file types which do not need a matplotlib figure, they are removed from the targets.
+
+    svg is written as markup and png and jpg are painted directly, only the xkcd style needs matplotlib.
+    """
+    if StyleTypes.XKCD in render_options[-1]:
+        return
+    if PictureTypes.SVG in targets:
+        with stage("svg"):
+            write_skill_svg(skills, n_splits, targets.pop(PictureTypes.SVG), *render_options)
+    raster_targets: dict[PictureTypes, _TARGET] = {
+        t: targets.pop(t) for t in (PictureTypes.PNG, PictureTypes.JPG) if t in targets
+    }
+    if raster_targets:
+        # numpy and the font engine are enough, the figure machinery is not loaded
+        from .raster_writer import write_skill_raster
+
+        with stage("raster"):
+            write_skill_raster(skills, n_splits, raster_targets, *render_options)
+
+
+def generate_skill_pages(
+    pages: list[SkillTable],
+    n_splits: int,
+    page_names: list[str],
+    page_file_types: list[list[str]],
+    pdf_name: str | None = None,
+    bar_height: float = 0.6,
+    background_height: float = 0.7,
+    background_color: _COLOR = DARK_GRAY,
+    bar_color: _COLOR = DARK_GRAY,
+    font_color: _COLOR = BLUE,
+    canvas_color: _COLOR | None = None,
+    style: list[StyleTypes] = [],
+):
+    """Generate a bar diagram for each page, only the figure of the current page is kept in memory.
+
+    Args:
+    ----
+        pages (list[SkillTable]): Skills of each page.
+        n_splits (int): Number of columns to split each page into.
+        page_names (list[str]): Name of the files of each page.
+        page_file_types (list[list[str]]): File types to save for each page, pdf is only saved as multi page file.
+        pdf_name (str | None, optional): Name of the multi page pdf file. Defaults to None, no pdf is saved.
         bar_height (float, optional): Height of the displayed bar. Defaults to 0.6.
         background_height (float, optional): Height of the background of the bar. Defaults to 0.7.
         background_color (_COLOR, optional): Color for the background. Defaults to DARK_GRAY.
@@ -121,91 +275,147 @@ def generate_skill_picture(
         style (list[StyleTypes], optional): List of styles to apply. Defaults to [].
 
     """
-    split_skills = split_dict_evenly(skills, n_splits)
-    split_len = len(split_skills[0])
+    with stage("import_matplotlib"):
+        from matplotlib.backends.backend_pdf import PdfPages
+
+    render_options = (bar_height, background_height, background_color, bar_color, font_color, canvas_color, style)
+    transparent = canvas_color is None
+    with PdfPages(f"{pdf_name}.pdf") if pdf_name is not None else nullcontext() as pdf:
+        for index, (page, page_name, file_type) in enumerate(zip(pages, page_names, page_file_types)):
+            with stage(f"page[{index}]"):
+                file_types = [PictureTypes(t) for t in file_type]
+                targets: dict[PictureTypes, _TARGET] = {t: f"{page_name}.{t.value}" for t in file_types}
+                _write_without_figure(page, n_splits, targets, render_options)
+                if not targets and pdf is None:
+                    continue
+                fig = _build_figure(page, n_splits, *render_options)
+                _save_figure(fig, targets, transparent)
+                if pdf is not None:
+                    with stage("save[pdf]"):
+                        pdf.savefig(fig, transparent=transparent)
+                # release the page before the next one is built
+                _release_figure(fig)
+
+
+def _build_figure(
+    skills: SkillTable,
+    n_splits: int,
+    bar_height: float,
+    background_height: float,
+    background_color: _COLOR,
+    bar_color: _COLOR,
+    font_color: _COLOR,
+    canvas_color: _COLOR | None,
+    style: list[StyleTypes],
+) -> "Figure":
+    """Build the laid out matplotlib figure of the bar diagram, see `generate_skill_picture` for the arguments.
+
+    The figure is not registered with pyplot and no global settings are changed,
+    so figures can be built in parallel threads and are freed once they are not used anymore.
+    """
+    with stage("import_matplotlib"):
+        import matplotlib as mpl
+        from matplotlib.figure import Figure
+        from matplotlib.font_manager import FontProperties, findfont
+
+    with stage("split"):
+        split_skills = skills.split_columns(n_splits)
 
-    # Activate xkcd style if given
-    if StyleTypes.XKCD in style:
-        plt.xkcd()
-        # reset that white outline
-        plt.rcParams["path.effects"] = [patheffects.withStroke(linewidth=0)]
+    xkcd = StyleTypes.XKCD in style
+    font = FontProperties(family=_XKCD_FONT_FAMILY) if xkcd else FontProperties()
+    font_size = _XKCD_FONT_SIZE if xkcd else mpl.rcParams["font.size"]
+    # the layout is calculated from the font metrics, so the figure does not need to be measured
+    # the padding is the one of the tight layout, which depends on the font size of the style
+    with stage("layout"):
+        layout = compute_layout(
+            split_skills,
+            font_file=findfont(font),
+            figure_pad=1.08 * font_size,
+            label_pad=_XKCD_LABEL_PAD if xkcd else LABEL_PAD,
+        )
 
     # generate the diagram, splits the values into two lists to plot.
     # this should be done in the future over one loop
     # the loop decides what to put when and how many columns
-    fig, axes = plt.subplots(1, n_splits, figsize=(10 * n_splits, split_len))
-
-    # will get an iterable error since when using only one column, axes is not a list
-    # just put the Axes object into a list to fix this
-    if isinstance(axes, Axes):
-        axes = [axes]
-
-    for ax, skills in zip(axes, split_skills):
-        generate_diagram(
-            ax, skills, bar_height, background_height, background_color, bar_color, font_color, canvas_color, style
+    with stage("subplots"):
+        fig = Figure(figsize=(layout.width / POINTS_PER_INCH, layout.height / POINTS_PER_INCH))
+        # always a list of axes, even for a single column
+        axes = fig.subplots(1, n_splits, squeeze=False)[0]
+        fig.subplots_adjust(
+            left=layout.left, right=layout.right, top=layout.top, bottom=layout.bottom, wspace=layout.wspace
         )
+
+    for index, (ax, column) in enumerate(zip(axes, split_skills)):
+        with stage(f"generate_diagram[{index}]"):
+            generate_diagram(
+                ax, column, bar_height, background_height, background_color, bar_color, font_color, canvas_color, style
+            )
         # need also to set face color of each axis
         if canvas_color is not None:
             ax.set_facecolor(canvas_color)
-    # apply the rest of styles which need manipulation of the plot
-    _apply_styles(axes, style)
 
     # set the facecolor of the canvas to the given color
-    extra_args = {}
     if canvas_color is not None:
         fig.set_facecolor(canvas_color)
-    # only transparent if there is no canvas color
-    else:
-        extra_args["transparent"] = True
-    plt.tight_layout()
-    plt.savefig(f"{save_name}.{file_type}", format=file_type, **extra_args)
+    if xkcd:
+        with stage("xkcd_setup"):
+            _apply_xkcd(fig)
+    return fig
 
 
-def _apply_styles(
-    ax: list[Axes],
-    style: list[StyleTypes],
-):
-    """Apply the given styles to the plot.
+def _apply_xkcd(fig: "Figure"):
+    """Apply the settings of `plt.xkcd` that change the diagram to the artists of the figure.
 
-    Some of the settings may not applied before the plot,
-    because they are in need of transformation of the plot.
+    Unlike `plt.xkcd`, the global rcParams stay untouched and there is no white outline.
     """
-    if StyleTypes.ROUND in style:
-        _round_plot(ax)
-    _clean_empty_bars(ax)
-
-
-def _round_plot(axes: list[Axes]):
-    """Round the edges of the bars."""
-    for ax in axes:
-        new_patches = []
-        for patch in reversed(ax.patches):
-            # print(bb.xmin, bb.ymin,abs(bb.width), abs(bb.height))
-            bb = patch.get_bbox()  # type: ignore
-            color = patch.get_facecolor()  # type: ignore
-            # skip for elements if they are just placeholder
-            if bb.width == 0:
-                continue
-            p_bbox = FancyBboxPatch(
-                (bb.xmin, bb.ymin),
-                abs(bb.width),
-                abs(bb.height),
-                boxstyle=f"round,pad=-0.0001,rounding_size={0.5*bb.height}",
-                ec="none",
-                fc=color,
-                mutation_aspect=1,
-            )
-            patch.remove()
-            new_patches.append(p_bbox)
+    from matplotlib import patheffects
+    from matplotlib.collections import Collection
+
+    # the labels are the only text, set on the axis so it is kept for labels created later on
+    for ax in fig.axes:
+        ax.tick_params(labelfontfamily=_XKCD_FONT_FAMILY)
+    for artist in fig.findobj():
+        artist.set_sketch_params(*_XKCD_SKETCH)
+        # collections do not take the path effects of the rcParams, so the bars are drawn without them
+        if not isinstance(artist, Collection):
+            artist.set_path_effects([patheffects.withStroke(linewidth=0)])
+
+
+def _release_figure(fig: "Figure"):
+    """Remove the content of the saved figure, so its artists are freed without waiting for the garbage collector."""
+    fig.clear()
+
+
+def _save_figure(fig: "Figure", targets: Mapping[PictureTypes, _TARGET], transparent: bool):
+    """Save the laid out figure to the target of each file type.
+
+    Vector formats are saved one after another, raster formats share one drawn canvas.
+    """
+    import numpy as np
+    from matplotlib import image as mpl_image
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
 
-        for patch in new_patches:
-            ax.add_patch(patch)
+    from .raster_writer import save_rgba
 
+    raster_types = [t for t in targets if t in (PictureTypes.PNG, PictureTypes.JPG)]
+    for file_type, target in targets.items():
+        if file_type not in raster_types:
+            with stage(f"save[{file_type.value}]"):
+                fig.savefig(target, format=file_type.value, transparent=transparent)
+    if not raster_types:
+        return
 
-def _clean_empty_bars(axes: list[Axes]):
-    """Set facecolor to none is the bar len is zero."""
-    for ax in axes:
-        for patch in ax.patches:
-            bb = patch.get_bbox()  # type: ignore
-            if bb.width == 0:
-                patch.set_facecolor("none")  # type: ignore
+    # same as savefig does for transparent figures, but only done once for all raster types
+    if transparent:
+        fig.patch.set_facecolor("none")
+        for ax in fig.axes:
+            ax.patch.set_facecolor("none")
+    canvas = FigureCanvasAgg(fig)
+    with stage("draw"):
+        canvas.draw()
+    for file_type in raster_types:
+        with stage(f"save[{file_type.value}]"):
+            if file_type == PictureTypes.JPG:
+                save_rgba(targets[file_type], np.asarray(canvas.buffer_rgba()), file_type, fig.dpi)
+            else:
+                mpl_image.imsave(targets[file_type], canvas.buffer_rgba(), format="png", origin="upper", dpi=fig.dpi)
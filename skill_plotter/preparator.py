@@ -1,68 +1,30 @@
 import json
+from collections.abc import Iterable, Iterator
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import click
-import jsonschema
 import typer
 
-from .utils import failure_print, info_print, success_print
+from .json_stream import NotAnObjectError, iter_object_items
+from .query import SkillQuery
+from .session import EditSession
+from .skill_table import SkillTable
+from .storage import get_store
+from .utils import ExportTypes, failure_print, info_print, success_print
+from .validation import SkillValidationError, find_errors, is_valid_skill
+
+if TYPE_CHECKING:
+    from click._termui_impl import ProgressBar
 
-_APP_NAME = "skill-plotter"
-_app_dir = typer.get_app_dir(_APP_NAME)
-# if the dir does not exist, create it
-if not Path(_app_dir).exists():
-    Path(_app_dir).mkdir(parents=True)
 DEFAULT_SKILL_FILE_NAME = "skills"
 _DEFAULT_CATEGORY = "default"
-
-
-# Validate the data against the schema
-def _validate_data(data: dict):
-    """Validate the given data to be compatible with the schema."""
-    # schema is {"skill_name": {"level": 3.5, "category": "default"}, ...}
-    schema = {
-        "type": "object",
-        "patternProperties": {
-            ".*": {
-                "type": "object",
-                "properties": {"level": {"type": "number"}, "category": {"type": "string"}},
-                "required": ["level", "category"],
-            }
-        },
-        "additionalProperties": False,
-    }
-    try:
-        jsonschema.validate(data, schema)
-        return True
-    except jsonschema.ValidationError:
-        return False
-
-
-def _get_target_file(file_name: str = DEFAULT_SKILL_FILE_NAME) -> Path:
-    """Return the target file path."""
-    return Path(_app_dir) / f"{file_name}.json"
-
-
-def split_dict_evenly(d: dict, n: int) -> list[dict]:
-    """Split a dictionary into n evenly sized chunks."""
-    items = list(d.items())
-    chunk_size = len(items) // n
-    remainder = len(items) % n
-    splitted: list[dict] = []
-    start = 0
-    for i in range(n):
-        end = start + chunk_size
-        if i < remainder:
-            end += 1
-        splitted.append(dict(items[start:end]))
-        start = end
-    # append empty element if it is not evenly splitted
-    max_len = len(splitted[0])
-    for item in splitted:
-        if len(item) < max_len:
-            item[""] = 0
-    return splitted
+_MAX_SHOWN_ERRORS = 10
+_IMPORT_CHUNK_SIZE = 5000
+# imported as table with pandas
+_TABLE_SUFFIXES = {".csv", ".parquet"}
+# pyarrow is an optional dependency, installed with the parquet extra
+_PARQUET_HINT = "Parquet files need pyarrow: pip install 'skill-plotter[parquet]'"
 
 
 def sort_skills_by_category(skills: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
@@ -79,30 +41,48 @@ def sort_skills_by_category(skills: dict[str, dict[str, Any]]) -> dict[str, dict
     )
 
 
-def reduce_data(data: dict[str, dict[str, Any]]) -> dict[str, float]:
-    """Reduce the dict to only key and value."""
-    return {k: v["level"] for k, v in data.items()}
+def split_into_pages(table: SkillTable, page_size: int, keep_categories: bool = False) -> list[SkillTable]:
+    """Split the skills into pages of at most page_size skills, keeping their order.
+
+    If keep_categories is set, a category which does not fit onto the current page starts on the next one.
+    Categories bigger than a page continue on the following pages.
+    """
+    blocks = table.category_runs() if keep_categories else [(0, len(table))]
+    # pages are consecutive skills, only their start positions are needed
+    starts = [0]
+    for start, stop in blocks:
+        page_length = start - starts[-1]
+        if keep_categories and page_length and page_length + stop - start > page_size >= stop - start:
+            starts.append(start)
+        while stop - starts[-1] > page_size:
+            starts.append(starts[-1] + page_size)
+    stops = [*starts[1:], len(table)]
+    return [table.slice(start, stop) for start, stop in zip(starts, stops)]
 
 
 def read_file(file_name: str = DEFAULT_SKILL_FILE_NAME) -> dict[str, dict[str, Any]]:
-    """Read the file from the given path and returns a dict.
+    """Read the skills of the given group and returns a dict.
+
+    If the group does not exist returns an empty dict.
+    """
+    return get_store().read(file_name)
+
+
+def read_table(file_name: str = DEFAULT_SKILL_FILE_NAME, query: SkillQuery | None = None) -> SkillTable:
+    """Read the skills of the given group as SkillTable, only with the values needed for plotting.
 
-    If the file path does not exist returns an empty dict.
+    If a query is given, only the selected skills are read, the storage engine evaluates the query.
+    If the group does not exist returns an empty table.
     """
-    skill_file = _get_target_file(file_name)
-    if not skill_file.exists():
-        return {}
-    with open(skill_file, encoding="utf-8") as json_file:
-        return json.load(json_file)
+    store = get_store()
+    if query is None or query.selects_all():
+        return SkillTable.from_rows(store.read_rows(file_name))
+    return SkillTable.from_rows(store.select_rows(file_name, query))
 
 
 def write_file(data: dict, file_name: str = DEFAULT_SKILL_FILE_NAME) -> None:
-    """Write the given dict to the file path."""
-    skill_file = _get_target_file(file_name)
-    if not skill_file.exists():
-        skill_file.touch()
-    with open(skill_file, "w", encoding="utf-8") as json_file:
-        json.dump(data, json_file)
+    """Write the given dict as skills of the group, replaces all existing skills."""
+    get_store().write(file_name, data)
 
 
 def add_skill(skill: str, level: float, category: str = _DEFAULT_CATEGORY, file_name: str = DEFAULT_SKILL_FILE_NAME):
@@ -110,9 +90,7 @@ def add_skill(skill: str, level: float, category: str = _DEFAULT_CATEGORY, file_
 
     If it already exists, the level will be overwritten.
     """
-    data = read_file(file_name)
-    data[skill] = {"level": level, "category": category}
-    write_file(data, file_name)
+    get_store().set_skill(file_name, skill, level, category)
     success_print(f"Added skill {skill} with level {level}")
 
 
@@ -124,28 +102,30 @@ def interactive_add_skill(
     info_print(f"Using interactive mode, use Ctrl+C to exit, skills will be added to {file_name}")
     if used_category is not None:
         info_print(f"Using category {used_category}")
-    while True:
-        skill = typer.prompt("Enter skill name")
-        level = 0
-        while level <= 0 or level > 10:
-            level = typer.prompt("Enter level [0-10]", type=float)
-            if level <= 0 or level > 10:
-                failure_print("Level must be between 0 and 10 and not 0")
-        category = typer.prompt("Enter category", default=_DEFAULT_CATEGORY) if used_category is None else used_category
-        # this should usually not be happening, but just in case
-        if not category:
-            category = _DEFAULT_CATEGORY
-        add_skill(skill, level, category, file_name)
-        # need to reset category!
-        category = None
+    # edits are buffered and written once at the end, also when exiting with Ctrl+C
+    with EditSession(file_name) as session:
+        while True:
+            skill = typer.prompt("Enter skill name")
+            level = 0
+            while level <= 0 or level > 10:
+                level = typer.prompt("Enter level [0-10]", type=float)
+                if level <= 0 or level > 10:
+                    failure_print("Level must be between 0 and 10 and not 0")
+            category = (
+                typer.prompt("Enter category", default=_DEFAULT_CATEGORY) if used_category is None else used_category
+            )
+            # this should usually not be happening, but just in case
+            if not category:
+                category = _DEFAULT_CATEGORY
+            session.set_skill(skill, level, category)
+            success_print(f"Added skill {skill} with level {level}")
+            # need to reset category!
+            category = None
 
 
 def remove_skill(skill: str, file_name: str = DEFAULT_SKILL_FILE_NAME):
     """Remove the skill from the skill list."""
-    data = read_file(file_name)
-    if skill in data:
-        del data[skill]
-        write_file(data, file_name)
+    if get_store().remove_skill(file_name, skill):
         success_print(f"Removed skill {skill}")
     else:
         failure_print(f"Skill {skill} not found")
@@ -155,49 +135,50 @@ def interactive_remove(file_name: str = DEFAULT_SKILL_FILE_NAME):
     """Interactively removes skills from the skill list."""
     info_print(f"Using interactive mode, use Ctrl+C to exit, skills will be removed from {file_name}")
     list_all_skills(file_name)
-    data = read_file(file_name)
-    available_skills = list(data.keys())
-    while True:
-        skill = typer.prompt("Enter skill name", show_choices=False, type=click.Choice(available_skills))
-        remove_skill(skill, file_name)
-        available_skills.remove(skill)
+    with EditSession(file_name) as session:
+        available_skills = list(session.data.keys())
+        while True:
+            skill = typer.prompt("Enter skill name", show_choices=False, type=click.Choice(available_skills))
+            session.remove_skill(skill)
+            success_print(f"Removed skill {skill}")
+            available_skills.remove(skill)
 
 
 def delete_group(group: str):
-    """Delete the given group file (json) from the app dir.
+    """Delete the given group from the storage.
 
     Informs user if it was successful or not
     """
-    skill_file = _get_target_file(group)
-    if skill_file.exists():
-        skill_file.unlink()
+    if get_store().delete(group):
         success_print(f"Deleted group {group}")
     else:
         failure_print(f"Group {group} not found")
         list_all_groups()
 
 
-def list_all_groups():
-    """Search the app dir for all existing groups and print them.
+def get_all_groups() -> list[str]:
+    """Return the names of all existing groups."""
+    return get_store().groups()
 
-    Valid files are json ones
-    """
-    files = Path(_app_dir).glob("*.json")
+
+def list_all_groups():
+    """Print all existing groups with their number of skills and categories, taken from the group index."""
     info_print("Existing groups:")
-    for file in files:
-        file_name = file.stem
-        suffix = "" if file_name != DEFAULT_SKILL_FILE_NAME else " (default)"
-        typer.echo(f"- {file.stem}{suffix}")
+    for group, summary in get_store().summaries().items():
+        suffix = "" if group != DEFAULT_SKILL_FILE_NAME else " (default)"
+        categories = ", ".join(summary.categories)
+        typer.echo(f"- {group}{suffix}: {summary.skills} skills, categories: {categories or '-'}")
 
 
 def list_all_skills(group: str):
     """List all skills of the group."""
-    data = read_file(group)
-    if len(data) == 0:
+    # the index knows empty or missing groups, no need to read them
+    summary = get_store().summary(group)
+    if summary is None or summary.skills == 0:
         failure_print(f"No skills found in group {group}, it probably does not exist!")
         list_all_groups()
         return
-    data = sort_skills_by_category(data)
+    data = sort_skills_by_category(read_file(group))
     # create template to show data in a table, start at the end
     # and use padding to align the values like a table
     template = "|{:^20}|{:^10}|{:^20}|"
@@ -211,16 +192,44 @@ def list_all_skills(group: str):
     typer.echo(separator)
 
 
-def export_skills_to_file(export_name: str, skill_group: str):
-    """Export the skills of the given group to a file."""
-    file_to_export = _get_target_file(skill_group)
-    if not file_to_export.exists():
+def export_skills_to_file(
+    export_name: str,
+    skill_group: str,
+    file_type: ExportTypes = ExportTypes.JSON,
+    all_groups: bool = False,
+    group_categories: bool = False,
+):
+    """Export the skills of the given group, or all groups, to a file.
+
+    CSV and Parquet files got a row per skill, exporting all groups adds a group column.
+    """
+    file_type = ExportTypes(file_type)
+    if all_groups and file_type == ExportTypes.JSON:
+        failure_print("Exporting all groups is only possible as CSV or Parquet file")
+        return
+    if not all_groups and not get_store().exists(skill_group):
         failure_print(f"Group {skill_group} does not exist, only those are valid:")
         list_all_groups()
         return
-    target_file = Path(f"{export_name}.json")
-    target_file.write_bytes(file_to_export.read_bytes())
-    success_print(f"Exported skills in group {skill_group} to file {target_file.absolute()}")
+    target_file = Path(f"{export_name}.{file_type.value}")
+    if file_type == ExportTypes.JSON:
+        data = read_file(skill_group)
+        if group_categories:
+            data = sort_skills_by_category(data)
+        with open(target_file, "w", encoding="utf-8") as json_file:
+            json.dump(data, json_file)
+        success_print(f"Exported skills in group {skill_group} to file {target_file.absolute()}")
+        return
+    groups = get_all_groups() if all_groups else [skill_group]
+    # pandas is heavy, only load it for tables
+    from . import tabular
+
+    try:
+        n_skills = tabular.export_groups(groups, target_file, group_categories, with_group=all_groups)
+    except ImportError:
+        failure_print(f"Could not write {target_file}, {_PARQUET_HINT}")
+        return
+    success_print(f"Exported {n_skills} skills of {len(groups)} group(s) to file {target_file.absolute()}")
 
 
 def import_skills_from_file(import_file: Path, skill_group: str, overwrite: bool):
@@ -229,29 +238,101 @@ def import_skills_from_file(import_file: Path, skill_group: str, overwrite: bool
     if not import_file.exists():
         failure_print(f"Import file {import_file} does not exist")
         return
+    if import_file.suffix in _TABLE_SUFFIXES:
+        _import_table(import_file, skill_group, overwrite)
+        return
     if import_file.suffix != ".json":
-        failure_print(f"Import file {import_file} is not a JSON file")
+        failure_print(f"Import file {import_file} is not a JSON, CSV or Parquet file")
         return
 
-    with open(import_file, encoding="utf-8") as json_file:
-        import_data = json.load(json_file)
-
-    if not _validate_data(import_data):
-        failure_print(f"Import file {import_file} does not have the correct format, check if it is a valid skill file")
+    # the file is streamed, so only a chunk of the imported skills is in memory at once
+    group_exists = get_store().exists(skill_group)
+    progress: ProgressBar[int] = typer.progressbar(length=import_file.stat().st_size, label="Importing skills")
+    try:
+        with open(import_file, "rb") as json_file, progress:
+            chunks = _iter_import_chunks(iter_object_items(json_file, progress.update))
+            get_store().merge(skill_group, chunks, overwrite)
+    except json.JSONDecodeError as err:
+        failure_print(f"Import file {import_file} is no valid JSON file: {err.msg}")
+        return
+    except NotAnObjectError as err:
+        _print_import_errors(import_file, [f"file: {err.json_type} is not of type 'object'"])
+        return
+    except SkillValidationError as err:
+        _print_import_errors(import_file, err.errors)
         return
 
-    # in case of overwrite, just overwrite the data
-    existing_data = read_file(skill_group)
-    write_data = import_data
-    if existing_data and overwrite:
-        info_print(f"Overwrite is set and group already exists, replace skill data in group {skill_group}.")
-    elif existing_data:
-        # merge the data, if the skill already exists, overwrite it
-        write_data = {**existing_data, **import_data}
+    # in case of overwrite, the data was just overwritten
+    if group_exists and overwrite:
+        info_print(f"Overwrite is set and group already exists, replaced skill data in group {skill_group}.")
+    elif group_exists:
+        # merged the data, if the skill already existed, it was overwritten
         info_print(
-            f"Skill group already exists. Merging imported data into group {skill_group}. "
-            + "If a skill already exists, the imported data will overwrite the existing one."
+            f"Skill group already exists. Merged imported data into group {skill_group}. "
+            + "If a skill already existed, the imported data overwrote the existing one."
         )
+    success_print(f"Imported skill data from {import_file}.")
+
+
+def _print_import_errors(import_file: Path, errors: list[str]):
+    """Inform the user why the import file is invalid, only the first errors are listed."""
+    failure_print(f"Import file {import_file} does not have the correct format, check if it is a valid skill file")
+    for error in errors[:_MAX_SHOWN_ERRORS]:
+        failure_print(f"- {error}")
+    if len(errors) > _MAX_SHOWN_ERRORS:
+        failure_print(f"... and {len(errors) - _MAX_SHOWN_ERRORS} more errors")
 
-    write_file(write_data, skill_group)
+
+def _import_table(import_file: Path, skill_group: str, overwrite: bool):
+    """Import a CSV or Parquet file, if it got a group column, the skills go to the given groups."""
+    # pandas is heavy, only load it for tables
+    from . import tabular
+
+    try:
+        frame = tabular.read_table(import_file)
+    except ImportError:
+        failure_print(f"Could not read {import_file}, {_PARQUET_HINT}")
+        return
+    except ValueError as err:
+        failure_print(f"Import file {import_file} could not be read: {err}")
+        return
+    errors = tabular.find_frame_errors(frame)
+    if errors:
+        _print_import_errors(import_file, errors)
+        return
+    existing = set(get_all_groups())
+    imported = tabular.import_table(frame, skill_group, overwrite)
+    for group, n_skills in imported.items():
+        if group not in existing:
+            action = "Created group"
+        elif overwrite:
+            action = "Replaced skill data in group"
+        else:
+            action = "Merged imported data into group"
+        info_print(f"{action} {group} ({n_skills} skills)")
     success_print(f"Imported skill data from {import_file}.")
+
+
+def _iter_import_chunks(items: Iterable[tuple[str, Any]]) -> Iterator[dict[str, dict[str, Any]]]:
+    """Validate the streamed skills and group them into chunks.
+
+    All invalid skills are collected, the error is raised after the last item,
+    so the caller can discard everything that was already merged.
+    """
+    errors: list[str] = []
+    chunk: dict[str, dict[str, Any]] = {}
+    for skill, values in items:
+        if not is_valid_skill(values):
+            errors.extend(find_errors({skill: values}))
+            continue
+        # no need to keep valid chunks in memory if the import will fail anyway
+        if errors:
+            continue
+        chunk[skill] = values
+        if len(chunk) >= _IMPORT_CHUNK_SIZE:
+            yield chunk
+            chunk = {}
+    if errors:
+        raise SkillValidationError(errors)
+    if chunk:
+        yield chunk
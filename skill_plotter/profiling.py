@@ -0,0 +1,164 @@
+"""Module to record the wall time and memory allocations of each render stage.
+
+The render functions mark their stages with `stage`, which does nothing unless a profile is running:
+
+    with profile() as run:
+        render_group("skills", file_type="png", use_cache=False)
+    run.save(Path("profile.json"))
+
+Stages can be nested, the depth of each stage is part of the records.
+"""
+
+import cProfile
+import json
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import typer
+
+# file suffixes which are saved as cProfile dump instead of json
+CPROFILE_SUFFIXES = {".prof", ".pstats"}
+
+
+@dataclass
+class StageRecord:
+    """Time and memory of one stage, memory is in bytes and relative to the start of the stage."""
+
+    name: str
+    depth: int
+    seconds: float = 0.0
+    allocated_bytes: int = 0
+    peak_bytes: int = 0
+
+
+@dataclass
+class _Frame:
+    """A running stage, the peak holds the highest traced memory of already finished inner stages."""
+
+    record: StageRecord
+    start_memory: int
+    peak: int
+
+
+class Profile:
+    """Records of one profiled run, in the order the stages were started."""
+
+    def __init__(self, memory: bool, use_cprofile: bool):
+        """Prepare the run, memory is only traced if enabled."""
+        self.memory = memory
+        self.records: list[StageRecord] = []
+        self.total_seconds = 0.0
+        self.profiler = cProfile.Profile() if use_cprofile else None
+        self._frames: list[_Frame] = []
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "total_seconds": self.total_seconds,
+            "memory_traced": self.memory,
+            "stages": [asdict(record) for record in self.records],
+        }
+
+    def save(self, path: Path):
+        """Save the records as json, or the cProfile statistics if the file got a cProfile suffix."""
+        if path.suffix in CPROFILE_SUFFIXES:
+            if self.profiler is None:
+                raise ValueError("Profile was not recorded with cProfile")
+            self.profiler.dump_stats(path)
+            return
+        with open(path, "w", encoding="utf-8") as json_file:
+            json.dump(self.as_dict(), json_file, indent=2)
+
+    def _enter(self, name: str) -> _Frame:
+        record = StageRecord(name, len(self._frames))
+        self.records.append(record)
+        start_memory = 0
+        if self.memory:
+            start_memory, peak = tracemalloc.get_traced_memory()
+            # the peak is reset for the new stage, keep the one of the outer stage until now
+            if self._frames:
+                self._frames[-1].peak = max(self._frames[-1].peak, peak)
+            tracemalloc.reset_peak()
+        frame = _Frame(record, start_memory, start_memory)
+        self._frames.append(frame)
+        return frame
+
+    def _exit(self, frame: _Frame, seconds: float):
+        self._frames.pop()
+        frame.record.seconds = seconds
+        if not self.memory:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, frame.peak)
+        frame.record.allocated_bytes = current - frame.start_memory
+        frame.record.peak_bytes = peak - frame.start_memory
+        if self._frames:
+            self._frames[-1].peak = max(self._frames[-1].peak, peak)
+        tracemalloc.reset_peak()
+
+
+_current: Profile | None = None
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Record the time and memory of the enclosed code as stage of the running profile."""
+    run = _current
+    if run is None:
+        yield
+        return
+    frame = run._enter(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        run._exit(frame, time.perf_counter() - start)
+
+
+@contextmanager
+def profile(memory: bool = True, use_cprofile: bool = False) -> Iterator[Profile]:
+    """Profile all stages run within the context.
+
+    Tracing the memory slows down the run, the times are less accurate then.
+    With cProfile enabled, the statistics of all function calls are recorded as well.
+    """
+    global _current
+    if _current is not None:
+        raise RuntimeError("A profile is already running")
+    run = Profile(memory, use_cprofile)
+    start_tracing = memory and not tracemalloc.is_tracing()
+    if start_tracing:
+        tracemalloc.start()
+    _current = run
+    if run.profiler is not None:
+        run.profiler.enable()
+    start = time.perf_counter()
+    try:
+        yield run
+    finally:
+        run.total_seconds = time.perf_counter() - start
+        if run.profiler is not None:
+            run.profiler.disable()
+        _current = None
+        if start_tracing:
+            tracemalloc.stop()
+
+
+def print_summary(run: Profile, err: bool = False):
+    """Print a table with the time and memory of each stage, to stderr if err is set."""
+    template = "|{:<36}|{:^12}|{:^14}|{:^14}|"
+    separator = "-" * 80
+    typer.echo(separator, err=err)
+    typer.echo(template.format("Stage", "Time [ms]", "Alloc [KiB]", "Peak [KiB]"), err=err)
+    typer.echo(separator, err=err)
+    for record in run.records:
+        name = "  " * record.depth + record.name
+        allocated = f"{record.allocated_bytes / 1024:.1f}" if run.memory else "-"
+        peak = f"{record.peak_bytes / 1024:.1f}" if run.memory else "-"
+        typer.echo(template.format(name, f"{record.seconds * 1000:.2f}", allocated, peak), err=err)
+    typer.echo(separator, err=err)
+    typer.echo(f"Total: {run.total_seconds * 1000:.2f} ms", err=err)
@@ -0,0 +1,78 @@
+"""Module to select the skills of a group which are plotted.
+
+A query filters the skills by category and level and keeps only the best skills of each category or overall.
+The storage engines evaluate it while reading, so the skills which are not selected are never kept in memory.
+The best skills are chosen with bounded heaps in a single pass, instead of sorting all skills and slicing them.
+"""
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from heapq import heappush, heapreplace, nlargest
+from itertools import chain
+
+_Row = tuple[str, float, str]
+# level and negated position, so the bigger candidate wins: higher level first, then the earlier skill
+_Candidate = tuple[float, int, _Row]
+
+
+@dataclass(frozen=True)
+class SkillQuery:
+    """Selection of the skills of a group, a skill has to meet all set conditions.
+
+    The top selections keep the skills with the highest level, on equal levels the earlier ones.
+    The top per category is applied before the top overall. The selected skills keep their plotting order.
+    """
+
+    include_categories: frozenset[str] = frozenset()
+    exclude_categories: frozenset[str] = frozenset()
+    min_level: float | None = None
+    max_level: float | None = None
+    top_per_category: int | None = None
+    top: int | None = None
+
+    def selects_all(self) -> bool:
+        """Check if no condition is set, so the whole group is selected."""
+        return self == SkillQuery()
+
+    def matches(self, level: float, category: str) -> bool:
+        """Check if a skill passes the filters, the top selections are not checked."""
+        if self.include_categories and category not in self.include_categories:
+            return False
+        if category in self.exclude_categories:
+            return False
+        if self.min_level is not None and level < self.min_level:
+            return False
+        return self.max_level is None or level <= self.max_level
+
+
+def _push_bounded(heap: list[_Candidate], size: int, candidate: _Candidate):
+    """Keep the best size candidates in the min heap, the worst one is replaced if the candidate is better."""
+    if len(heap) < size:
+        heappush(heap, candidate)
+    # a heap of size zero stays empty
+    elif heap and candidate > heap[0]:
+        heapreplace(heap, candidate)
+
+
+def select_rows(rows: Iterable[_Row], query: SkillQuery) -> list[_Row]:
+    """Select the (name, level, category) rows matching the query, in one pass over the rows.
+
+    Only the selected rows are kept, each top selection needs a heap of its size.
+    """
+    filtered = (
+        (level, -position, (name, level, category))
+        for position, (name, level, category) in enumerate(rows)
+        if query.matches(level, category)
+    )
+    if query.top_per_category is None and query.top is None:
+        return [row for _, _, row in filtered]
+    candidates: Iterable[_Candidate] = filtered
+    if query.top_per_category is not None:
+        heaps: dict[str, list[_Candidate]] = {}
+        for candidate in filtered:
+            _push_bounded(heaps.setdefault(candidate[2][2], []), query.top_per_category, candidate)
+        candidates = chain.from_iterable(heaps.values())
+    selected = nlargest(query.top, candidates) if query.top is not None else list(candidates)
+    # back to the plotting order, only the selected rows are sorted
+    selected.sort(key=lambda candidate: -candidate[1])
+    return [row for _, _, row in selected]
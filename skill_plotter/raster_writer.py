@@ -0,0 +1,443 @@
+"""Module to paint the skill diagram of png and jpg pictures directly into a pixel array, without a matplotlib figure.
+
+Only the font engine and the color parsing of matplotlib are used, numpy holds the pixels and pillow encodes them.
+
+The bars are plain or rounded rectangles, so each layer of a column is filled at once from the ends of each pixel row.
+Labels are put together from the glyphs of an atlas, each glyph is rendered only once for a font and size.
+The layout follows the one of `generate_diagram`, like the svg writer does.
+"""
+
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass
+from functools import cache, lru_cache
+
+import numpy as np
+
+from .layout import (
+    BAR_MAX_LEN,
+    BORDER_WIDTH_MULTIPLIER,
+    DEFAULT_FONT_FILE,
+    FONT_SIZE,
+    LABEL_PAD,
+    POINTS_PER_INCH,
+    axis_scales,
+    compute_layout,
+    font_path,
+)
+from .profiling import stage
+from .skill_table import SkillColumn, SkillTable
+from .utils import _COLOR, _TARGET, BLUE, DARK_GRAY, WHITE, PictureTypes, StyleTypes
+
+# default resolution of a matplotlib figure
+DPI = 100
+# bars filled at once, limits the size of the coverage arrays of long columns
+_BARS_PER_CHUNK = 256
+# empty row the font engine adds above each rendered glyph
+_GLYPH_PADDING = 1
+# rendered labels kept by each atlas, the same skills are often plotted again
+_LABEL_CACHE_SIZE = 4096
+# background without canvas color, white like matplotlib saves fully transparent pixels
+_TRANSPARENT = "#ffffff00"
+
+
+@dataclass(frozen=True)
+class _Glyph:
+    """Coverage mask of a glyph, positioned relative to the pen on the baseline."""
+
+    mask: np.ndarray
+    left: float
+    top: int
+    ascent: float
+    advance: float
+
+
+class GlyphAtlas:
+    """Glyphs of a font in one size, rendered by the font engine of matplotlib on first use.
+
+    The glyphs are coverage masks, so one atlas serves all colors. It can be shared between threads.
+    """
+
+    def __init__(self, font_file: str, size: float, dpi: float):
+        """Load the font file, the size is in points."""
+        from matplotlib.ft2font import FT2Font
+
+        self._font = FT2Font(str(font_path(font_file)))
+        self._font.set_size(size, dpi)
+        self._glyphs: dict[str, _Glyph] = {}
+        self._kerning: dict[str, float] = {}
+        # the font engine keeps the state of the last rendered text
+        self._lock = threading.Lock()
+        self.render = lru_cache(maxsize=_LABEL_CACHE_SIZE)(self._render)
+        # like matplotlib, labels are aligned at least by the height of "lp"
+        self.ascent = max(self.glyph("l").ascent, self.glyph("p").ascent)
+
+    def glyph(self, char: str) -> _Glyph:
+        """Return the glyph of the character, it is rendered on first use."""
+        glyph = self._glyphs.get(char)
+        if glyph is None:
+            with self._lock:
+                glyph = self._glyphs[char] = self._render_glyph(char)
+        return glyph
+
+    def _render_glyph(self, char: str) -> _Glyph:
+        """Render a single glyph with the hinting matplotlib uses by default."""
+        from matplotlib.ft2font import LoadFlags
+
+        font = self._font
+        font.set_text(char, 0, flags=LoadFlags.DEFAULT)
+        font.draw_glyphs_to_bitmap(antialiased=True)
+        mask = np.array(font.get_image(), dtype=np.uint8)
+        height = font.get_width_height()[1] / 64
+        descent = font.get_descent() / 64
+        advance = font.load_char(ord(char), flags=LoadFlags.DEFAULT).horiAdvance / 64
+        # the bitmap got a padding row above the glyph box
+        top = round(descent - height) - _GLYPH_PADDING
+        return _Glyph(mask, font.get_bitmap_offset()[0] / 64, top, height - descent, advance)
+
+    def _kern(self, left: str, right: str) -> float:
+        """Return the kerning between two characters in pixels."""
+        pair = left + right
+        kerning = self._kerning.get(pair)
+        if kerning is None:
+            from matplotlib.ft2font import Kerning
+
+            with self._lock:
+                font = self._font
+                kerning = font.get_kerning(
+                    font.get_char_index(ord(left)), font.get_char_index(ord(right)), Kerning.DEFAULT
+                )
+            kerning = self._kerning[pair] = kerning / 64
+        return kerning
+
+    def _render(self, text: str) -> tuple[np.ndarray, int, int, float, float]:
+        """Put the text together from its glyphs.
+
+        Returns the coverage mask, the offset of its left and top side from the start of the baseline,
+        the ascent and the advance of the whole text.
+        """
+        glyphs = [self.glyph(char) for char in text]
+        positions = []
+        pen = 0.0
+        for index, glyph in enumerate(glyphs):
+            if index:
+                pen += self._kern(text[index - 1], text[index])
+            positions.append(round(pen + glyph.left))
+            pen += glyph.advance
+        left = min(positions)
+        right = max(position + glyph.mask.shape[1] for position, glyph in zip(positions, glyphs))
+        top = min(glyph.top for glyph in glyphs)
+        bottom = max(glyph.top + glyph.mask.shape[0] for glyph in glyphs)
+        mask = np.zeros((bottom - top, right - left), dtype=np.uint8)
+        for position, glyph in zip(positions, glyphs):
+            height, width = glyph.mask.shape
+            region = mask[glyph.top - top : glyph.top - top + height, position - left : position - left + width]
+            # glyphs can overlap a bit, like for italic fonts
+            np.maximum(region, glyph.mask, out=region)
+        return mask, left, top, max(glyph.ascent for glyph in glyphs), pen
+
+
+@cache
+def get_atlas(font_file: str = DEFAULT_FONT_FILE, size: float = FONT_SIZE, dpi: float = DPI) -> GlyphAtlas:
+    """Return the glyph atlas of the font, it is created once for each font, size and resolution."""
+    return GlyphAtlas(font_file, size, dpi)
+
+
+def _rgba(color: _COLOR) -> np.ndarray:
+    """Convert the color to rgba values between 0 and 1."""
+    from matplotlib.colors import to_rgba
+
+    return np.array(to_rgba(color), dtype=np.float32)
+
+
+def _packed(color: np.ndarray) -> np.uint32:
+    """Pack the rgba values into the word of a pixel, to fill a canvas viewed as words."""
+    return np.rint(color * 255).astype(np.uint8).view(np.uint32)[0]
+
+
+def _blend(region: np.ndarray, coverage: np.ndarray, color: np.ndarray) -> np.ndarray:
+    """Paint the color over the pixels, weighted by the coverage of each pixel.
+
+    The pixels are bytes with straight alpha, like the ones of the agg renderer of matplotlib.
+    """
+    pixels = region.astype(np.float32) / 255
+    source_alpha = (coverage * color[3])[..., None]
+    alpha = pixels[..., 3:]
+    blended_alpha = alpha + source_alpha * (1 - alpha)
+    blended = pixels[..., :3] * alpha * (1 - source_alpha) + color[:3] * source_alpha
+    np.divide(blended, blended_alpha, out=pixels[..., :3], where=blended_alpha > 0)
+    pixels[..., 3:] = blended_alpha
+    return np.rint(pixels * 255).astype(np.uint8)
+
+
+def _copy_spans(canvas: np.ndarray, rows: np.ndarray, start: np.ndarray, stop: np.ndarray, color: np.ndarray):
+    """Set the pixels of the spans to the opaque color, without blending.
+
+    The rows must be unique, the spans are copied within their bounding box at once, a pixel is copied as one word.
+    """
+    first_row, first_column = rows.min(), start.min()
+    box_start = np.zeros(rows.max() + 1 - first_row, dtype=np.intp)
+    box_stop = np.zeros_like(box_start)
+    box_start[rows - first_row] = start
+    box_stop[rows - first_row] = stop
+    columns = np.arange(first_column, max(stop.max(), first_column))
+    mask = (columns >= box_start[:, None]) & (columns < box_stop[:, None])
+    box = canvas[first_row : first_row + len(box_start), first_column : first_column + len(columns)]
+    np.copyto(box.view(np.uint32)[..., 0], _packed(color), where=mask)
+
+
+def _blend_spans(
+    canvas: np.ndarray, rows: np.ndarray, start: np.ndarray, stop: np.ndarray, coverage: np.ndarray, color: np.ndarray
+):
+    """Blend the color over the pixels of the spans, each row got its own coverage.
+
+    Only the given rows are blended, they are usually a few ones spread over all bars.
+    """
+    first_column = start.min()
+    columns = np.arange(first_column, max(stop.max(), first_column))
+    mask = (columns >= start[:, None]) & (columns < stop[:, None])
+    region = canvas[rows, first_column : first_column + len(columns)]
+    canvas[rows, first_column : first_column + len(columns)] = _blend(region, mask * coverage[:, None], color)
+
+
+def _fill_bars(
+    canvas: np.ndarray,
+    x0: np.ndarray,
+    x1: np.ndarray,
+    y0: np.ndarray,
+    y1: np.ndarray,
+    radius_x: np.ndarray,
+    radius_y: np.ndarray,
+    color: np.ndarray,
+):
+    """Fill the bars given by their edges in pixels, the corners are rounded by the given radius.
+
+    The bars must not share a pixel row. Each pixel row of a bar is a span between two edges,
+    which move inwards at the rounded ends. Only the edge pixels and rows, which are partly covered, are blended.
+    The inner part of the spans is copied at once, if the color is opaque.
+    """
+    for start in range(0, len(x0), _BARS_PER_CHUNK):
+        chunk = slice(start, start + _BARS_PER_CHUNK)
+        row_start = np.clip(np.floor(y0[chunk]).astype(np.intp), 0, canvas.shape[0])
+        row_stop = np.clip(np.ceil(y1[chunk]).astype(np.intp), 0, canvas.shape[0])
+        counts = row_stop - row_start
+        # the bar of each pixel row and the row itself
+        bars = np.repeat(np.arange(start, start + len(counts)), counts)
+        rows = np.arange(counts.sum()) + np.repeat(row_start - (np.cumsum(counts) - counts), counts)
+        if not len(rows):
+            continue
+        top, bottom = y0[bars], y1[bars]
+        row_coverage = np.clip(np.minimum(bottom, rows + 1) - np.maximum(top, rows), 0, 1)
+        # the rounded ends are quadratic curves with the control point in the corner, like `_bar_path`
+        # the curve (1-t)² rx, t² ry gives the inset of the span from the distance of the row center to the edge
+        rx, ry = radius_x[bars], radius_y[bars]
+        centers = rows + 0.5
+        distance = np.clip(np.minimum(centers - top, bottom - centers), 0, None)
+        ratio = np.divide(distance, ry, out=np.ones_like(distance), where=ry > 0)
+        inset = rx * (1 - np.sqrt(np.minimum(ratio, 1))) ** 2
+        left = np.clip(x0[bars] + inset, 0, canvas.shape[1])
+        right = np.clip(x1[bars] - inset, 0, canvas.shape[1])
+        # the fully covered pixels of each span, the pixels before and after them are partly covered
+        inner_start = np.minimum(np.ceil(left), np.floor(right)).astype(np.intp)
+        inner_stop = np.maximum(np.floor(right).astype(np.intp), inner_start)
+        blended = (row_coverage < 1) | (color[3] < 1)
+        if (~blended).any():
+            _copy_spans(canvas, rows[~blended], inner_start[~blended], inner_stop[~blended], color)
+        if blended.any():
+            _blend_spans(canvas, rows[blended], inner_start[blended], inner_stop[blended], row_coverage[blended], color)
+        for column in (inner_start - 1, inner_stop):
+            # the part of the pixel covered by the span, zero if the span ends at the pixel border
+            coverage = np.clip(np.minimum(right, column + 1) - np.maximum(left, column), 0, 1) * row_coverage
+            inside = (coverage > 0) & (column >= 0) & (column < canvas.shape[1])
+            if inside.any():
+                pixels = (rows[inside], column[inside])
+                canvas[pixels] = _blend(canvas[pixels], coverage[inside], color)
+
+
+def _paint_label(canvas: np.ndarray, atlas: GlyphAtlas, label: str, right: float, center: float, color: np.ndarray):
+    """Paint the label right aligned by its advance, vertically centered like matplotlib does it."""
+    mask, left_offset, top_offset, ascent, advance = atlas.render(label)
+    height, width = mask.shape
+    baseline = center + max(atlas.ascent, ascent) / 2
+    row = round(baseline) + top_offset
+    column = round(right - advance) + left_offset
+    # only the part within the canvas
+    row_start, col_start = max(row, 0), max(column, 0)
+    row_stop, col_stop = min(row + height, canvas.shape[0]), min(column + width, canvas.shape[1])
+    if row_start >= row_stop or col_start >= col_stop:
+        return
+    coverage = mask[row_start - row : row_stop - row, col_start - column : col_stop - column] / np.float32(255)
+    region = canvas[row_start:row_stop, col_start:col_stop]
+    region[...] = _blend(region, coverage, color)
+
+
+def _paint_column(
+    canvas: np.ndarray,
+    atlas: GlyphAtlas,
+    skills: SkillColumn,
+    left: float,
+    top: float,
+    plot_width: float,
+    plot_height: float,
+    bar_height: float,
+    background_height: float,
+    background_color: _COLOR,
+    bar_color: _COLOR,
+    font_color: _COLOR,
+    canvas_color: _COLOR | None,
+    style: list[StyleTypes],
+):
+    """Paint the bars and labels of one column (one matplotlib axis), positions are in pixels."""
+    border_width = max((background_height - bar_height) / 2, 0) * BORDER_WIDTH_MULTIPLIER
+    x_extent = BAR_MAX_LEN + border_width * 2
+    # the scales are in pixels per unit, since the plot size is given in pixels
+    x_scale, y_scale, y_min = axis_scales(len(skills), plot_width, plot_height, bar_height, background_height)
+
+    levels = np.fromiter(skills.values(), dtype=float, count=len(skills))
+    # empty bars are not drawn at all
+    positions = np.flatnonzero(levels)
+    centers = top + (positions - y_min) * y_scale
+    n_bars = len(positions)
+    # same layering as the matplotlib zorder: background, outline filler, bar
+    layers = [(0.0, np.full(n_bars, x_extent), background_height, background_color)]
+    if StyleTypes.OUTLINE in style:
+        filler_color = WHITE if canvas_color is None else canvas_color
+        layers.append((border_width, np.full(n_bars, float(BAR_MAX_LEN)), bar_height, filler_color))
+    layers.append((border_width, levels[positions], bar_height, bar_color))
+    for start, widths, height, color in layers:
+        x0 = np.full(n_bars, left + start * x_scale)
+        x1 = x0 + widths * x_scale
+        y0 = centers - height * y_scale / 2
+        y1 = y0 + height * y_scale
+        if StyleTypes.ROUND in style:
+            # half of the bar height in data coordinates, like the path of `_bar_path`
+            radius = np.minimum(height / 2, widths / 2)
+            radius_x, radius_y = radius * x_scale, radius * y_scale
+        else:
+            radius_x = radius_y = np.zeros(n_bars)
+            # matplotlib snaps rectangles to the pixel grid, rounding up from the bottom of the figure
+            x0, x1 = np.floor(x0 + 0.5), np.floor(x1 + 0.5)
+            y0, y1 = np.ceil(y0 - 0.5), np.ceil(y1 - 0.5)
+        rgba = _rgba(color)
+        # neighboring bars can share a pixel row, every second one never does
+        for parity in (0, 1):
+            bars = positions % 2 == parity
+            _fill_bars(canvas, x0[bars], x1[bars], y0[bars], y1[bars], radius_x[bars], radius_y[bars], rgba)
+
+    label_color = _rgba(font_color)
+    label_right = left - LABEL_PAD * DPI / POINTS_PER_INCH
+    for position, label in enumerate(skills.keys()):
+        if label:
+            _paint_label(canvas, atlas, label, label_right, top + (position - y_min) * y_scale, label_color)
+
+
+def paint_skill_raster(
+    skills: SkillTable,
+    n_splits: int,
+    bar_height: float = 0.6,
+    background_height: float = 0.7,
+    background_color: _COLOR = DARK_GRAY,
+    bar_color: _COLOR = DARK_GRAY,
+    font_color: _COLOR = BLUE,
+    canvas_color: _COLOR | None = None,
+    style: list[StyleTypes] = [],
+) -> np.ndarray:
+    """Paint the bar diagram for the given skills into a pixel array.
+
+    The layout follows the one generated by matplotlib, so both outputs look the same.
+    The XKCD style is not supported, use the matplotlib backend for it.
+
+    Args:
+    ----
+        skills (SkillTable): Skills to plot.
+        n_splits (int): Number of columns to split the skills into.
+        bar_height (float, optional): Height of the displayed bar. Defaults to 0.6.
+        background_height (float, optional): Height of the background of the bar. Defaults to 0.7.
+        background_color (_COLOR, optional): Color for the background. Defaults to DARK_GRAY.
+        bar_color (_COLOR, optional): Color for the bar. Defaults to DARK_GRAY.
+        font_color (_COLOR, optional): Color for the font. Defaults to BLUE.
+        canvas_color (_COLOR, optional): Color for the canvas, transparent if not given. Defaults to None.
+        style (list[StyleTypes], optional): List of styles to apply. Defaults to [].
+
+    Returns:
+    -------
+        np.ndarray: The rgba pixels as unsigned bytes, in rows from top to bottom.
+
+    """
+    with stage("split"):
+        split_skills = skills.split_columns(n_splits)
+    with stage("layout"):
+        layout = compute_layout(split_skills)
+    scale = DPI / POINTS_PER_INCH
+    # the canvas size is truncated like the one of matplotlib
+    canvas = np.empty((int(layout.height * scale), int(layout.width * scale), 4), dtype=np.uint8)
+    canvas.view(np.uint32)[...] = _packed(_rgba(_TRANSPARENT if canvas_color is None else canvas_color))
+    atlas = get_atlas()
+    for index, column in enumerate(split_skills):
+        with stage(f"paint_column[{index}]"):
+            _paint_column(
+                canvas,
+                atlas,
+                column,
+                layout.axes_left(index) * scale,
+                layout.axes_top() * scale,
+                layout.axes_width * scale,
+                layout.axes_height * scale,
+                bar_height,
+                background_height,
+                background_color,
+                bar_color,
+                font_color,
+                canvas_color,
+                style,
+            )
+    return canvas
+
+
+def save_rgba(target: _TARGET, pixels: np.ndarray, file_type: PictureTypes, dpi: float):
+    """Save the rgba pixels as png or jpg file, or write them into the buffer.
+
+    jpg got no alpha channel, transparent parts are blended against white like savefig does.
+    """
+    from PIL import Image
+
+    image = Image.fromarray(pixels)
+    if file_type == PictureTypes.JPG:
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, image)
+        background.save(target, format="jpeg", dpi=(dpi, dpi))
+    else:
+        image.save(target, format="png", dpi=(dpi, dpi))
+
+
+def write_skill_raster(
+    skills: SkillTable,
+    n_splits: int,
+    targets: Mapping[PictureTypes, _TARGET],
+    bar_height: float = 0.6,
+    background_height: float = 0.7,
+    background_color: _COLOR = DARK_GRAY,
+    bar_color: _COLOR = DARK_GRAY,
+    font_color: _COLOR = BLUE,
+    canvas_color: _COLOR | None = None,
+    style: list[StyleTypes] = [],
+):
+    """Paint the bar diagram once and save it to the target of each raster file type.
+
+    Takes the same arguments as `paint_skill_raster`, the targets are file names or binary buffers.
+    """
+    with stage("raster_paint"):
+        pixels = paint_skill_raster(
+            skills,
+            n_splits,
+            bar_height,
+            background_height,
+            background_color,
+            bar_color,
+            font_color,
+            canvas_color,
+            style,
+        )
+    for file_type, target in targets.items():
+        with stage(f"save[{file_type.value}]"):
+            save_rgba(target, pixels, file_type, DPI)
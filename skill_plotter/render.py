@@ -0,0 +1,270 @@
+"""Module to render skills or a skill group from the app dir into a picture file or into memory."""
+
+import io
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from . import cache, preparator
+from .preparator import DEFAULT_SKILL_FILE_NAME
+from .profiling import stage
+from .query import SkillQuery
+from .skill_table import SkillTable
+from .utils import _COLOR, _TARGET, BLUE, DARK_GRAY, PictureTypes, StyleTypes
+
+
+def render_skills(
+    data: dict[str, dict[str, Any]] | SkillTable,
+    save_name: str = "skills",
+    file_type: str | Sequence[str] = PictureTypes.SVG,
+    columns: int = 2,
+    group_categories: bool = False,
+    bar_height: float = 0.6,
+    background_height: float = 0.7,
+    background_color: _COLOR = DARK_GRAY,
+    bar_color: _COLOR = BLUE,
+    font_color: _COLOR = DARK_GRAY,
+    canvas_color: _COLOR | None = None,
+    style: list[StyleTypes] | None = None,
+    use_cache: bool = True,
+    max_rows: int | None = None,
+) -> bool:
+    """Prepare and plot the given skills, in the format of a skill group or as SkillTable.
+
+    Multiple file types are rendered from the same figure.
+    If there are more rows than max_rows, the skills are split into pages, see `render_pages`.
+    Uses the render cache if enabled, the plotting dependencies are only loaded if there is no cache hit.
+    Returns True if all pictures were taken from the cache.
+    """
+    if style is None:
+        style = []
+    # use the plain value, formatting the enum itself would give "PictureTypes.SVG"
+    file_types = (
+        [PictureTypes(file_type).value] if isinstance(file_type, str) else [PictureTypes(t).value for t in file_type]
+    )
+    table = _prepare_table(data, group_categories)
+    render_options = (bar_height, background_height, background_color, bar_color, font_color, canvas_color, style)
+    if max_rows is not None and len(table) > max_rows * columns:
+        return render_pages(
+            table, save_name, file_types, columns, max_rows, group_categories, render_options, use_cache
+        )
+    return _render_targets(table, {t: Path(f"{save_name}.{t}") for t in file_types}, columns, render_options, use_cache)
+
+
+def render_to_buffer(
+    data: str | dict[str, dict[str, Any]] | SkillTable,
+    buffer: BinaryIO,
+    file_type: str = PictureTypes.SVG,
+    columns: int = 2,
+    group_categories: bool = False,
+    bar_height: float = 0.6,
+    background_height: float = 0.7,
+    background_color: _COLOR = DARK_GRAY,
+    bar_color: _COLOR = BLUE,
+    font_color: _COLOR = DARK_GRAY,
+    canvas_color: _COLOR | None = None,
+    style: list[StyleTypes] | None = None,
+    use_cache: bool = True,
+) -> bool:
+    """Render the skills as one picture and write it into the binary buffer, nothing is saved as file.
+
+    Returns True if the picture was taken from the cache.
+
+    Args:
+    ----
+        data (str | dict | SkillTable): Name of a skill group, skills in the format of a group or as SkillTable.
+        buffer (BinaryIO): Buffer the encoded picture is written to, like io.BytesIO or a file opened as "wb".
+        file_type (str, optional): File type of the picture. Defaults to PictureTypes.SVG.
+        columns (int, optional): Number of columns to split the skills into. Defaults to 2.
+        group_categories (bool, optional): Sort the skills by category. Defaults to False.
+        bar_height (float, optional): Height of the displayed bar. Defaults to 0.6.
+        background_height (float, optional): Height of the background of the bar. Defaults to 0.7.
+        background_color (_COLOR, optional): Color for the background. Defaults to DARK_GRAY.
+        bar_color (_COLOR, optional): Color for the bar. Defaults to BLUE.
+        font_color (_COLOR, optional): Color for the font. Defaults to DARK_GRAY.
+        canvas_color (_COLOR, optional): Color for the canvas. Defaults to None.
+        style (list[StyleTypes], optional): List of styles to apply. Defaults to None.
+        use_cache (bool, optional): Use the render cache. Defaults to True.
+
+    """
+    if isinstance(data, str):
+        with stage("read"):
+            data = preparator.read_table(data)
+    table = _prepare_table(data, group_categories)
+    render_options = (
+        bar_height,
+        background_height,
+        background_color,
+        bar_color,
+        font_color,
+        canvas_color,
+        style or [],
+    )
+    return _render_targets(table, {PictureTypes(file_type).value: buffer}, columns, render_options, use_cache)
+
+
+def render_to_bytes(data: str | dict[str, dict[str, Any]] | SkillTable, *args: Any, **kwargs: Any) -> bytes:
+    """Render the skills as one picture and return it encoded in the file type.
+
+    Takes the same arguments as `render_to_buffer`, without the buffer.
+    """
+    buffer = io.BytesIO()
+    render_to_buffer(data, buffer, *args, **kwargs)
+    return buffer.getvalue()
+
+
+def _prepare_table(data: dict[str, dict[str, Any]] | SkillTable, group_categories: bool) -> SkillTable:
+    """Convert the skills to a SkillTable in plotting order."""
+    table = data if isinstance(data, SkillTable) else SkillTable.from_data(data)
+    if group_categories:
+        with stage("sort_by_category"):
+            table = table.sorted_by_category()
+    return table
+
+
+def _render_targets(
+    table: SkillTable, targets: dict[str, Path | BinaryIO], columns: int, render_options: tuple, use_cache: bool
+) -> bool:
+    """Plot the prepared skills into the file or buffer of each file type, cached pictures are reused.
+
+    Returns True if all pictures were taken from the cache.
+    """
+    with stage("cache_lookup"):
+        cache_keys = {t: cache.build_cache_key(table, columns, t, *render_options) for t in targets}
+        missing = {
+            t: target for t, target in targets.items() if not (use_cache and _restore_cached(cache_keys[t], t, target))
+        }
+    if not missing:
+        return True
+
+    # a buffer can not be read back, so the picture is rendered into memory first to be cached as well
+    outputs: dict[str, _TARGET] = {
+        t: io.BytesIO() if use_cache and not isinstance(target, Path) else target for t, target in missing.items()
+    }
+    with stage("plot"):
+        # plotting dependencies are heavy, only load them when we really plot
+        from .plotter import write_skill_picture
+
+        write_skill_picture(table, columns, outputs, *render_options)
+    if use_cache:
+        with stage("cache_store"):
+            for t, target in missing.items():
+                output = outputs[t]
+                if isinstance(target, Path):
+                    cache.store_in_cache(cache_keys[t], t, target)
+                elif isinstance(output, io.BytesIO):
+                    picture = output.getbuffer()
+                    target.write(picture)
+                    cache.store_bytes_in_cache(cache_keys[t], t, picture)
+    return False
+
+
+def _restore_cached(key: str, file_type: str, target: Path | BinaryIO) -> bool:
+    """Copy the cached picture to the file or buffer, returns True if the cache was hit."""
+    if isinstance(target, Path):
+        return cache.restore_cached(key, file_type, target)
+    picture = cache.read_cached(key, file_type)
+    if picture is None:
+        return False
+    target.write(picture)
+    return True
+
+
+def page_names(save_name: str, n_pages: int) -> list[str]:
+    """Return the numbered file names of each page, zero padded so they sort in order."""
+    digits = len(str(n_pages))
+    return [f"{save_name}_{page:0{digits}d}" for page in range(1, n_pages + 1)]
+
+
+def render_pages(
+    table: SkillTable,
+    save_name: str,
+    file_types: list[str],
+    columns: int,
+    max_rows: int,
+    keep_categories: bool,
+    render_options: tuple,
+    use_cache: bool = True,
+) -> bool:
+    """Split the prepared skills into pages of at most max_rows rows and plot them page by page.
+
+    The pdf gets one page each, other file types one numbered file per page, e.g. skills_1.png.
+    If keep_categories is set, categories are not split over pages if possible.
+    Each page is cached on its own, returns True if all pictures were taken from the cache.
+    """
+    with stage("paginate"):
+        pages = preparator.split_into_pages(table, max_rows * columns, keep_categories)
+    names = page_names(save_name, len(pages))
+    # each output file with its cache key and the page it shows, the pdf holds all pages
+    outputs: list[tuple[str, int | None, Path, str]] = []
+    with stage("cache_lookup"):
+        for file_type in file_types:
+            keys = [cache.build_cache_key(page, columns, file_type, *render_options) for page in pages]
+            if file_type == PictureTypes.PDF.value:
+                outputs.append((file_type, None, Path(f"{save_name}.pdf"), cache.combine_keys(keys)))
+            else:
+                outputs.extend(
+                    (file_type, index, Path(f"{name}.{file_type}"), key)
+                    for index, (name, key) in enumerate(zip(names, keys))
+                )
+        missing = [out for out in outputs if not (use_cache and cache.restore_cached(out[3], out[0], out[2]))]
+    if not missing:
+        return True
+
+    page_file_types: list[list[str]] = [[] for _ in pages]
+    pdf_name = None
+    for file_type, index, _, _ in missing:
+        if index is None:
+            pdf_name = save_name
+        else:
+            page_file_types[index].append(file_type)
+    with stage("plot"):
+        from .plotter import generate_skill_pages
+
+        generate_skill_pages(pages, columns, names, page_file_types, pdf_name, *render_options)
+    if use_cache:
+        with stage("cache_store"):
+            for file_type, _, target, key in missing:
+                cache.store_in_cache(key, file_type, target)
+    return False
+
+
+def render_group(
+    skill_group: str = DEFAULT_SKILL_FILE_NAME,
+    save_name: str = "skills",
+    file_type: str | Sequence[str] = PictureTypes.SVG,
+    columns: int = 2,
+    group_categories: bool = False,
+    bar_height: float = 0.6,
+    background_height: float = 0.7,
+    background_color: _COLOR = DARK_GRAY,
+    bar_color: _COLOR = BLUE,
+    font_color: _COLOR = DARK_GRAY,
+    canvas_color: _COLOR | None = None,
+    style: list[StyleTypes] | None = None,
+    use_cache: bool = True,
+    max_rows: int | None = None,
+    query: SkillQuery | None = None,
+) -> bool:
+    """Read, prepare and plot the skills of the given group, or only the ones selected by the query.
+
+    Returns True if all pictures were taken from the cache.
+    """
+    with stage("read"):
+        table = preparator.read_table(skill_group, query)
+    return render_skills(
+        table,
+        save_name,
+        file_type,
+        columns,
+        group_categories,
+        bar_height,
+        background_height,
+        background_color,
+        bar_color,
+        font_color,
+        canvas_color,
+        style,
+        use_cache,
+        max_rows,
+    )
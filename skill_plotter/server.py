@@ -0,0 +1,177 @@
+"""Module for the render server, which keeps warm worker processes to render pictures on demand.
+
+Requests are json, either with a group name or inline skills, and the render options of the main command:
+
+    POST /render {"group": "skills", "file_type": "png", "columns": 2, "style": ["round"]}
+    POST /render {"skills": {"Python": {"level": 9, "category": "default"}}}
+    GET /stats
+
+The response of a render request is the picture itself.
+"""
+
+import json
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from . import preparator
+from .plotter import warm_up
+from .render import render_to_bytes
+from .skill_table import SkillTable
+from .utils import PictureTypes, StyleTypes, info_print
+from .validation import find_errors
+
+_CONTENT_TYPES = {
+    PictureTypes.SVG: "image/svg+xml",
+    PictureTypes.PNG: "image/png",
+    PictureTypes.JPG: "image/jpeg",
+    PictureTypes.PDF: "application/pdf",
+}
+# options which can be given in a request, passed to render_to_bytes
+_RENDER_OPTIONS = {
+    "file_type",
+    "columns",
+    "group_categories",
+    "bar_height",
+    "background_height",
+    "background_color",
+    "bar_color",
+    "font_color",
+    "canvas_color",
+    "style",
+}
+_LATENCY_WINDOW = 1000
+
+
+def _render_in_worker(data: dict[str, dict[str, Any]] | SkillTable, options: dict[str, Any]) -> bytes:
+    """Render the skills within a worker process and return the picture."""
+    return render_to_bytes(data, **options)
+
+
+class RenderStats:
+    """Thread safe counters for the queue depth and the request latency."""
+
+    def __init__(self):
+        """Start with empty counters."""
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self.queued = 0
+        self.finished = 0
+        self.failed = 0
+
+    def start(self):
+        with self._lock:
+            self.queued += 1
+
+    def finish(self, latency: float, success: bool):
+        with self._lock:
+            self.queued -= 1
+            self.finished += 1
+            if not success:
+                self.failed += 1
+            self._latencies.append(latency)
+
+    def as_dict(self) -> dict[str, Any]:
+        with self._lock:
+            last_latency = self._latencies[-1] if self._latencies else 0.0
+            latencies = sorted(self._latencies)
+            stats: dict[str, Any] = {"queue_depth": self.queued, "finished": self.finished, "failed": self.failed}
+        if latencies:
+            stats["latency_ms"] = {
+                "last": round(last_latency * 1000, 2),
+                "mean": round(statistics.fmean(latencies) * 1000, 2),
+                "p50": round(latencies[len(latencies) // 2] * 1000, 2),
+                "p95": round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+            }
+        return stats
+
+
+def _parse_request(body: dict[str, Any]) -> tuple[dict[str, dict[str, Any]] | SkillTable, dict[str, Any]]:
+    """Extract the skills and the render options from the request, raise a ValueError if invalid."""
+    if not isinstance(body, dict):
+        raise ValueError("Request must be a JSON object")
+    unknown = set(body) - _RENDER_OPTIONS - {"group", "skills"}
+    if unknown:
+        raise ValueError(f"Unknown options: {', '.join(sorted(unknown))}")
+    options = {key: value for key, value in body.items() if key in _RENDER_OPTIONS}
+    options["file_type"] = PictureTypes(options.get("file_type", PictureTypes.SVG))
+    options["style"] = [StyleTypes(s) for s in options.get("style", [])]
+    if "skills" in body:
+        data = body["skills"]
+        errors = find_errors(data)
+        if errors:
+            raise ValueError("; ".join(errors))
+    else:
+        data = preparator.read_table(body.get("group", preparator.DEFAULT_SKILL_FILE_NAME))
+    return data, options
+
+
+def _build_handler(executor: ProcessPoolExecutor, stats: RenderStats) -> type[BaseHTTPRequestHandler]:
+    """Build the request handler class using the given worker pool."""
+
+    class RenderHandler(BaseHTTPRequestHandler):
+        def _send(self, status: HTTPStatus, body: bytes, content_type: str):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_json(self, status: HTTPStatus, data: dict[str, Any]):
+            self._send(status, json.dumps(data).encode("utf-8"), "application/json")
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._send_json(HTTPStatus.OK, stats.as_dict())
+                return
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"Unknown path {self.path}"})
+
+        def do_POST(self):
+            if self.path != "/render":
+                self._send_json(HTTPStatus.NOT_FOUND, {"error": f"Unknown path {self.path}"})
+                return
+            start = time.perf_counter()
+            stats.start()
+            success = False
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                data, options = _parse_request(json.loads(self.rfile.read(length) or b"{}"))
+                picture = executor.submit(_render_in_worker, data, options).result()
+                self._send(HTTPStatus.OK, picture, _CONTENT_TYPES[options["file_type"]])
+                success = True
+            except ValueError as err:
+                self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(err)})
+            except Exception as err:
+                self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(err).__name__}: {err}"})
+            finally:
+                stats.finish(time.perf_counter() - start, success)
+
+        def log_message(self, format: str, *args: Any):
+            # keep the console clean, the stats endpoint shows what is going on
+            return
+
+    return RenderHandler
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, workers: int = 2):
+    """Start the render server and block until it is stopped with Ctrl+C."""
+    stats = RenderStats()
+    # each worker warms up once when it starts, also if it is started later on
+    with ProcessPoolExecutor(max_workers=workers, initializer=warm_up) as executor:
+        # start all workers now and not with the first requests, the empty tasks just wait for the initializer
+        for future in [executor.submit(os.getpid) for _ in range(workers)]:
+            future.result()
+        server = ThreadingHTTPServer((host, port), _build_handler(executor, stats))
+        info_print(f"Serving on http://{host}:{server.server_port} with {workers} warm workers, use Ctrl+C to stop")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
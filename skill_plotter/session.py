@@ -0,0 +1,153 @@
+"""Module for buffered edit sessions, used by the interactive commands.
+
+The group is held in memory and every edit is appended to a journal of the session in the app dir.
+The edits are only stored when the session ends, the journal is replayed if its process ended without doing so.
+"""
+
+import os
+import sys
+from glob import escape
+from pathlib import Path
+from types import TracebackType
+from typing import Any, BinaryIO
+
+from .storage import append_log_entry, apply_log_entry, file_lock, get_app_dir, get_store, read_log_entries
+from .utils import info_print
+
+
+_JOURNAL_SUFFIX = ".journal"
+
+
+def _get_journal_file(group: str, pid: int) -> Path:
+    """Return the journal file path of the session of the process in the group."""
+    return get_app_dir() / f"{group}{_JOURNAL_SUFFIX}.{pid}"
+
+
+def _journal_pid(journal_file: Path, group: str) -> int | None:
+    """Return the process id of the journal, None if it is no journal of the group.
+
+    Journals of older versions got no process id, their owner is gone as well.
+    """
+    name = journal_file.name.removeprefix(f"{group}{_JOURNAL_SUFFIX}")
+    if not name:
+        return 0
+    if name.startswith(".") and name[1:].isdigit():
+        return int(name[1:])
+    # a group with a name starting like this one
+    return None
+
+
+def _process_alive(pid: int) -> bool:
+    """Return True if the process is still running."""
+    if pid <= 0:
+        return False
+    if pid == os.getpid():
+        return True
+    if sys.platform == "win32":
+        # signals would terminate the process, just ask for a handle
+        import ctypes
+
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # the process exists, only of another user
+        return True
+    return True
+
+
+def _orphaned_journals(group: str) -> list[Path]:
+    """Return the journals of the group whose session process is gone."""
+    journals = []
+    for journal_file in get_app_dir().glob(f"{escape(group)}{_JOURNAL_SUFFIX}*"):
+        pid = _journal_pid(journal_file, group)
+        if pid is not None and not _process_alive(pid):
+            journals.append(journal_file)
+    return sorted(journals)
+
+
+def _commit(group: str, entries: list[dict[str, Any]]) -> None:
+    """Apply the entries on top of the stored group.
+
+    The edits are applied in one batch to the current group, so changes done by others meanwhile are kept.
+    """
+    get_store().apply_entries(group, entries)
+
+
+def recover_journal(group: str) -> bool:
+    """Replay the journals of interrupted sessions, returns True if there was one.
+
+    Journals of running sessions are left alone, they are stored when those sessions end.
+    """
+    if not _orphaned_journals(group):
+        return False
+    # the journals are replayed one at a time, so two recovering sessions never replay the same one twice
+    with file_lock(get_app_dir() / f".{group}{_JOURNAL_SUFFIX}.lock"):
+        # another session may have recovered them while waiting for the lock
+        journals = _orphaned_journals(group)
+        recovered = 0
+        for journal_file in journals:
+            entries = read_log_entries(journal_file)
+            _commit(group, entries)
+            journal_file.unlink()
+            recovered += len(entries)
+    if not journals:
+        return False
+    info_print(f"Recovered {recovered} unsaved edits of a previous session in group {group}")
+    return True
+
+
+class EditSession:
+    """Buffer edits of a group in memory and write them once on exit.
+
+    Use as context manager, the edits are also written if the session is ended with Ctrl+C.
+    """
+
+    def __init__(self, group: str):
+        """Prepare the session for the given group."""
+        self.group = group
+        self.data: dict[str, dict[str, Any]] = {}
+        self._entries: list[dict[str, Any]] = []
+        self._journal_file = _get_journal_file(group, os.getpid())
+        self._journal: BinaryIO | None = None
+
+    def __enter__(self) -> "EditSession":
+        recover_journal(self.group)
+        self.data = get_store().read(self.group)
+        get_app_dir(create=True)
+        self._journal = open(self._journal_file, "ab")
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if self._journal is not None:
+            self._journal.close()
+        _commit(self.group, self._entries)
+        self._journal_file.unlink(missing_ok=True)
+
+    def _log(self, entry: dict[str, Any]) -> None:
+        """Apply the edit and make it crash safe in the journal."""
+        if self._journal is None:
+            raise RuntimeError("Edit session is not started, use it as context manager")
+        apply_log_entry(self.data, entry)
+        self._entries.append(entry)
+        append_log_entry(self._journal, entry)
+
+    def set_skill(self, skill: str, level: float, category: str) -> None:
+        self._log({"op": "set", "skill": skill, "level": level, "category": category})
+
+    def remove_skill(self, skill: str) -> bool:
+        if skill not in self.data:
+            return False
+        self._log({"op": "remove", "skill": skill})
+        return True
@@ -0,0 +1,148 @@
+"""Module for the compact representation of the skills used for plotting.
+
+A group is stored as dict of dicts, which needs a lot of memory and a copy for each preparation step.
+The SkillTable keeps the names in a list, the levels in a float array and the categories as codes
+into a list of the distinct categories. Sorting or paging builds one new table, splitting it into
+columns only creates views on the table.
+"""
+
+from array import array
+from collections.abc import Iterable, Iterator
+from itertools import chain, groupby, repeat
+from typing import Any
+
+_DEFAULT_CATEGORY = "default"
+
+
+class SkillTable:
+    """Skills in plotting order, with their level and category."""
+
+    __slots__ = ("categories", "category_codes", "levels", "names")
+
+    def __init__(self, names: list[str], levels: array, category_codes: array, categories: list[str]):
+        """Use the given columns, the category codes are the index of the category in categories."""
+        self.names = names
+        self.levels = levels
+        self.category_codes = category_codes
+        self.categories = categories
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple[str, float, str]]) -> "SkillTable":
+        """Build the table from (name, level, category) rows, each category is stored once."""
+        names: list[str] = []
+        levels = array("d")
+        category_codes = array("I")
+        codes: dict[str, int] = {}
+        for name, level, category in rows:
+            names.append(name)
+            levels.append(level)
+            category_codes.append(codes.setdefault(category, len(codes)))
+        return cls(names, levels, category_codes, list(codes))
+
+    @classmethod
+    def from_data(cls, data: dict[str, dict[str, Any]]) -> "SkillTable":
+        """Build the table from the skills of a group, additional attributes are not needed for plotting."""
+        return cls.from_rows((name, values["level"], values["category"]) for name, values in data.items())
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def items(self) -> Iterator[tuple[str, float]]:
+        """Iterate over the names and levels, like the items of a dict."""
+        return zip(self.names, self.levels)
+
+    def take(self, indices: Iterable[int]) -> "SkillTable":
+        """Build a table of the skills at the given positions, in this order."""
+        indices = list(indices)
+        names = self.names
+        levels = self.levels
+        codes = self.category_codes
+        return SkillTable(
+            [names[i] for i in indices],
+            array("d", [levels[i] for i in indices]),
+            array("I", [codes[i] for i in indices]),
+            self.categories,
+        )
+
+    def slice(self, start: int, stop: int) -> "SkillTable":
+        """Build a table of the skills between start and stop."""
+        return SkillTable(
+            self.names[start:stop], self.levels[start:stop], self.category_codes[start:stop], self.categories
+        )
+
+    def sorted_by_category(self) -> "SkillTable":
+        """Sort the skills by category and then by decreasing level, the default category comes first.
+
+        Only the distinct categories are compared as text, the skills are sorted by the rank of their category.
+        """
+        categories = self.categories
+        category_order = sorted(
+            range(len(categories)), key=lambda c: (categories[c] != _DEFAULT_CATEGORY, categories[c])
+        )
+        ranks = [0] * len(categories)
+        for rank, code in enumerate(category_order):
+            ranks[code] = rank
+        codes = self.category_codes
+        levels = self.levels
+        return self.take(sorted(range(len(self)), key=lambda i: (ranks[codes[i]], -levels[i])))
+
+    def category_runs(self) -> list[tuple[int, int]]:
+        """Return the start and stop of each block of consecutive skills with the same category."""
+        runs = []
+        start = 0
+        for _, block in groupby(self.category_codes):
+            stop = start + sum(1 for _ in block)
+            runs.append((start, stop))
+            start = stop
+        return runs
+
+    def split_columns(self, n: int) -> list["SkillColumn"]:
+        """Split the skills into n evenly sized columns, the first columns get the remaining skills.
+
+        All columns have the same number of rows, shorter ones are padded with an empty row.
+        """
+        size, remainder = divmod(len(self), n)
+        n_rows = size + (1 if remainder else 0)
+        columns = []
+        start = 0
+        for index in range(n):
+            stop = start + size + (1 if index < remainder else 0)
+            columns.append(SkillColumn(self, start, stop, n_rows))
+            start = stop
+        return columns
+
+
+class SkillColumn:
+    """View on consecutive skills of a table, read like the dict of skill names and levels.
+
+    Padding rows got an empty name and level 0, they only keep the rows aligned between columns.
+    """
+
+    __slots__ = ("n_rows", "start", "stop", "table")
+
+    def __init__(self, table: SkillTable, start: int, stop: int, n_rows: int):
+        """Show the skills between start and stop, padded to n_rows rows."""
+        self.table = table
+        self.start = start
+        self.stop = stop
+        self.n_rows = n_rows
+
+    def __len__(self) -> int:
+        return self.n_rows
+
+    def __iter__(self) -> Iterator[str]:
+        return self.keys()
+
+    def keys(self) -> Iterator[str]:
+        """Iterate over the skill names, including the padding."""
+        names = self.table.names
+        return chain((names[i] for i in range(self.start, self.stop)), repeat("", self.n_rows - self.stop + self.start))
+
+    def values(self) -> Iterator[float]:
+        """Iterate over the skill levels, including the padding."""
+        levels = memoryview(self.table.levels)[self.start : self.stop]
+        return chain(levels, repeat(0.0, self.n_rows - self.stop + self.start))
+
+    def items(self) -> Iterator[tuple[str, float]]:
+        """Iterate over the skill names and levels, including the padding."""
+        return zip(self.keys(), self.values())
@@ -0,0 +1,671 @@
+"""Module for the storage engines of the skill groups.
+
+By default each group is a json file in the app dir, with an edit log of the changes since it was written.
+Setting the SKILL_PLOTTER_STORAGE environment variable to "sqlite" keeps all groups in a single SQLite database.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from collections.abc import Hashable, Iterable, Iterator, Mapping
+from contextlib import AbstractContextManager, contextmanager, suppress
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+from typing import Any, BinaryIO
+
+import typer
+
+from .query import SkillQuery, select_rows
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+_APP_NAME = "skill-plotter"
+_app_dir = typer.get_app_dir(_APP_NAME)
+_STORAGE_ENV = "SKILL_PLOTTER_STORAGE"
+_SQLITE_FILE_NAME = "skill_groups.sqlite3"
+_LOG_SUFFIX = ".log"
+_LOCK_SUFFIX = ".lock"
+# the edit log is compacted into the json snapshot once it got bigger than this
+_LOG_COMPACT_BYTES = 64 * 1024
+_INDEX_DIR_NAME = "group_index"
+_INDEX_FILE_NAME = "groups.json"
+# increase this if the entries of the group index change
+_INDEX_VERSION = 1
+# increase this if the database layout changes, version 1 means json files are migrated
+_SQLITE_SCHEMA_VERSION = 1
+
+_SkillData = dict[str, dict[str, Any]]
+# existing skills keep their position, like updating a dict does
+_UPSERT_SKILL = (
+    "INSERT INTO skills (group_name, name, level, category, extra, position) "
+    "VALUES (?, ?, ?, ?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM skills WHERE group_name = ?)) "
+    "ON CONFLICT (group_name, name) "
+    "DO UPDATE SET level = excluded.level, category = excluded.category, extra = excluded.extra"
+)
+
+
+def get_app_dir(create: bool = False) -> Path:
+    """Return the app dir, which keeps the groups and all other data of skill plotter.
+
+    Only writers need to create it, reading from a not existing dir just finds no data.
+    """
+    app_dir = Path(_app_dir)
+    if create:
+        app_dir.mkdir(parents=True, exist_ok=True)
+    return app_dir
+
+
+def _get_json_file(group: str) -> Path:
+    """Return the json file path of the group."""
+    return get_app_dir() / f"{group}.json"
+
+
+def _get_log_file(group: str) -> Path:
+    """Return the edit log file path of the group."""
+    return get_app_dir() / f"{group}{_LOG_SUFFIX}"
+
+
+def _list_json_groups() -> list[str]:
+    """Search the app dir for all json groups, also those only written to the edit log yet."""
+    app_dir = get_app_dir()
+    return sorted(
+        {file.stem for file in app_dir.glob("*.json")} | {file.stem for file in app_dir.glob(f"*{_LOG_SUFFIX}")}
+    )
+
+
+def read_log_entries(log_file: Path) -> list[dict[str, Any]]:
+    """Read all complete entries of an edit log.
+
+    A partly written line (crash while writing) is skipped.
+    """
+    entries = []
+    with open(log_file, encoding="utf-8") as log:
+        for line in log:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return entries
+
+
+def apply_log_entry(data: _SkillData, entry: dict[str, Any]) -> None:
+    """Apply a single edit log entry to the group data."""
+    if entry["op"] == "set":
+        data[entry["skill"]] = {"level": entry["level"], "category": entry["category"]}
+    elif entry["op"] == "remove":
+        data.pop(entry["skill"], None)
+
+
+def append_log_entry(log: BinaryIO, entry: dict[str, Any]) -> None:
+    """Append the entry as line to the opened log and flush it to the disk."""
+    append_log_entries(log, [entry])
+
+
+def append_log_entries(log: BinaryIO, entries: Iterable[dict[str, Any]]) -> None:
+    """Append the entries as one block of lines to the opened log and flush them to the disk at once."""
+    log.write(b"".join(json.dumps(entry).encode("utf-8") + b"\n" for entry in entries))
+    log.flush()
+    os.fsync(log.fileno())
+
+
+@contextmanager
+def file_lock(lock_file: Path, shared: bool = False) -> Iterator[None]:
+    """Hold the advisory lock on the file, writers need it exclusively, readers can share it.
+
+    Only writers create the lock file, it is kept afterwards. Without one, no writer ever held the lock,
+    so readers got nothing to wait for, like for groups copied into the app dir.
+    """
+    if shared and not lock_file.exists():
+        yield
+        return
+    with open(lock_file, "rb" if shared else "a+b") as lock:
+        if sys.platform == "win32":
+            # there are no shared locks, so readers are serialized as well
+            lock.seek(0)
+            msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def _group_lock(group: str, shared: bool = False) -> AbstractContextManager[None]:
+    """Hold the lock of the group, see `file_lock`."""
+    # hidden and kept after deleting the group, removing it could split waiting writers onto a new file
+    lock_file = get_app_dir(create=not shared) / f".{group}{_LOCK_SUFFIX}"
+    if not shared and not lock_file.exists():
+        # a new file changes the app dir, like the files of a new group do
+        with _changing_groups():
+            lock_file.touch()
+    return file_lock(lock_file, shared)
+
+
+def _write_atomic(target: Path, data: Any) -> None:
+    """Write the data to a temporary file and rename it to the target.
+
+    Readers either see the old or the new file, a crash never leaves a partly written one.
+    """
+    tmp_file = target.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_file, "w", encoding="utf-8") as json_file:
+        json.dump(data, json_file)
+        json_file.flush()
+        os.fsync(json_file.fileno())
+    os.replace(tmp_file, target)
+
+
+@dataclass(frozen=True)
+class GroupSummary:
+    """Overview of a group, without reading its skills.
+
+    The modification time (seconds since epoch) and the hash of the content are only known for json groups.
+    """
+
+    name: str
+    skills: int
+    categories: list[str]
+    mtime: float | None = None
+    content_hash: str | None = None
+
+
+def _json_token(group: str) -> list[list[int] | None] | None:
+    """Return modification time and size of the json snapshot and edit log, None if the group does not exist."""
+    token: list[list[int] | None] = []
+    for file in (_get_json_file(group), _get_log_file(group)):
+        try:
+            stat = file.stat()
+        except FileNotFoundError:
+            token.append(None)
+            continue
+        token.append([stat.st_mtime_ns, stat.st_size])
+    return token if any(token) else None
+
+
+def _summary_entry(data: _SkillData, token: list[list[int] | None] | None) -> dict[str, Any]:
+    """Build the index entry of a group, the token tells which state of the files the entry describes."""
+    return {
+        "skills": len(data),
+        "categories": sorted({values["category"] for values in data.values()}),
+        "mtime": max((part[0] for part in token or [] if part), default=0) / 1e9,
+        "hash": hashlib.sha256(json.dumps(data).encode("utf-8")).hexdigest(),
+        "token": token,
+    }
+
+
+def _get_index_dir() -> Path:
+    """Return the folder of the group index, creates it if needed.
+
+    It is a folder of its own, so writing the index does not change the modification time of the app dir.
+    """
+    index_dir = get_app_dir(create=True) / _INDEX_DIR_NAME
+    index_dir.mkdir(exist_ok=True)
+    return index_dir
+
+
+def _load_index() -> dict[str, Any]:
+    """Load the group index, an empty one if it is missing, broken or of an older version."""
+    try:
+        with open(get_app_dir() / _INDEX_DIR_NAME / _INDEX_FILE_NAME, encoding="utf-8") as index_file:
+            index = json.load(index_file)
+    except (OSError, json.JSONDecodeError):
+        index = None
+    if not isinstance(index, dict) or index.get("version") != _INDEX_VERSION:
+        index = {"version": _INDEX_VERSION, "dir_mtime": None, "groups": {}}
+    return index
+
+
+def _refresh_index(
+    entries: Mapping[str, dict[str, Any] | None], removed: Iterable[str] = (), dir_mtime: int | None = None
+) -> None:
+    """Set the entries found while listing the groups and remove the removed groups.
+
+    An entry of None marks a group which was not read yet.
+    The index is read again under its lock, so entries written by others in the meantime are kept.
+    The modification time of the app dir is only stored after all groups were looked up.
+    The index only saves work, groups in a read only app dir are still listed, they are just read each time.
+    """
+    with suppress(OSError):
+        index_dir = _get_index_dir()
+        with file_lock(index_dir / _LOCK_SUFFIX):
+            index = _load_index()
+            index["groups"].update(entries)
+            for group in removed:
+                index["groups"].pop(group, None)
+            if dir_mtime is not None:
+                index["dir_mtime"] = dir_mtime
+            _write_atomic(index_dir / _INDEX_FILE_NAME, index)
+
+
+def _app_dir_mtime() -> int | None:
+    """Return the modification time of the app dir, it changes if any group file is added or removed."""
+    try:
+        return get_app_dir().stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def _changing_groups() -> Iterator[dict[str, dict[str, Any] | None]]:
+    """Hold the index lock while the files of groups are changed, yields the index entries to update.
+
+    Set the entry of each changed group, None if it needs to be read again, or remove it for a deleted group.
+    All writers change the app dir under this lock, so if the index knew all groups before the change,
+    it still does afterwards, and the new modification time of the app dir is stored with the entries.
+    The index is only written if anything changed.
+    """
+    index_dir = _get_index_dir()
+    with file_lock(index_dir / _LOCK_SUFFIX):
+        index = _load_index()
+        dir_mtime = index["dir_mtime"]
+        complete = dir_mtime is not None and dir_mtime == _app_dir_mtime()
+        entries: dict[str, dict[str, Any] | None] = index["groups"]
+        previous = dict(entries)
+        yield entries
+        if complete:
+            index["dir_mtime"] = _app_dir_mtime()
+        if entries != previous or index["dir_mtime"] != dir_mtime:
+            _write_atomic(index_dir / _INDEX_FILE_NAME, index)
+
+
+class JsonStore:
+    """Store each group as a json file, single edits are appended to an edit log of the group.
+
+    Writers hold the lock of the group, so concurrent edits do not get lost.
+    Reading replays the log on top of the json snapshot, once the log got too big,
+    it is compacted into a new snapshot, which replaces the old one at once.
+    """
+
+    def _read_unlocked(self, group: str) -> _SkillData:
+        skill_file = _get_json_file(group)
+        data: _SkillData = {}
+        if skill_file.exists():
+            with open(skill_file, encoding="utf-8") as json_file:
+                data = json.load(json_file)
+        log_file = _get_log_file(group)
+        if log_file.exists():
+            for entry in read_log_entries(log_file):
+                apply_log_entry(data, entry)
+        return data
+
+    def _write_unlocked(self, group: str, data: _SkillData) -> None:
+        get_app_dir(create=True)
+        _write_atomic(_get_json_file(group), data)
+        # the snapshot contains all logged edits now
+        _get_log_file(group).unlink(missing_ok=True)
+
+    def _append(self, group: str, *entries: dict[str, Any]) -> None:
+        """Append the edits to the log, the caller holds the lock. Compacts the log if it got too big."""
+        log_file = _get_log_file(group)
+        with open(log_file, "ab") as log:
+            # a crash could have left a partly written line, the new entries need their own lines
+            if log.tell() > 0 and not _ends_with_newline(log_file):
+                log.write(b"\n")
+            append_log_entries(log, entries)
+            log_size = log.tell()
+        if log_size > _LOG_COMPACT_BYTES:
+            self._write_unlocked(group, self._read_unlocked(group))
+
+    def read(self, group: str) -> _SkillData:
+        if not self.exists(group):
+            return {}
+        with _group_lock(group, shared=True):
+            return self._read_unlocked(group)
+
+    def read_rows(self, group: str) -> Iterator[tuple[str, float, str]]:
+        return ((skill, values["level"], values["category"]) for skill, values in self.read(group).items())
+
+    def select_rows(self, group: str, query: SkillQuery) -> Iterable[tuple[str, float, str]]:
+        # the snapshot is read as a whole anyway, the query is evaluated in one pass over its skills
+        return select_rows(self.read_rows(group), query)
+
+    def write(self, group: str, data: _SkillData) -> None:
+        with _group_lock(group), _changing_groups() as entries:
+            self._write_unlocked(group, data)
+            entries[group] = _summary_entry(data, _json_token(group))
+
+    def set_skill(self, group: str, skill: str, level: float, category: str) -> None:
+        with _group_lock(group), _changing_groups() as entries:
+            self._append(group, {"op": "set", "skill": skill, "level": level, "category": category})
+            # the entry would need a read of the whole group, it is read once by the next listing instead
+            entries[group] = None
+
+    def merge(self, group: str, chunks: Iterable[_SkillData], overwrite: bool = False) -> None:
+        # the file is only written at the end, an error in any chunk leaves the group untouched
+        with _group_lock(group):
+            data = {} if overwrite else self._read_unlocked(group)
+            for chunk in chunks:
+                data.update(chunk)
+            with _changing_groups() as entries:
+                self._write_unlocked(group, data)
+                entries[group] = _summary_entry(data, _json_token(group))
+
+    def remove_skill(self, group: str, skill: str) -> bool:
+        if not self.exists(group):
+            return False
+        with _group_lock(group):
+            data = self._read_unlocked(group)
+            if skill not in data:
+                return False
+            del data[skill]
+            with _changing_groups() as entries:
+                self._append(group, {"op": "remove", "skill": skill})
+                entries[group] = _summary_entry(data, _json_token(group))
+        return True
+
+    def apply_entries(self, group: str, entries: list[dict[str, Any]]) -> None:
+        """Apply the edit log entries in order, with one lock of the group and one block of the log."""
+        if not entries:
+            return
+        with _group_lock(group), _changing_groups() as index_entries:
+            if not self.exists(group):
+                # removes of a new group are no-ops, like set_skill a set creates the group
+                data: _SkillData = {}
+                for entry in entries:
+                    apply_log_entry(data, entry)
+                if any(entry["op"] == "set" for entry in entries):
+                    self._write_unlocked(group, data)
+                    index_entries[group] = _summary_entry(data, _json_token(group))
+                return
+            # removing a skill that is missing is a no-op on replay, so the group is not read to check them
+            self._append(group, *entries)
+            index_entries[group] = None
+
+    def exists(self, group: str) -> bool:
+        return _get_json_file(group).exists() or _get_log_file(group).exists()
+
+    def delete(self, group: str) -> bool:
+        if not self.exists(group):
+            return False
+        with _group_lock(group), _changing_groups() as entries:
+            _get_json_file(group).unlink(missing_ok=True)
+            _get_log_file(group).unlink(missing_ok=True)
+            entries.pop(group, None)
+        return True
+
+    def _indexed_groups(self) -> dict[str, dict[str, Any] | None]:
+        """Return the index entries of all groups, the group files are only searched if the app dir changed.
+
+        Entries of new groups are None, they still need to be read.
+        """
+        dir_mtime = _app_dir_mtime()
+        if dir_mtime is None:
+            return {}
+        index = _load_index()
+        entries: dict[str, dict[str, Any] | None] = index["groups"]
+        if index["dir_mtime"] == dir_mtime:
+            return entries
+        # files were added or removed since, the entries of the remaining groups are kept
+        names = _list_json_groups()
+        found = {name: entries.get(name) for name in names}
+        new_groups: dict[str, dict[str, Any] | None] = dict.fromkeys(found.keys() - entries.keys())
+        _refresh_index(new_groups, removed=entries.keys() - found.keys(), dir_mtime=dir_mtime)
+        return found
+
+    def _summaries(self, entries: dict[str, dict[str, Any] | None]) -> dict[str, GroupSummary]:
+        """Build the summaries of the indexed groups, groups changed since they were indexed are read again."""
+        refreshed = {}
+        for group, entry in entries.items():
+            token = _json_token(group)
+            if entry is None or entry["token"] != token:
+                entry = _summary_entry(self.read(group), token)
+                refreshed[group] = entry
+                entries[group] = entry
+        if refreshed:
+            _refresh_index(refreshed)
+        return {
+            group: GroupSummary(group, entry["skills"], entry["categories"], entry["mtime"], entry["hash"])
+            for group, entry in entries.items()
+            if entry is not None
+        }
+
+    def summaries(self) -> dict[str, GroupSummary]:
+        return self._summaries(self._indexed_groups())
+
+    def summary(self, group: str) -> GroupSummary | None:
+        if not self.exists(group):
+            return None
+        entry = _load_index()["groups"].get(group)
+        return self._summaries({group: entry}).get(group)
+
+    def groups(self) -> list[str]:
+        return sorted(self._indexed_groups())
+
+    def change_token(self, group: str) -> Hashable:
+        # a rewritten file got a new modification time, or at least a different size
+        token = _json_token(group)
+        return None if token is None else tuple(None if part is None else tuple(part) for part in token)
+
+
+def _ends_with_newline(file: Path) -> bool:
+    """Check if the last byte of the file is a line break."""
+    with open(file, "rb") as opened:
+        opened.seek(-1, os.SEEK_END)
+        return opened.read(1) == b"\n"
+
+
+class SqliteStore:
+    """Store all groups in one SQLite database, each skill is an indexed row.
+
+    Every change is its own transaction, so single edits do not rewrite the whole group
+    and concurrent writers are serialized by SQLite.
+    Existing json groups are migrated once, when the database is created.
+    """
+
+    def __init__(self, db_file: Path | None = None):
+        """Use the given database file, defaults to one in the app dir."""
+        self._db_file = db_file
+        self._connection: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return the connection, opens and migrates the database on first use."""
+        if self._connection is not None:
+            return self._connection
+        db_file = self._db_file or get_app_dir(create=True) / _SQLITE_FILE_NAME
+        connection = sqlite3.connect(db_file, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        with connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS skill_groups (name TEXT PRIMARY KEY)")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS skills ("
+                "group_name TEXT NOT NULL REFERENCES skill_groups (name) ON DELETE CASCADE, "
+                "name TEXT NOT NULL, level REAL NOT NULL, category TEXT NOT NULL, "
+                "position INTEGER NOT NULL, extra TEXT, PRIMARY KEY (group_name, name))"
+            )
+            # the insertion order is also the plotting order
+            connection.execute("CREATE INDEX IF NOT EXISTS skills_position ON skills (group_name, position)")
+            # the best skills of a group or category are read from the start of an index, without sorting
+            connection.execute("CREATE INDEX IF NOT EXISTS skills_level ON skills (group_name, level DESC, position)")
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS skills_category ON skills (group_name, category, level DESC, position)"
+            )
+        self._connection = connection
+        if connection.execute("PRAGMA user_version").fetchone()[0] < _SQLITE_SCHEMA_VERSION:
+            self._migrate_json_groups()
+        return connection
+
+    def _migrate_json_groups(self) -> None:
+        """Import all existing json groups into the database, in one transaction."""
+        connection = self._connect()
+        json_store = JsonStore()
+        with connection:
+            for group in _list_json_groups():
+                self._insert_group(connection, group, json_store.read(group))
+            connection.execute(f"PRAGMA user_version = {_SQLITE_SCHEMA_VERSION}")
+
+    @staticmethod
+    def _insert_group(connection: sqlite3.Connection, group: str, data: _SkillData) -> None:
+        """Replace all skills of the group within the current transaction."""
+        connection.execute("INSERT OR IGNORE INTO skill_groups (name) VALUES (?)", (group,))
+        connection.execute("DELETE FROM skills WHERE group_name = ?", (group,))
+        connection.executemany(
+            "INSERT INTO skills (group_name, name, level, category, extra, position) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (group, skill, *_split_skill_values(values), position)
+                for position, (skill, values) in enumerate(data.items())
+            ),
+        )
+
+    def read(self, group: str) -> _SkillData:
+        rows = self._connect().execute(
+            "SELECT name, level, category, extra FROM skills WHERE group_name = ? ORDER BY position", (group,)
+        )
+        return {name: _join_skill_values(level, category, extra) for name, level, category, extra in rows}
+
+    def read_rows(self, group: str) -> Iterator[tuple[str, float, str]]:
+        # the additional attributes are not needed, so no skill dicts are built
+        return self._connect().execute(
+            "SELECT name, level, category FROM skills WHERE group_name = ? ORDER BY position", (group,)
+        )
+
+    def select_rows(self, group: str, query: SkillQuery) -> Iterable[tuple[str, float, str]]:
+        return self._connect().execute(*_select_query(group, query))
+
+    def write(self, group: str, data: _SkillData) -> None:
+        connection = self._connect()
+        with connection:
+            self._insert_group(connection, group, data)
+
+    def set_skill(self, group: str, skill: str, level: float, category: str) -> None:
+        connection = self._connect()
+        with connection:
+            connection.execute("INSERT OR IGNORE INTO skill_groups (name) VALUES (?)", (group,))
+            connection.execute(_UPSERT_SKILL, (group, skill, level, category, None, group))
+
+    def merge(self, group: str, chunks: Iterable[_SkillData], overwrite: bool = False) -> None:
+        connection = self._connect()
+        # one transaction, an error in any chunk leaves the group untouched
+        with connection:
+            connection.execute("INSERT OR IGNORE INTO skill_groups (name) VALUES (?)", (group,))
+            if overwrite:
+                connection.execute("DELETE FROM skills WHERE group_name = ?", (group,))
+            for chunk in chunks:
+                connection.executemany(
+                    _UPSERT_SKILL,
+                    ((group, skill, *_split_skill_values(values), group) for skill, values in chunk.items()),
+                )
+
+    def remove_skill(self, group: str, skill: str) -> bool:
+        connection = self._connect()
+        with connection:
+            cursor = connection.execute("DELETE FROM skills WHERE group_name = ? AND name = ?", (group, skill))
+        return cursor.rowcount > 0
+
+    def apply_entries(self, group: str, entries: list[dict[str, Any]]) -> None:
+        """Apply the edit log entries in order, all in one transaction."""
+        if not entries:
+            return
+        connection = self._connect()
+        with connection:
+            for entry in entries:
+                if entry["op"] == "set":
+                    connection.execute("INSERT OR IGNORE INTO skill_groups (name) VALUES (?)", (group,))
+                    connection.execute(
+                        _UPSERT_SKILL, (group, entry["skill"], entry["level"], entry["category"], None, group)
+                    )
+                elif entry["op"] == "remove":
+                    connection.execute("DELETE FROM skills WHERE group_name = ? AND name = ?", (group, entry["skill"]))
+
+    def exists(self, group: str) -> bool:
+        row = self._connect().execute("SELECT 1 FROM skill_groups WHERE name = ?", (group,)).fetchone()
+        return row is not None
+
+    def delete(self, group: str) -> bool:
+        connection = self._connect()
+        with connection:
+            cursor = connection.execute("DELETE FROM skill_groups WHERE name = ?", (group,))
+        return cursor.rowcount > 0
+
+    def groups(self) -> list[str]:
+        return [name for (name,) in self._connect().execute("SELECT name FROM skill_groups ORDER BY name")]
+
+    def _summaries(self, where: str = "", parameters: tuple = ()) -> dict[str, GroupSummary]:
+        # the database is its own index, the skill rows are counted using the primary key
+        rows = self._connect().execute(
+            "SELECT g.name, COUNT(s.name), json_group_array(DISTINCT s.category) FILTER (WHERE s.name IS NOT NULL) "
+            f"FROM skill_groups g LEFT JOIN skills s ON s.group_name = g.name {where} GROUP BY g.name ORDER BY g.name",
+            parameters,
+        )
+        return {name: GroupSummary(name, count, sorted(json.loads(categories))) for name, count, categories in rows}
+
+    def summaries(self) -> dict[str, GroupSummary]:
+        return self._summaries()
+
+    def summary(self, group: str) -> GroupSummary | None:
+        return self._summaries("WHERE g.name = ?", (group,)).get(group)
+
+    def change_token(self, group: str) -> Hashable:
+        # increases with every commit of other connections, for all groups alike
+        return self._connect().execute("PRAGMA data_version").fetchone()[0]
+
+
+def _select_query(group: str, query: SkillQuery) -> tuple[str, list[Any]]:
+    """Build the SQL and its parameters, which select the skills of the group matching the query.
+
+    The filters are part of the WHERE clause, the top selections read the skills ordered by level from an index
+    and stop after the LIMIT. For the top per category, this is done once for each category.
+    """
+    conditions = ["group_name = ?"]
+    parameters: list[Any] = [group]
+    for operator, categories in (("IN", query.include_categories), ("NOT IN", query.exclude_categories)):
+        if categories:
+            conditions.append(f"category {operator} ({', '.join('?' * len(categories))})")
+            parameters.extend(sorted(categories))
+    for operator, level in ((">=", query.min_level), ("<=", query.max_level)):
+        if level is not None:
+            conditions.append(f"level {operator} ?")
+            parameters.append(level)
+    where = " AND ".join(conditions)
+    columns = "name, level, category, position"
+    if query.top_per_category is None:
+        sql = f"SELECT {columns} FROM skills WHERE {where}"
+    else:
+        # the best skills of each selected category are read from the start of its part of the category index
+        best = f"SELECT rowid FROM skills WHERE {where} AND category = selected ORDER BY level DESC, position LIMIT ?"
+        sql = (
+            f"SELECT {columns} FROM (SELECT DISTINCT category AS selected FROM skills WHERE {where}) "
+            f"JOIN skills ON skills.rowid IN ({best})"
+        )
+        parameters = [*parameters, *parameters, query.top_per_category]
+    if query.top is not None:
+        sql = f"SELECT {columns} FROM ({sql}) ORDER BY level DESC, position LIMIT ?"
+        parameters.append(query.top)
+    # the selected skills keep the plotting order
+    return f"SELECT name, level, category FROM ({sql}) ORDER BY position", parameters
+
+
+def _split_skill_values(values: dict[str, Any]) -> tuple[float, str, str | None]:
+    """Split the skill values into level, category and the json of additional attributes."""
+    extra = {key: value for key, value in values.items() if key not in ("level", "category")}
+    return values["level"], values["category"], json.dumps(extra) if extra else None
+
+
+def _join_skill_values(level: float, category: str, extra: str | None) -> dict[str, Any]:
+    """Build the skill values from the database columns."""
+    values: dict[str, Any] = {"level": level, "category": category}
+    if extra is not None:
+        values.update(json.loads(extra))
+    return values
+
+
+@cache
+def get_store() -> JsonStore | SqliteStore:
+    """Return the configured storage engine, json files are used if nothing is set."""
+    engine = os.environ.get(_STORAGE_ENV, "json").lower()
+    if engine == "sqlite":
+        return SqliteStore()
+    if engine == "json":
+        return JsonStore()
+    raise ValueError(f"Unknown storage engine {engine}, use json or sqlite")
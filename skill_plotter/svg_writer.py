@@ -0,0 +1,400 @@
+"""Module to write the skill diagram directly as SVG markup, without matplotlib.
+
+Each element got an id of the skill position and the layer, e.g. `skill-3-bar`, and the document holds
+the state it was built from in its metadata. If only levels or colors change, an existing file is patched
+instead of building it again.
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any
+from xml.sax.saxutils import escape, unescape
+
+from . import __version__
+from .layout import BAR_MAX_LEN, BORDER_WIDTH_MULTIPLIER, FONT_SIZE, LABEL_PAD, axis_scales, compute_layout
+from .profiling import stage
+from .skill_table import SkillColumn, SkillTable
+from .utils import _COLOR, _TARGET, BLUE, DARK_GRAY, WHITE, StyleTypes
+
+_FONT_FAMILY = "DejaVu Sans, Bitstream Vera Sans, Arial, Helvetica, sans-serif"
+_METADATA = re.compile(r'<metadata id="skill-plotter">(.*?)</metadata>', re.DOTALL)
+_ELEMENT = re.compile(r'<(?:rect|text) id="(?:canvas|skill-(\d+)-(\w+))"[^>]*>')
+_FILL = re.compile(r'style="fill: [^"]*"')
+_WIDTH = re.compile(r' width="[^"]*"')
+_ROUNDING_X = re.compile(r' rx="[^"]*"')
+
+
+def _svg_color(color: _COLOR) -> str:
+    """Convert the given color into a SVG compatible string."""
+    if isinstance(color, str):
+        return color
+    red, green, blue = (round(channel * 255) for channel in color)
+    return f"rgb({red},{green},{blue})"
+
+
+def _rect(
+    element_id: str, x: float, y: float, width: float, height: float, color: str, rounded: bool, aspect: float
+) -> str:
+    """Build a rect element, rounding the corners like the matplotlib FancyBboxPatch would.
+
+    The aspect is the ratio of the x to the y data scale, since the rounding is applied in data coordinates.
+    """
+    rounding = ""
+    if rounded:
+        # rounding size is half of the bar height in data coordinates for both axes
+        radius_y = height / 2
+        radius_x = min(radius_y * aspect, width / 2)
+        rounding = f' rx="{radius_x:.2f}" ry="{radius_y:.2f}"'
+    return (
+        f'<rect id="{element_id}" x="{x:.2f}" y="{y:.2f}" width="{width:.2f}" height="{height:.2f}"{rounding} '
+        f'style="fill: {color}"/>'
+    )
+
+
+def _build_column(
+    skills: SkillColumn,
+    first_index: int,
+    left: float,
+    top: float,
+    plot_width: float,
+    plot_height: float,
+    bar_height: float,
+    background_height: float,
+    background_color: _COLOR,
+    bar_color: _COLOR,
+    font_color: _COLOR,
+    canvas_color: _COLOR | None,
+    style: list[StyleTypes],
+) -> list[str]:
+    """Build the SVG elements of one column (one matplotlib axis).
+
+    The first index is the position of the first skill of the column within all skills, used for the ids.
+    """
+    border_width = max((background_height - bar_height) / 2, 0) * BORDER_WIDTH_MULTIPLIER
+    x_extent = BAR_MAX_LEN + border_width * 2
+    x_scale, y_scale, y_min = axis_scales(len(skills), plot_width, plot_height, bar_height, background_height)
+
+    aspect = x_scale / y_scale
+    rounded = StyleTypes.ROUND in style
+    filler_color = _svg_color(WHITE if canvas_color is None else canvas_color)
+    elements: list[str] = []
+
+    def to_x(value: float) -> float:
+        return left + value * x_scale
+
+    for position, (label, level) in enumerate(skills.items()):
+        center = top + (position - y_min) * y_scale
+        element_id = f"skill-{first_index + position}"
+        if label:
+            elements.append(
+                f'<text id="{element_id}-label" x="{left - LABEL_PAD:.2f}" y="{center:.2f}" '
+                f'text-anchor="end" dominant-baseline="central" style="fill: {_svg_color(font_color)}">'
+                f"{escape(label)}</text>"
+            )
+        # empty bars are not drawn at all
+        if level == 0:
+            continue
+        bar_y = center - bar_height * y_scale / 2
+        background_y = center - background_height * y_scale / 2
+        # same layering as the matplotlib zorder: background, outline filler, bar
+        elements.append(
+            _rect(
+                f"{element_id}-background",
+                to_x(0),
+                background_y,
+                x_extent * x_scale,
+                background_height * y_scale,
+                _svg_color(background_color),
+                rounded,
+                aspect,
+            )
+        )
+        if StyleTypes.OUTLINE in style:
+            elements.append(
+                _rect(
+                    f"{element_id}-outline",
+                    to_x(border_width),
+                    bar_y,
+                    BAR_MAX_LEN * x_scale,
+                    bar_height * y_scale,
+                    filler_color,
+                    rounded,
+                    aspect,
+                )
+            )
+        elements.append(
+            _rect(
+                f"{element_id}-bar",
+                to_x(border_width),
+                bar_y,
+                level * x_scale,
+                bar_height * y_scale,
+                _svg_color(bar_color),
+                rounded,
+                aspect,
+            )
+        )
+    return elements
+
+
+def build_skill_svg(
+    skills: SkillTable,
+    n_splits: int,
+    bar_height: float = 0.6,
+    background_height: float = 0.7,
+    background_color: _COLOR = DARK_GRAY,
+    bar_color: _COLOR = DARK_GRAY,
+    font_color: _COLOR = BLUE,
+    canvas_color: _COLOR | None = None,
+    style: list[StyleTypes] = [],
+) -> str:
+    """Build the SVG markup of the bar diagram for the given skills.
+
+    The layout follows the one generated by matplotlib, so both outputs look the same.
+    The XKCD style is not supported, use the matplotlib backend for it.
+
+    Args:
+    ----
+        skills (SkillTable): Skills to plot.
+        n_splits (int): Number of columns to split the skills into.
+        bar_height (float, optional): Height of the displayed bar. Defaults to 0.6.
+        background_height (float, optional): Height of the background of the bar. Defaults to 0.7.
+        background_color (_COLOR, optional): Color for the background. Defaults to DARK_GRAY.
+        bar_color (_COLOR, optional): Color for the bar. Defaults to DARK_GRAY.
+        font_color (_COLOR, optional): Color for the font. Defaults to BLUE.
+        canvas_color (_COLOR, optional): Color for the canvas. Defaults to None.
+        style (list[StyleTypes], optional): List of styles to apply. Defaults to [].
+
+    Returns:
+    -------
+        str: The SVG document.
+
+    """
+    with stage("split"):
+        split_skills = skills.split_columns(n_splits)
+    with stage("layout"):
+        layout = compute_layout(split_skills)
+    width = layout.width
+    height = layout.height
+    state = _build_state(
+        split_skills, bar_height, background_height, background_color, bar_color, font_color, canvas_color, style
+    )
+    x_scale, _, _ = axis_scales(
+        len(split_skills[0]), layout.axes_width, layout.axes_height, bar_height, background_height
+    )
+    # needed to patch the bars, the rounding of a bar is limited by its width
+    state["x_scale"] = x_scale
+    state["radius_x"] = bar_height * x_scale / 2
+
+    elements: list[str] = []
+    if canvas_color is not None:
+        elements.append(
+            f'<rect id="canvas" width="{width}" height="{height}" style="fill: {_svg_color(canvas_color)}"/>'
+        )
+    first_index = 0
+    for index, column in enumerate(split_skills):
+        elements.extend(
+            _build_column(
+                column,
+                first_index,
+                layout.axes_left(index),
+                layout.axes_top(),
+                layout.axes_width,
+                layout.axes_height,
+                bar_height,
+                background_height,
+                background_color,
+                bar_color,
+                font_color,
+                canvas_color,
+                style,
+            )
+        )
+        first_index += len(column)
+
+    body = "\n  ".join(elements)
+    return (
+        '<?xml version="1.0" encoding="utf-8" standalone="no"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" version="1.1" width="{width}pt" height="{height}pt" '
+        f'viewBox="0 0 {width} {height}">\n'
+        f" {_metadata_element(state)}\n"
+        f' <g style="font-family: {_FONT_FAMILY}; font-size: {FONT_SIZE}px">\n'
+        f"  {body}\n"
+        " </g>\n"
+        "</svg>\n"
+    )
+
+
+def patch_skill_svg(
+    svg: str,
+    skills: SkillTable,
+    n_splits: int,
+    bar_height: float = 0.6,
+    background_height: float = 0.7,
+    background_color: _COLOR = DARK_GRAY,
+    bar_color: _COLOR = DARK_GRAY,
+    font_color: _COLOR = BLUE,
+    canvas_color: _COLOR | None = None,
+    style: list[StyleTypes] = [],
+) -> str | None:
+    """Apply changed levels and colors to a document built by `build_skill_svg`.
+
+    Only the changed bars get a new width, the layout of the document is kept.
+    Takes the same arguments as `build_skill_svg` with the existing document in front.
+
+    Returns
+    -------
+        str | None: The patched document, None if the skills, their order or split or the layout options changed,
+            or if the document was not built by `build_skill_svg`. It needs a full build then.
+
+    """
+    match = _METADATA.search(svg)
+    if match is None:
+        return None
+    try:
+        old_state = json.loads(unescape(match.group(1)))
+    except json.JSONDecodeError:
+        return None
+    split_skills = skills.split_columns(n_splits)
+    state = _build_state(
+        split_skills, bar_height, background_height, background_color, bar_color, font_color, canvas_color, style
+    )
+    if old_state.get("signature") != state["signature"]:
+        return None
+    state["x_scale"] = old_state["x_scale"]
+    state["radius_x"] = old_state["radius_x"]
+    levels = state["levels"]
+    changed = {index for index, (old, new) in enumerate(zip(old_state["levels"], levels)) if old != new}
+    colors = state["colors"]
+    rounded = StyleTypes.ROUND in style
+
+    def patch_element(element: re.Match[str]) -> str:
+        markup = element.group(0)
+        index, layer = element.group(1), element.group(2)
+        if index is None:
+            layer = "canvas"
+        elif layer == "bar" and int(index) in changed:
+            width = levels[int(index)] * state["x_scale"]
+            markup = _WIDTH.sub(f' width="{width:.2f}"', markup)
+            if rounded:
+                markup = _ROUNDING_X.sub(f' rx="{min(state["radius_x"], width / 2):.2f}"', markup)
+        return _FILL.sub(f'style="fill: {colors[layer]}"', markup)
+
+    svg = _ELEMENT.sub(patch_element, svg)
+    return _METADATA.sub(lambda _: _metadata_element(state), svg, count=1)
+
+
+def _build_state(
+    split_skills: list[SkillColumn],
+    bar_height: float,
+    background_height: float,
+    background_color: _COLOR,
+    bar_color: _COLOR,
+    font_color: _COLOR,
+    canvas_color: _COLOR | None,
+    style: list[StyleTypes],
+) -> dict[str, Any]:
+    """Describe what the document shows, stored in its metadata.
+
+    The signature covers everything changing the layout or the existence of elements,
+    a document with the same signature can be patched.
+    """
+    levels = [level for column in split_skills for level in column.values()]
+    layout_source = [
+        __version__,
+        [list(column) for column in split_skills],
+        # empty bars are not drawn at all
+        [level == 0 for level in levels],
+        bar_height,
+        background_height,
+        sorted(StyleTypes(s).value for s in style),
+        canvas_color is None,
+    ]
+    return {
+        "signature": hashlib.sha256(json.dumps(layout_source).encode("utf-8")).hexdigest(),
+        "levels": levels,
+        "colors": {
+            "background": _svg_color(background_color),
+            "outline": _svg_color(WHITE if canvas_color is None else canvas_color),
+            "bar": _svg_color(bar_color),
+            "label": _svg_color(font_color),
+            "canvas": None if canvas_color is None else _svg_color(canvas_color),
+        },
+    }
+
+
+def _metadata_element(state: dict[str, Any]) -> str:
+    """Build the metadata element holding the state of the document."""
+    return f'<metadata id="skill-plotter">{escape(json.dumps(state))}</metadata>'
+
+
+def generate_skill_svg(
+    skills: SkillTable,
+    n_splits: int,
+    save_name: str,
+    bar_height: float = 0.6,
+    background_height: float = 0.7,
+    background_color: _COLOR = DARK_GRAY,
+    bar_color: _COLOR = DARK_GRAY,
+    font_color: _COLOR = BLUE,
+    canvas_color: _COLOR | None = None,
+    style: list[StyleTypes] = [],
+):
+    """Generate the bar diagram for the given skills and save it as svg file.
+
+    An existing file of an earlier run is patched if only levels or colors changed.
+    Takes the same arguments as the matplotlib based `generate_skill_picture`.
+    """
+    write_skill_svg(
+        skills,
+        n_splits,
+        Path(f"{save_name}.svg"),
+        bar_height,
+        background_height,
+        background_color,
+        bar_color,
+        font_color,
+        canvas_color,
+        style,
+    )
+
+
+def write_skill_svg(
+    skills: SkillTable,
+    n_splits: int,
+    target: _TARGET,
+    bar_height: float = 0.6,
+    background_height: float = 0.7,
+    background_color: _COLOR = DARK_GRAY,
+    bar_color: _COLOR = DARK_GRAY,
+    font_color: _COLOR = BLUE,
+    canvas_color: _COLOR | None = None,
+    style: list[StyleTypes] = [],
+):
+    """Write the bar diagram for the given skills to the svg file or into the binary buffer.
+
+    An existing file is patched if only levels or colors changed, a buffer always gets a full build.
+    """
+    options = (bar_height, background_height, background_color, bar_color, font_color, canvas_color, style)
+    if not isinstance(target, (str, os.PathLike)):
+        with stage("svg_build"):
+            document = build_skill_svg(skills, n_splits, *options)
+        with stage("svg_write"):
+            target.write(document.encode("utf-8"))
+        return
+    svg_file = Path(target)
+    svg = None
+    if svg_file.exists():
+        with stage("svg_patch"):
+            try:
+                svg = patch_skill_svg(svg_file.read_text(encoding="utf-8"), skills, n_splits, *options)
+            except (OSError, ValueError):
+                svg = None
+    if svg is None:
+        with stage("svg_build"):
+            svg = build_skill_svg(skills, n_splits, *options)
+    with stage("svg_write"), open(svg_file, "w", encoding="utf-8") as file:
+        file.write(svg)
@@ -0,0 +1,178 @@
+"""Module to import and export skill groups as tables (CSV or Parquet), using pandas.
+
+Each row is one skill with the columns skill, level and category, additional attributes get their own column.
+Tables of multiple groups got a group column as well.
+Validation, sorting and merging work on the whole table, so even large tables are handled fast.
+"""
+
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from .storage import get_store
+
+SKILL_COLUMN = "skill"
+GROUP_COLUMN = "group"
+REQUIRED_COLUMNS = [SKILL_COLUMN, "level", "category"]
+_DEFAULT_CATEGORY = "default"
+
+
+def _extra_columns(frame: pd.DataFrame) -> list[str]:
+    """Return the columns of additional skill attributes."""
+    return [column for column in frame.columns if column not in (*REQUIRED_COLUMNS, GROUP_COLUMN)]
+
+
+def group_to_frame(data: dict[str, dict[str, Any]], group: str | None = None) -> pd.DataFrame:
+    """Build the table of the skills, with a leading group column if a group is given."""
+    frame = pd.DataFrame.from_dict(data, orient="index")
+    if frame.empty:
+        frame = pd.DataFrame(columns=REQUIRED_COLUMNS[1:])
+    frame = frame.rename_axis(SKILL_COLUMN).reset_index()
+    if group is not None:
+        frame.insert(0, GROUP_COLUMN, group)
+    return frame
+
+
+def frame_to_group(frame: pd.DataFrame) -> dict[str, dict[str, Any]]:
+    """Build the skills of a validated table, empty cells of additional attributes are left out."""
+    frame = frame.drop(columns=GROUP_COLUMN, errors="ignore").set_index(SKILL_COLUMN)
+    frame["level"] = frame["level"].astype(float)
+    if len(frame.columns) == len(REQUIRED_COLUMNS) - 1:
+        return frame.to_dict("index")
+    # only the additional attributes can be empty, a skill only got those set in its row
+    return {
+        skill: {key: value for key, value in values.items() if not pd.isna(value)}
+        for skill, values in frame.to_dict("index").items()
+    }
+
+
+def find_frame_errors(frame: pd.DataFrame) -> list[str]:
+    """Return a description for each problem of the table, empty list if it is valid.
+
+    Same rules as the skill schema, each skill needs a numeric level and a category.
+    Skill names need to be unique within their group.
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in frame.columns]
+    if missing:
+        return [f"file: missing column {', '.join(missing)}"]
+    errors: list[str] = []
+    # row numbers as shown in the file, counting the header of a csv
+    rows = pd.Series(frame.index + 2, index=frame.index)
+    missing_names = frame[SKILL_COLUMN].isna() | (frame[SKILL_COLUMN] == "")
+    names = frame[SKILL_COLUMN].where(~missing_names, "row " + rows.astype(str)).astype(str)
+
+    def add_errors(mask: pd.Series, message: str):
+        errors.extend(f"{name}: {message}" for name in names[mask])
+
+    add_errors(missing_names, "skill name is missing")
+    # booleans are no numbers in json schema, so they are rejected as level
+    if pd.api.types.is_bool_dtype(frame["level"]):
+        add_errors(frame["level"].notna(), "level is not of type 'number'")
+    else:
+        levels = pd.to_numeric(frame["level"], errors="coerce")
+        add_errors(levels.isna(), "level is not of type 'number'")
+    categories = frame["category"]
+    invalid_categories = categories.isna()
+    if not pd.api.types.is_string_dtype(categories):
+        invalid_categories |= ~categories.map(lambda value: isinstance(value, str))
+    add_errors(invalid_categories, "category is not a string")
+    if GROUP_COLUMN in frame.columns:
+        add_errors(frame[GROUP_COLUMN].isna() | (frame[GROUP_COLUMN] == ""), "group is missing")
+    group_keys = [GROUP_COLUMN, SKILL_COLUMN] if GROUP_COLUMN in frame.columns else [SKILL_COLUMN]
+    add_errors(frame.duplicated(group_keys, keep="first") & ~missing_names, "skill is listed twice")
+    return errors
+
+
+def sort_frame_by_category(frame: pd.DataFrame) -> pd.DataFrame:
+    """Sort the skills like `sort_skills_by_category`, default category first, then by category and level."""
+    keys = pd.DataFrame(
+        {"custom": frame["category"] != _DEFAULT_CATEGORY, "category": frame["category"], "level": -frame["level"]}
+    )
+    order = keys.sort_values(["custom", "category", "level"], kind="stable").index
+    return frame.loc[order]
+
+
+def merge_frames(existing: pd.DataFrame, imported: pd.DataFrame) -> pd.DataFrame:
+    """Merge the imported skills into the existing ones, like updating a dict.
+
+    Existing skills keep their position but get the imported values, new skills are added at the end.
+    """
+    combined = pd.concat([existing, imported], ignore_index=True)
+    order = combined[SKILL_COLUMN].drop_duplicates()
+    latest = combined.drop_duplicates(SKILL_COLUMN, keep="last").set_index(SKILL_COLUMN)
+    return latest.loc[order].reset_index()
+
+
+def read_table(path: Path) -> pd.DataFrame:
+    """Read the csv or parquet file, the file type is taken from the suffix.
+
+    Skill names and categories are always read as text, even if they look like numbers.
+    """
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    # values like "NA" or "null" are valid skill names, so only empty cells of additional attributes are missing
+    frame = pd.read_csv(path, dtype={SKILL_COLUMN: str, "category": str, GROUP_COLUMN: str}, keep_default_na=False)
+    for column in _extra_columns(frame):
+        values = frame[column].replace("", None)
+        try:
+            # keeps whole numbers as int, even with empty cells
+            frame[column] = pd.to_numeric(values).convert_dtypes()
+        except (ValueError, TypeError):
+            frame[column] = values
+    return frame
+
+
+def write_table(frame: pd.DataFrame, path: Path) -> None:
+    """Write the table as csv or parquet file, the file type is taken from the suffix."""
+    if path.suffix == ".parquet":
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False)
+
+
+def export_groups(groups: list[str], path: Path, group_categories: bool = False, with_group: bool = False) -> int:
+    """Export the skills of the groups into one table, returns the number of exported skills.
+
+    Args:
+    ----
+        groups (list[str]): Groups to export, in this order.
+        path (Path): Target file, the suffix defines the file type.
+        group_categories (bool, optional): Sort the skills of each group by category. Defaults to False.
+        with_group (bool, optional): Add the group column, always done for multiple groups. Defaults to False.
+
+    """
+    store = get_store()
+    with_group = with_group or len(groups) > 1
+    frames = []
+    for group in groups:
+        frame = group_to_frame(store.read(group), group if with_group else None)
+        if group_categories and not frame.empty:
+            frame = sort_frame_by_category(frame)
+        frames.append(frame)
+    table = pd.concat(frames, ignore_index=True)
+    write_table(table, path)
+    return len(table)
+
+
+def import_table(frame: pd.DataFrame, default_group: str, overwrite: bool = False) -> dict[str, int]:
+    """Import the validated table into the storage, returns the number of imported skills of each group.
+
+    Without a group column, all skills go into the default group.
+    Existing groups are replaced if overwrite is set, otherwise the imported skills are merged into them.
+    """
+    store = get_store()
+    if GROUP_COLUMN not in frame.columns:
+        frame = frame.assign(**{GROUP_COLUMN: default_group})
+    # attributes without any value are not set for any skill
+    frame = frame.drop(columns=[column for column in _extra_columns(frame) if frame[column].isna().all()])
+    frame = frame.assign(level=pd.to_numeric(frame["level"]))
+    imported = {}
+    for group, group_frame in frame.groupby(GROUP_COLUMN, sort=False):
+        name = str(group)
+        imported[name] = len(group_frame)
+        group_frame = group_frame.drop(columns=GROUP_COLUMN)
+        if not overwrite and store.exists(name):
+            group_frame = merge_frames(group_to_frame(store.read(name)), group_frame)
+        store.write(name, frame_to_group(group_frame))
+    return imported
@@ -1,11 +1,21 @@
 """Module for utility functions and constants."""
 
+import os
 from enum import Enum
+from typing import BinaryIO
 
 import typer
 
 from . import __version__
 
+DARK_GRAY = "#404040"
+BLUE = "#367DA2"
+WHITE = "#ffffff"
+
+_COLOR = str | tuple[float, float, float]
+# a picture is either saved as file or written into a binary buffer
+_TARGET = str | os.PathLike | BinaryIO
+
 
 class PictureTypes(str, Enum):
     """Save file types."""
@@ -24,6 +34,14 @@ class StyleTypes(str, Enum):
     XKCD = "xkcd"
 
 
+class ExportTypes(str, Enum):
+    """Export file types."""
+
+    JSON = "json"
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
 def version_callback(value: bool):
     """Use Callback for the --version option."""
     if value:
@@ -33,9 +51,9 @@ def version_callback(value: bool):
         raise typer.Exit()
 
 
-def c_print(text: str, color: str = typer.colors.WHITE):
-    """Print the given text in the given color."""
-    typer.echo(typer.style(text, fg=color))
+def c_print(text: str, color: str = typer.colors.WHITE, err: bool = False):
+    """Print the given text in the given color, to stderr if err is set."""
+    typer.echo(typer.style(text, fg=color), err=err)
 
 
 def success_print(text: str):
@@ -48,6 +66,6 @@ def failure_print(text: str):
     c_print(text, typer.colors.RED)
 
 
-def info_print(text: str):
+def info_print(text: str, err: bool = False):
     """Print the given text in blue."""
-    c_print(text, typer.colors.BLUE)
+    c_print(text, typer.colors.BLUE, err)
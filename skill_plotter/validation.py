@@ -0,0 +1,70 @@
+"""Module to validate skill data, e.g. before importing it.
+
+The known shape is checked by a fast hand written check, jsonschema is only used to explain invalid data.
+"""
+
+from functools import cache
+from typing import Any
+
+# schema is {"skill_name": {"level": 3.5, "category": "default"}, ...}
+SKILL_SCHEMA = {
+    "type": "object",
+    "patternProperties": {
+        ".*": {
+            "type": "object",
+            "properties": {"level": {"type": "number"}, "category": {"type": "string"}},
+            "required": ["level", "category"],
+        }
+    },
+    "additionalProperties": False,
+}
+
+
+class SkillValidationError(ValueError):
+    """Raised if skill data does not match the schema, holds the description of each problem."""
+
+    def __init__(self, errors: list[str]):
+        """Store the found errors."""
+        super().__init__(f"Found {len(errors)} invalid skills")
+        self.errors = errors
+
+
+@cache
+def _get_validator() -> Any:
+    """Build the schema validator once per process, the schema itself is only checked here."""
+    # jsonschema is only needed for invalid data, so it is loaded on demand
+    import jsonschema
+
+    validator_class = jsonschema.validators.validator_for(SKILL_SCHEMA)
+    validator_class.check_schema(SKILL_SCHEMA)
+    return validator_class(SKILL_SCHEMA)
+
+
+def is_valid_skill(values: Any) -> bool:
+    """Check a single skill entry, same rules as the schema.
+
+    Booleans are no numbers in json schema, so they are rejected as level.
+    """
+    if not isinstance(values, dict):
+        return False
+    level = values.get("level")
+    return isinstance(level, int | float) and not isinstance(level, bool) and isinstance(values.get("category"), str)
+
+
+def is_valid_data(data: Any) -> bool:
+    """Check if the given data is compatible with the schema."""
+    return isinstance(data, dict) and all(is_valid_skill(values) for values in data.values())
+
+
+def find_errors(data: Any) -> list[str]:
+    """Return a description for each problem of the data, empty list if it is valid.
+
+    Each description names the failing skill and the reason.
+    """
+    if is_valid_data(data):
+        return []
+    errors = []
+    for error in _get_validator().iter_errors(data):
+        location = error.path[0] if error.path else "file"
+        errors.append(f"{location}: {error.message}")
+    return errors
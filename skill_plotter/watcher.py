@@ -0,0 +1,113 @@
+"""Module to watch skill groups and render them again as soon as they change.
+
+The storage is polled for changes, a burst of edits is only rendered once it is over.
+Matplotlib stays loaded in the process, so each render after the first one is fast.
+"""
+
+import hashlib
+import json
+import time
+from collections.abc import Hashable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from . import preparator
+from .render import render_skills
+from .skill_table import SkillTable
+from .storage import get_store
+from .utils import PictureTypes, StyleTypes, failure_print, info_print, success_print
+
+
+@dataclass
+class _WatchedGroup:
+    """State of a watched group, changed_at is the time of the last unhandled change."""
+
+    name: str
+    token: Hashable = None
+    changed_at: float | None = None
+    data_hash: str | None = None
+
+
+def _data_hash(table: SkillTable, group_categories: bool) -> str:
+    """Hash the skills in plotting order, other changes (like rewriting the same data) need no render."""
+    if group_categories:
+        table = table.sorted_by_category()
+    return hashlib.sha256(json.dumps(list(table.items())).encode("utf-8")).hexdigest()
+
+
+def _render(
+    group: _WatchedGroup, output_dir: Path, file_types: list[PictureTypes], render_options: dict[str, Any]
+) -> bool:
+    """Render the group if its data changed, returns False if the group could not be read yet."""
+    try:
+        table = preparator.read_table(group.name)
+    except json.JSONDecodeError:
+        # the file is still being written, try again with the next check
+        return False
+    if not table:
+        failure_print(f"{group.name}: group is empty or does not exist, waiting for changes")
+        group.data_hash = None
+        return True
+    data_hash = _data_hash(table, render_options.get("group_categories", False))
+    if data_hash == group.data_hash:
+        info_print(f"{group.name}: no relevant change, skipped render")
+        return True
+    start = time.perf_counter()
+    try:
+        render_skills(table, str(output_dir / group.name), file_types, **render_options)
+    except Exception as err:
+        failure_print(f"{group.name}: render failed, {type(err).__name__}: {err}")
+        return True
+    group.data_hash = data_hash
+    success_print(f"{group.name}: rendered in {(time.perf_counter() - start) * 1000:.0f} ms")
+    return True
+
+
+def watch(
+    groups: list[str],
+    output_dir: Path,
+    file_types: list[PictureTypes],
+    render_options: dict[str, Any],
+    interval: float = 0.2,
+    debounce: float = 0.3,
+):
+    """Render the groups and render them again on each change, until stopped with Ctrl+C.
+
+    Args:
+    ----
+        groups (list[str]): Groups to watch, the pictures are named after the group.
+        output_dir (Path): Folder to save the pictures in.
+        file_types (list[PictureTypes]): File types to render.
+        render_options (dict[str, Any]): Keyword arguments of `render_skills`, used for every render.
+        interval (float, optional): Seconds between two checks for changes. Defaults to 0.2.
+        debounce (float, optional): Seconds without further changes before a group is rendered. Defaults to 0.3.
+
+    """
+    store = get_store()
+    style = render_options.get("style") or []
+    # svg is written without matplotlib, except for the xkcd style
+    if StyleTypes.XKCD in style or any(file_type != PictureTypes.SVG for file_type in file_types):
+        from .plotter import warm_up
+
+        warm_up()
+    watched = [_WatchedGroup(name) for name in groups]
+    for group in watched:
+        group.token = store.change_token(group.name)
+        _render(group, output_dir, file_types, render_options)
+    info_print(f"Watching {', '.join(groups)}, use Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(interval)
+            now = time.monotonic()
+            for group in watched:
+                token = store.change_token(group.name)
+                if token != group.token:
+                    # every change restarts the debounce time
+                    group.token = token
+                    group.changed_at = now
+                elif group.changed_at is not None and now - group.changed_at >= debounce:
+                    if _render(group, output_dir, file_types, render_options):
+                        group.changed_at = None
+    except KeyboardInterrupt:
+        pass
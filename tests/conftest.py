@@ -0,0 +1,24 @@
+from pathlib import Path
+
+import pytest
+
+from skill_plotter import storage
+
+
+@pytest.fixture(autouse=True)
+def app_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Keep the groups, index and caches of each test in its own app dir."""
+    app_dir = tmp_path / "app"
+    monkeypatch.setattr(storage, "_app_dir", str(app_dir))
+    monkeypatch.delenv("SKILL_PLOTTER_STORAGE", raising=False)
+    storage.get_store.cache_clear()
+    yield app_dir
+    storage.get_store.cache_clear()
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> storage.JsonStore | storage.SqliteStore:
+    """Return each storage engine, like it is configured by the user."""
+    monkeypatch.setenv("SKILL_PLOTTER_STORAGE", request.param)
+    storage.get_store.cache_clear()
+    return storage.get_store()
@@ -0,0 +1,32 @@
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+from skill_plotter import batch
+from skill_plotter.main import app
+from skill_plotter.storage import get_store
+from skill_plotter.utils import PictureTypes
+
+_SKILLS = {"Python": {"level": 9, "category": "languages"}}
+
+
+def test_missing_group_fails_alone(tmp_path: Path):
+    get_store().write("group", _SKILLS)
+    jobs = batch.build_jobs(["group", "missing"], [PictureTypes.SVG], [[]], tmp_path)
+    results = batch.render_jobs(jobs, 1, {"use_cache": False})
+    assert [result.error for result in results] == [None, "Group missing does not exist"]
+    assert (tmp_path / "group.svg").exists()
+    assert not (tmp_path / "missing.svg").exists()
+
+
+def test_render_all_exit_code(tmp_path: Path):
+    get_store().write("a", _SKILLS)
+    get_store().write("b", _SKILLS)
+    runner = CliRunner()
+    result = runner.invoke(app, ["render-all", "-o", str(tmp_path / "all"), "-w", "1", "--no-cache"])
+    assert result.exit_code == 0, result.output
+    assert sorted(file.name for file in (tmp_path / "all").iterdir()) == ["a.svg", "b.svg"]
+    result = runner.invoke(app, ["render-all", "a", "typo", "-o", str(tmp_path / "named"), "-w", "2"])
+    assert result.exit_code == 1
+    assert "1 of 2 renders failed" in result.output
+    assert [file.name for file in (tmp_path / "named").iterdir()] == ["a.svg"]
@@ -0,0 +1,88 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from skill_plotter import cache
+from skill_plotter.skill_table import SkillTable
+
+_SKILLS = SkillTable.from_data({"Python": {"level": 9, "category": "languages"}})
+
+
+def _key(**options) -> str:
+    arguments = {
+        "skills": _SKILLS,
+        "n_splits": 1,
+        "file_type": "svg",
+        "bar_height": 0.6,
+        "background_height": 0.7,
+        "background_color": "#333333",
+        "bar_color": "#0000ff",
+        "font_color": "#333333",
+        "canvas_color": None,
+        "style": [],
+        **options,
+    }
+    return cache.build_cache_key(**arguments)
+
+
+def _cached_files(app_dir: Path) -> list[str]:
+    return sorted(file.name for file in (app_dir / "render_cache").iterdir() if not file.name.startswith("."))
+
+
+def test_hit_and_miss(tmp_path: Path):
+    key = _key()
+    assert cache.read_cached(key, "svg") is None
+    assert not cache.restore_cached(key, "svg", tmp_path / "out.svg")
+    cache.store_bytes_in_cache(key, "svg", b"<svg/>")
+    assert cache.read_cached(key, "svg") == b"<svg/>"
+    assert cache.restore_cached(key, "svg", tmp_path / "out.svg")
+    assert (tmp_path / "out.svg").read_bytes() == b"<svg/>"
+    assert cache.read_cached(_key(n_splits=2), "svg") is None
+
+
+def test_key_changes_with_render_versions(monkeypatch: pytest.MonkeyPatch):
+    key = _key()
+    assert _key() == key
+    monkeypatch.setattr(cache, "RENDER_FORMAT_VERSION", cache.RENDER_FORMAT_VERSION + 1)
+    cache._library_versions.cache_clear()
+    try:
+        assert _key() != key
+    finally:
+        cache._library_versions.cache_clear()
+    assert {"matplotlib", "numpy", "pillow"} <= set(cache._library_versions())
+
+
+def test_least_recently_used_are_evicted(app_dir: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(cache, "_MAX_CACHE_BYTES", 300)
+    monkeypatch.setattr(cache, "_EVICTED_CACHE_BYTES", 200)
+    for index in range(3):
+        cache.store_bytes_in_cache(f"key{index}", "png", b"x" * 100)
+        os.utime(app_dir / "render_cache" / f"key{index}.png", (index, index))
+    # reading marks the oldest one as used
+    assert cache.read_cached("key0", "png")
+    cache.store_bytes_in_cache("key3", "png", b"x" * 100)
+    assert _cached_files(app_dir) == ["key0.png", "key3.png"]
+    assert cache._read_size(app_dir / "render_cache") == 200
+
+
+def test_size_is_tracked_incrementally(app_dir: Path):
+    cache.store_bytes_in_cache("key", "png", b"x" * 100)
+    cache.store_bytes_in_cache("key", "png", b"x" * 40)
+    cache.store_bytes_in_cache("other", "png", b"x" * 10)
+    cache_dir = app_dir / "render_cache"
+    assert cache._read_size(cache_dir) == 50
+    # a broken size file is rebuilt from the cached files
+    (cache_dir / ".size").write_text("broken", encoding="utf-8")
+    cache.store_bytes_in_cache("third", "png", b"x" * 5)
+    assert cache._read_size(cache_dir) == 55
+
+
+def test_temporary_files_are_not_evicted(app_dir: Path):
+    cache.store_bytes_in_cache("key", "png", b"x" * 100)
+    in_flight = app_dir / "render_cache" / "other.png.1234.tmp"
+    in_flight.write_bytes(b"partial")
+    cache.clear_cache()
+    assert in_flight.exists()
+    assert _cached_files(app_dir) == ["other.png.1234.tmp"]
+    assert cache._read_size(app_dir / "render_cache") == 0
@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+_ROOT = Path(__file__).parent.parent
+# data commands must not load any of the plotting, table or validation libraries
+_HEAVY_MODULES = ["matplotlib", "numpy", "pandas", "jsonschema", "PIL"]
+# runs the cli and writes the loaded heavy modules to the file given as first argument
+_CLI_SNIPPET = f"""
+import atexit, json, sys
+modules_file = sys.argv.pop(1)
+def _report():
+    with open(modules_file, "w") as file:
+        json.dump([m for m in {_HEAVY_MODULES!r} if m in sys.modules], file)
+atexit.register(_report)
+from skill_plotter.main import app
+sys.argv[0] = "skill-plotter"
+app()
+"""
+
+
+def _run_cli(tmp_path: Path, *args: str) -> list[str]:
+    """Run the cli in a new interpreter with its own app dir, returns the loaded heavy modules."""
+    modules_file = tmp_path / "modules.json"
+    env = {
+        **os.environ,
+        "HOME": str(tmp_path),
+        "XDG_CONFIG_HOME": str(tmp_path / ".config"),
+        "APPDATA": str(tmp_path),
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(_ROOT), os.environ.get("PYTHONPATH")])),
+    }
+    subprocess.run(
+        [sys.executable, "-c", _CLI_SNIPPET, str(modules_file), *args], env=env, check=True, capture_output=True
+    )
+    return json.loads(modules_file.read_text(encoding="utf-8"))
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["add", "Python", "5", "-c", "languages"],
+        ["list-groups"],
+        ["list-skills"],
+        ["remove", "Python"],
+    ],
+)
+def test_data_commands_load_no_heavy_modules(tmp_path: Path, args: list[str]):
+    _run_cli(tmp_path, "add", "Python", "5", "-c", "languages")
+    assert _run_cli(tmp_path, *args) == []
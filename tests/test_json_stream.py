@@ -0,0 +1,87 @@
+import io
+import json
+import random
+from typing import Any
+
+import pytest
+
+from skill_plotter.json_stream import NotAnObjectError, iter_object_items
+
+
+def _parse(text: str, chunk_size: int = 1024 * 1024, on_progress: Any = None) -> dict[str, Any]:
+    return dict(iter_object_items(io.BytesIO(text.encode("utf-8")), on_progress, chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 64])
+@pytest.mark.parametrize(
+    "text",
+    [
+        "{}",
+        " \n{ \t}\n ",
+        '{"a": 1}',
+        '{"a": -1.5e-07, "b": 12345678901234567890, "c": 1.0E+2, "d": 0}',
+        '{"a": "\\u00e4\\"\\\\", "b": "äöü €𝄞", "c": ""}',
+        '{"a": [1, [2, {"b": null}]], "b": {"c": true, "d": false}}',
+        '{"a": {"level": 1, "category": "x"}, "a": {"level": 2, "category": "y"}}',
+    ],
+)
+def test_chunks_give_same_result_as_json_loads(text: str, chunk_size: int):
+    # chunks cut numbers after their dot or exponent, escapes and multi byte characters
+    assert _parse(text, chunk_size) == json.loads(text)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 64])
+@pytest.mark.parametrize(
+    ("text", "json_type"),
+    [("[1, 2]", "array"), ('"skills"', "string"), (" 3.5 ", "number"), ("null", "null"), ("true", "boolean")],
+)
+def test_other_json_values_are_no_object(text: str, json_type: str, chunk_size: int):
+    with pytest.raises(NotAnObjectError) as error:
+        _parse(text, chunk_size)
+    assert error.value.json_type == json_type
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 64])
+@pytest.mark.parametrize(
+    "text",
+    ["", "   ", "{", '{"a": 1', '{"a": 1,}', '{"a" 1}', "{a: 1}", '{"a": tru}', '{"a": "b}', "{} {}", "[1, 2", "[1] 2"],
+)
+def test_invalid_json_raises_decode_error(text: str, chunk_size: int):
+    with pytest.raises(json.JSONDecodeError):
+        _parse(text, chunk_size)
+
+
+def test_items_are_yielded_before_the_end_is_read():
+    items = iter_object_items(io.BytesIO(b'{"a": 1, "b": 2, broken'), chunk_size=4)
+    assert next(items) == ("a", 1)
+    assert next(items) == ("b", 2)
+    with pytest.raises(json.JSONDecodeError):
+        next(items)
+
+
+def test_malformed_value_stops_reading():
+    text = '{"a": {"level": 1, "category": x}, ' + ", ".join(f'"s{i}": {{"level": 1}}' for i in range(10_000)) + "}"
+    read: list[int] = []
+    with pytest.raises(json.JSONDecodeError):
+        _parse(text, 1024, read.append)
+    assert sum(read) <= 2 * 1024
+
+
+def test_random_documents_match_json_loads():
+    rng = random.Random(0)
+
+    def value(depth: int = 0) -> Any:
+        kinds = [
+            lambda: rng.randint(-(10**20), 10**20),
+            lambda: rng.random() * 10 ** rng.randint(-8, 8),
+            lambda: "".join(rng.choice('aä€"\\\n𝄞') for _ in range(rng.randint(0, 8))),
+            lambda: rng.choice([True, False, None]),
+            lambda: [value(depth + 1) for _ in range(rng.randint(0, 3))],
+            lambda: {f"k{i}": value(depth + 1) for i in range(rng.randint(0, 3))},
+        ]
+        return rng.choice(kinds[:4] if depth > 2 else kinds)()
+
+    for _ in range(500):
+        data = {f"skill {i}": value() for i in range(rng.randint(0, 5))}
+        text = json.dumps(data, ensure_ascii=rng.random() < 0.5, indent=rng.choice([None, 1]))
+        assert _parse(text, rng.randint(1, 40)) == data
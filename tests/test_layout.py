@@ -0,0 +1,28 @@
+import pytest
+
+from skill_plotter.layout import ROW_HEIGHT, compute_layout
+from skill_plotter.render import render_to_bytes
+from skill_plotter.skill_table import SkillTable
+from skill_plotter.utils import PictureTypes
+
+_SKILLS = {f"skill {index}": {"level": index % 10, "category": "default"} for index in range(7)}
+
+
+@pytest.mark.parametrize("n_columns", [1, 2, 3])
+def test_height_fits_the_longest_column(n_columns: int):
+    layout = compute_layout(SkillTable.from_data(_SKILLS).split_columns(n_columns))
+    assert layout.height == ROW_HEIGHT * -(-len(_SKILLS) // n_columns)
+    assert 0 < layout.bottom < layout.top < 1
+    assert 0 < layout.left < layout.right < 1
+
+
+@pytest.mark.parametrize("n_columns", [1, 2])
+def test_empty_group_gets_one_row(n_columns: int):
+    layout = compute_layout(SkillTable.from_data({}).split_columns(n_columns))
+    assert layout.height == ROW_HEIGHT
+    assert 0 < layout.bottom < layout.top < 1
+
+
+@pytest.mark.parametrize("file_type", [PictureTypes.SVG, PictureTypes.PNG])
+def test_empty_group_is_rendered(file_type: PictureTypes):
+    assert render_to_bytes({}, file_type, use_cache=False)
@@ -0,0 +1,43 @@
+import pytest
+
+from skill_plotter import plotter
+from skill_plotter.layout import LABEL_PAD, POINTS_PER_INCH
+from skill_plotter.skill_table import SkillTable
+from skill_plotter.utils import StyleTypes
+
+_SKILLS = {f"Skill number {index}": {"level": index % 11, "category": "default"} for index in range(7)}
+
+
+def _figure(style: list[StyleTypes]):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = plotter._build_figure(
+        SkillTable.from_data(_SKILLS), 2, 0.6, 0.7, "#333333", "#0000ff", "#333333", None, style
+    )
+    return fig, FigureCanvasAgg(fig).get_renderer()
+
+
+@pytest.mark.parametrize(
+    ("style", "label_pad"), [([], LABEL_PAD), ([StyleTypes.ROUND], LABEL_PAD), ([StyleTypes.XKCD], LABEL_PAD + 4.5)]
+)
+def test_labels_keep_distance_of_hidden_ticks(style: list[StyleTypes], label_pad: float):
+    fig, renderer = _figure(style)
+    for ax in fig.axes:
+        label_right = max(label.get_window_extent(renderer).x1 for label in ax.get_yticklabels())
+        gap = ax.get_window_extent(renderer).x0 - label_right
+        assert gap == pytest.approx(label_pad * fig.dpi / POINTS_PER_INCH, abs=0.01)
+
+
+def test_geometry_matches_the_pyplot_diagram():
+    # pixels of the diagram from the tight layout of pyplot, before the layout was calculated
+    fig, renderer = _figure([])
+    ax = fig.axes[0]
+    assert ax.get_window_extent(renderer).bounds == pytest.approx((388.7, 15.0, 603.8, 370.0), abs=3.5)
+    # the background of the first column and the bar of the skill with level 1
+    background, bar = (
+        collection.get_paths()[0].transformed(collection.get_transform()).get_extents().bounds
+        for collection in ax.collections[:2]
+    )
+    assert background[2:] == pytest.approx((575.0, 63.6), abs=3.5)
+    assert bar[2:] == pytest.approx((56.8, 54.5), abs=0.5)
+    assert bar[0] - background[0] == pytest.approx(3.7, abs=0.1)
@@ -0,0 +1,73 @@
+import random
+from typing import Any
+
+import pytest
+
+from skill_plotter.query import SkillQuery
+from skill_plotter.storage import JsonStore, SqliteStore
+
+_CATEGORIES = ["languages", "tools", "cloud", "soft skills"]
+
+
+def _random_group(rng: random.Random, size: int) -> dict[str, dict[str, Any]]:
+    # few distinct levels, so there are many ties which are decided by the position
+    return {
+        f"skill {index}": {"level": rng.randint(0, 20) / 2, "category": rng.choice(_CATEGORIES)}
+        for index in range(size)
+    }
+
+
+def _random_query(rng: random.Random) -> SkillQuery:
+    def maybe(value: Any) -> Any:
+        return value if rng.random() < 0.4 else None
+
+    return SkillQuery(
+        include_categories=frozenset(rng.sample(_CATEGORIES, rng.randint(0, 3))) if rng.random() < 0.3 else frozenset(),
+        exclude_categories=frozenset(rng.sample(_CATEGORIES, 1)) if rng.random() < 0.2 else frozenset(),
+        min_level=maybe(rng.randint(0, 10)),
+        max_level=maybe(rng.randint(5, 10)),
+        top_per_category=maybe(rng.randint(0, 6)),
+        top=maybe(rng.randint(0, 12)),
+    )
+
+
+def _reference(data: dict[str, dict[str, Any]], query: SkillQuery) -> list[tuple[str, float, str]]:
+    """Select the rows by sorting everything, the best skills have the highest level, then the earliest position."""
+    rows = [
+        (position, name, values["level"], values["category"])
+        for position, (name, values) in enumerate(data.items())
+        if query.matches(values["level"], values["category"])
+    ]
+
+    def best(candidates: list, n: int) -> list:
+        return sorted(candidates, key=lambda row: (-row[2], row[0]))[:n]
+
+    if query.top_per_category is not None:
+        rows = [
+            row
+            for category in _CATEGORIES
+            for row in best([row for row in rows if row[3] == category], query.top_per_category)
+        ]
+    if query.top is not None:
+        rows = best(rows, query.top)
+    return [(name, level, category) for _, name, level, category in sorted(rows)]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_select_rows_matches_reference(store: JsonStore | SqliteStore, seed: int):
+    rng = random.Random(seed)
+    data = _random_group(rng, rng.randint(0, 60))
+    store.write("group", data)
+    for _ in range(20):
+        query = _random_query(rng)
+        assert list(store.select_rows("group", query)) == _reference(data, query), query
+
+
+def test_select_rows_keeps_order_after_edits(store: JsonStore | SqliteStore):
+    store.write("group", {"a": {"level": 5, "category": "x"}, "b": {"level": 7, "category": "x"}})
+    store.set_skill("group", "c", 9, "y")
+    store.remove_skill("group", "a")
+    store.set_skill("group", "a", 7, "x")
+    query = SkillQuery(top=2)
+    assert list(store.select_rows("group", query)) == [("b", 7, "x"), ("c", 9, "y")]
+    assert list(store.select_rows("missing", query)) == []
@@ -0,0 +1,96 @@
+import multiprocessing
+import os
+from pathlib import Path
+
+import click
+import pytest
+from typer.testing import CliRunner
+
+from skill_plotter import session, storage
+from skill_plotter.main import app
+from skill_plotter.storage import JsonStore, SqliteStore
+
+_SKILLS = {"Python": {"level": 9, "category": "languages"}, "Git": {"level": 6, "category": "tools"}}
+
+
+def _crashing_session(skill: str) -> None:
+    """Edit the group in a session whose process dies without leaving it."""
+    storage.get_store.cache_clear()
+    edit_session = session.EditSession("group").__enter__()
+    edit_session.set_skill(skill, 4, "languages")
+    edit_session.remove_skill("Git")
+    os._exit(1)
+
+
+def _crash(skill: str) -> None:
+    process = multiprocessing.get_context("fork").Process(target=_crashing_session, args=(skill,))
+    process.start()
+    process.join()
+    assert process.exitcode == 1
+
+
+def _journals(app_dir: Path) -> list[Path]:
+    return sorted(app_dir.glob("group.journal.*"))
+
+
+def test_interrupted_session_is_recovered(store: JsonStore | SqliteStore, app_dir: Path):
+    store.write("group", _SKILLS)
+    _crash("Rust")
+    assert store.read("group") == _SKILLS
+    assert len(_journals(app_dir)) == 1
+    assert session.recover_journal("group")
+    assert store.read("group") == {
+        "Python": {"level": 9, "category": "languages"},
+        "Rust": {"level": 4, "category": "languages"},
+    }
+    assert not _journals(app_dir)
+    assert not session.recover_journal("group")
+
+
+def test_running_sessions_keep_their_journals(store: JsonStore | SqliteStore, app_dir: Path):
+    store.write("group", _SKILLS)
+    with session.EditSession("group") as running:
+        running.set_skill("Go", 5, "languages")
+        # the running session is not recovered by the crashing one
+        _crash("Rust")
+        assert len(_journals(app_dir)) == 2
+        assert not session.recover_journal("other")
+    # leaving the session only removes its own journal
+    assert len(_journals(app_dir)) == 1
+    assert "Rust" not in store.read("group")
+    with session.EditSession("group") as recovering:
+        assert recovering.data == {
+            "Python": {"level": 9, "category": "languages"},
+            "Go": {"level": 5, "category": "languages"},
+            "Rust": {"level": 4, "category": "languages"},
+        }
+    assert not _journals(app_dir)
+
+
+def test_journal_of_older_versions_is_recovered(app_dir: Path):
+    JsonStore().write("group", _SKILLS)
+    (app_dir / "group.journal").write_text('{"op": "remove", "skill": "Git"}\n', encoding="utf-8")
+    # journals of other groups starting with the same name are kept
+    (app_dir / "group.journal.journal.1").write_text('{"op": "remove", "skill": "Python"}\n', encoding="utf-8")
+    assert session.recover_journal("group")
+    assert JsonStore().read("group") == {"Python": {"level": 9, "category": "languages"}}
+    assert (app_dir / "group.journal.journal.1").exists()
+
+
+def test_session_is_stored_on_abort(store: JsonStore | SqliteStore):
+    store.write("group", _SKILLS)
+    with pytest.raises(click.Abort), session.EditSession("group") as edit_session:
+        edit_session.set_skill("Rust", 4, "languages")
+        raise click.Abort
+    assert store.read("group")["Rust"] == {"level": 4, "category": "languages"}
+
+
+def test_interactive_add_is_stored_on_abort(app_dir: Path):
+    # the input ends after the second skill, like pressing Ctrl+C at the prompt
+    result = CliRunner().invoke(app, ["interactive-add", "-g", "group", "-c", "tools"], input="Docker\n7\nGit\n3\n")
+    assert result.exit_code == 1
+    assert JsonStore().read("group") == {
+        "Docker": {"level": 7, "category": "tools"},
+        "Git": {"level": 3, "category": "tools"},
+    }
+    assert not _journals(app_dir)
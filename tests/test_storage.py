@@ -0,0 +1,140 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from skill_plotter import storage
+from skill_plotter.storage import JsonStore, SqliteStore
+
+_SKILLS = {"Python": {"level": 9, "category": "languages"}, "Git": {"level": 6, "category": "tools"}}
+
+
+def _log_lines(app_dir: Path, group: str) -> list[dict]:
+    return [json.loads(line) for line in (app_dir / f"{group}.log").read_text(encoding="utf-8").splitlines()]
+
+
+def test_edits_are_appended_and_replayed(app_dir: Path):
+    store = JsonStore()
+    store.write("group", _SKILLS)
+    snapshot = (app_dir / "group.json").read_bytes()
+    store.set_skill("group", "Rust", 4, "languages")
+    store.set_skill("group", "Python", 10, "languages")
+    assert store.remove_skill("group", "Git")
+    assert not store.remove_skill("group", "Git")
+    # the snapshot is untouched, only the log grows
+    assert (app_dir / "group.json").read_bytes() == snapshot
+    assert [entry["op"] for entry in _log_lines(app_dir, "group")] == ["set", "set", "remove"]
+    assert JsonStore().read("group") == {
+        "Python": {"level": 10, "category": "languages"},
+        "Rust": {"level": 4, "category": "languages"},
+    }
+
+
+def test_torn_log_line_is_skipped(app_dir: Path):
+    store = JsonStore()
+    store.write("group", _SKILLS)
+    store.set_skill("group", "Rust", 4, "languages")
+    # a crash in the middle of an append
+    with open(app_dir / "group.log", "ab") as log:
+        log.write(b'{"op": "set", "skill": "Go", "lev')
+    assert "Go" not in store.read("group")
+    store.set_skill("group", "Java", 2, "languages")
+    assert list(store.read("group")) == ["Python", "Git", "Rust", "Java"]
+
+
+def test_log_only_group_is_listed(app_dir: Path):
+    store = JsonStore()
+    store.set_skill("group", "Rust", 4, "languages")
+    assert not (app_dir / "group.json").exists()
+    assert store.exists("group")
+    assert store.groups() == ["group"]
+    assert store.read("group") == {"Rust": {"level": 4, "category": "languages"}}
+
+
+def test_big_log_is_compacted(app_dir: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(storage, "_LOG_COMPACT_BYTES", 300)
+    store = JsonStore()
+    store.write("group", _SKILLS)
+    expected = dict(_SKILLS)
+    for index in range(20):
+        store.set_skill("group", f"skill {index}", index / 2, "generated")
+        expected[f"skill {index}"] = {"level": index / 2, "category": "generated"}
+        log_file = app_dir / "group.log"
+        assert not log_file.exists() or log_file.stat().st_size <= 300
+    store.remove_skill("group", "Git")
+    del expected["Git"]
+    assert store.read("group") == expected
+    # the compacted edits moved into the snapshot
+    assert len(json.loads((app_dir / "group.json").read_text(encoding="utf-8"))) > len(_SKILLS)
+
+
+def test_apply_entries_keeps_order(store: JsonStore | SqliteStore):
+    store.write("group", _SKILLS)
+    store.apply_entries(
+        "group",
+        [
+            {"op": "set", "skill": "Rust", "level": 4, "category": "languages"},
+            {"op": "remove", "skill": "Python"},
+            {"op": "remove", "skill": "missing"},
+            {"op": "set", "skill": "Python", "level": 3, "category": "languages"},
+            {"op": "set", "skill": "Go", "level": 5, "category": "languages"},
+            {"op": "remove", "skill": "Go"},
+        ],
+    )
+    assert store.read("group") == {
+        "Git": {"level": 6, "category": "tools"},
+        "Rust": {"level": 4, "category": "languages"},
+        "Python": {"level": 3, "category": "languages"},
+    }
+    summary = store.summary("group")
+    assert summary is not None and (summary.skills, summary.categories) == (3, ["languages", "tools"])
+
+
+def test_apply_entries_creates_groups_only_by_setting(store: JsonStore | SqliteStore):
+    store.apply_entries("removed", [{"op": "remove", "skill": "Python"}])
+    assert not store.exists("removed")
+    store.apply_entries("new", [{"op": "set", "skill": "Python", "level": 9, "category": "languages"}])
+    assert store.read("new") == {"Python": {"level": 9, "category": "languages"}}
+    assert store.groups() == ["new"]
+
+
+def test_apply_entries_writes_one_log_block(app_dir: Path, monkeypatch: pytest.MonkeyPatch):
+    store = JsonStore()
+    store.write("group", _SKILLS)
+    blocks = []
+    append_log_entries = storage.append_log_entries
+    monkeypatch.setattr(
+        storage, "append_log_entries", lambda log, entries: blocks.append(append_log_entries(log, entries))
+    )
+    entries = [{"op": "set", "skill": f"skill {index}", "level": 1, "category": "generated"} for index in range(50)]
+    store.apply_entries("group", entries)
+    assert len(blocks) == 1
+    assert _log_lines(app_dir, "group") == entries
+
+
+def test_json_groups_are_migrated_to_sqlite(app_dir: Path):
+    json_store = JsonStore()
+    json_store.write("a", {**_SKILLS, "Docker": {"level": 7, "category": "tools", "years": 3, "tags": ["ops"]}})
+    json_store.set_skill("b", "Rust", 4, "languages")
+    sqlite_store = SqliteStore()
+    assert sqlite_store.groups() == ["a", "b"]
+    # additional attributes are kept next to the indexed columns
+    assert sqlite_store.read("a") == json_store.read("a")
+    assert sqlite_store.read("b") == {"Rust": {"level": 4, "category": "languages"}}
+    # the migration is only done once, later json changes are not taken over
+    json_store.write("c", _SKILLS)
+    assert SqliteStore().groups() == ["a", "b"]
+
+
+def test_sqlite_edits_keep_the_plotting_order(app_dir: Path):
+    store = SqliteStore()
+    store.write("group", _SKILLS)
+    store.set_skill("group", "Rust", 4, "languages")
+    store.set_skill("group", "Python", 10, "languages")
+    assert store.remove_skill("group", "Git")
+    store.set_skill("group", "Git", 1, "tools")
+    assert list(store.read("group")) == ["Python", "Rust", "Git"]
+    assert store.read("group")["Python"]["level"] == 10
+    assert store.delete("group")
+    assert not store.exists("group")
+    assert store.read("group") == {}
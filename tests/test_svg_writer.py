@@ -0,0 +1,53 @@
+import pytest
+
+from skill_plotter.skill_table import SkillTable
+from skill_plotter.svg_writer import build_skill_svg, patch_skill_svg
+from skill_plotter.utils import BLUE, DARK_GRAY, WHITE, StyleTypes
+
+_SKILLS = {
+    "Python": {"level": 9, "category": "languages"},
+    "Rust": {"level": 4.5, "category": "languages"},
+    "Docker": {"level": 7, "category": "tools"},
+    "Git": {"level": 0, "category": "tools"},
+    "Kubernetes": {"level": 10, "category": "tools"},
+}
+
+
+def _with_levels(levels: dict[str, float]) -> SkillTable:
+    return SkillTable.from_data(
+        {name: {**values, "level": levels.get(name, values["level"])} for name, values in _SKILLS.items()}
+    )
+
+
+@pytest.mark.parametrize("style", [[], [StyleTypes.ROUND]])
+@pytest.mark.parametrize("n_splits", [1, 2])
+def test_patched_svg_equals_full_build(style: list[StyleTypes], n_splits: int):
+    old_options = (0.6, 0.7, DARK_GRAY, BLUE, DARK_GRAY, WHITE, style)
+    new_options = (0.6, 0.7, BLUE, DARK_GRAY, WHITE, "#123456", style)
+    svg = build_skill_svg(SkillTable.from_data(_SKILLS), n_splits, *old_options)
+    new_skills = _with_levels({"Python": 3, "Rust": 10, "Kubernetes": 0.5})
+    patched = patch_skill_svg(svg, new_skills, n_splits, *new_options)
+    assert patched == build_skill_svg(new_skills, n_splits, *new_options)
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {"skills": SkillTable.from_data({**_SKILLS, "Go": {"level": 5, "category": "languages"}})},
+        {"n_splits": 3},
+        # empty bars are not drawn at all
+        {"skills": _with_levels({"Git": 6.5})},
+        {"skills": _with_levels({"Python": 0})},
+        {"canvas_color": WHITE},
+        {"bar_height": 0.4},
+        {"style": [StyleTypes.ROUND]},
+    ],
+)
+def test_layout_changes_need_full_build(change: dict):
+    svg = build_skill_svg(SkillTable.from_data(_SKILLS), 2)
+    arguments = {"skills": SkillTable.from_data(_SKILLS), "n_splits": 2, **change}
+    assert patch_skill_svg(svg, **arguments) is None
+
+
+def test_foreign_svg_needs_full_build():
+    assert patch_skill_svg("<svg></svg>", SkillTable.from_data(_SKILLS), 2) is None